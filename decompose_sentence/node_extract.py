@@ -1,85 +1,66 @@
-import spacy
-from typing import List, Dict
+from __future__ import annotations
 
-# Load the spaCy English model
-nlp = spacy.load("en_core_web_sm")
+from typing import TYPE_CHECKING, Iterable, List, Dict, Optional
 
-def clause_decomposition(sentence: str) -> List[str]:
-    """
-    Decomposes the input sentence into a list of clauses.
-    
-    The approach here is a simple heuristic: we search for subordinating 
-    conjunction markers (like "if", "because", "when", etc.) that are labeled
-    as a marker (dep == "mark"). If found, we treat the text before the first 
-    marker as one clause (typically the main clause) and the text from the marker 
-    onward as the subordinate clause. 
-    
-    For a sentence without such markers, the entire sentence is returned as a single clause.
-    """
-    doc = nlp(sentence)
-    subordinate_markers = {"if", "because", "while", "although", "since", "when"}
-    marker_index = None
-    for token in doc:
-        if token.text.lower() in subordinate_markers and token.dep_ == "mark":
-            marker_index = token.i
-            break
+if TYPE_CHECKING:
+    from spacy.tokens import Doc, Span
 
-    if marker_index is None:
-        return [sentence.strip()]
+# Only the dependency parse is used; the other components of the model are not loaded
+_UNUSED_COMPONENTS = ["ner", "lemmatizer", "attribute_ruler", "tagger", "senter"]
+_SUBORDINATE_MARKERS = {"if", "because", "while", "although", "since", "when"}
 
-    # The main clause is everything before the first subordinate marker.
-    main_clause = doc[:marker_index].text.strip()
-    # The subordinate clause is from the marker until the end.
-    subordinate_clause = doc[marker_index:].text.strip()
-    
-    return [main_clause, subordinate_clause]
+_nlp = None
 
-def extract_components(clause: str) -> Dict[str, str]:
-    """
-    Applies a subject–predicate–complement (S-P-C) extraction on the given clause.
-    
-    - The **subject** is identified as the first token with a dependency label in {"nsubj", "nsubjpass"}.
-    - The **predicate** is based on the ROOT token of the clause and includes auxiliaries and negations.
-    - The **complement** is searched for among children of the ROOT with dependency labels like "attr", "dobj", 
-      or found within a prepositional phrase (e.g., "of a target group").
-    
-    Returns a dictionary with keys "subject", "predicate", and "complement".
-    """
-    doc = nlp(clause)
+
+def get_nlp():
+    """Import spaCy and load the English model on first use, with only the components needed for parsing"""
+    global _nlp
+    if _nlp is None:
+        import spacy
+
+        _nlp = spacy.load("en_core_web_sm", exclude=_UNUSED_COMPONENTS)
+    return _nlp
+
+
+def __getattr__(name):
+    # Backwards compatible access to the module level `nlp`, now loaded lazily
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _clause_spans(doc: Doc) -> List[Span]:
+    """Split a parsed sentence at its first subordinate marker (see clause_decomposition)"""
+    for token in doc:
+        if token.text.lower() in _SUBORDINATE_MARKERS and token.dep_ == "mark":
+            return [doc[:token.i], doc[token.i:]]
+    return [doc[:]]
+
+
+def _extract_doc_components(doc: Doc) -> Dict[str, str]:
+    """S-P-C extraction on an already parsed clause (see extract_components)"""
     subject = None
     predicate = None
     complement = None
 
-    # 1. Find the subject: typically a token with the dependency "nsubj" or "nsubjpass"
+    # 1. Subject: the first nsubj/nsubjpass token, expanded to its subtree
     for token in doc:
         if token.dep_ in {"nsubj", "nsubjpass"}:
-            # Expand to cover the full subtree of the subject for a more complete phrase.
             subject = doc[token.left_edge.i: token.right_edge.i + 1].text
             break
 
-    # 2. Identify the predicate: we use the token that is the sentence ROOT,
-    #    including attached auxiliaries and negations.
-    root = None
-    for token in doc:
-        if token.dep_ == "ROOT":
-            root = token
-            break
+    # 2. Predicate: the sentence ROOT with its auxiliaries and negations
+    root = next((token for token in doc if token.dep_ == "ROOT"), None)
     if root:
-        aux_parts = []
-        for child in root.children:
-            if child.dep_ in {"aux", "auxpass", "neg"}:
-                aux_parts.append(child.text)
-        # Combine the auxiliaries/negations with the main verb.
+        aux_parts = [child.text for child in root.children if child.dep_ in {"aux", "auxpass", "neg"}]
         predicate = " ".join(aux_parts + [root.text])
 
-    # 3. Extract a complement: look for an attribute or direct object.
+    # 3. Complement: an attribute or direct object, or the object of a preposition
     if root:
         for child in root.children:
             if child.dep_ in {"attr", "dobj"}:
                 complement = doc[child.left_edge.i: child.right_edge.i + 1].text
                 break
-            # Alternatively, if the child is a preposition (like "of"),
-            # look for its object.
             if child.dep_ == "prep":
                 for subchild in child.children:
                     if subchild.dep_ == "pobj":
@@ -94,6 +75,36 @@ def extract_components(clause: str) -> Dict[str, str]:
         "complement": complement
     }
 
+def clause_decomposition(sentence: str) -> List[str]:
+    """
+    Decomposes the input sentence into a list of clauses.
+    
+    The approach here is a simple heuristic: we search for subordinating 
+    conjunction markers (like "if", "because", "when", etc.) that are labeled
+    as a marker (dep == "mark"). If found, we treat the text before the first 
+    marker as one clause (typically the main clause) and the text from the marker 
+    onward as the subordinate clause. 
+    
+    For a sentence without such markers, the entire sentence is returned as a single clause.
+    """
+    spans = _clause_spans(get_nlp()(sentence))
+    if len(spans) == 1:
+        return [sentence.strip()]
+    return [span.text.strip() for span in spans]
+
+def extract_components(clause: str) -> Dict[str, str]:
+    """
+    Applies a subject–predicate–complement (S-P-C) extraction on the given clause.
+    
+    - The **subject** is identified as the first token with a dependency label in {"nsubj", "nsubjpass"}.
+    - The **predicate** is based on the ROOT token of the clause and includes auxiliaries and negations.
+    - The **complement** is searched for among children of the ROOT with dependency labels like "attr", "dobj", 
+      or found within a prepositional phrase (e.g., "of a target group").
+    
+    Returns a dictionary with keys "subject", "predicate", and "complement".
+    """
+    return _extract_doc_components(get_nlp()(clause))
+
 def decompose_and_extract(sentence: str) -> List[Dict[str, str]]:
     """
     Combines clause decomposition with S-P-C extraction.
@@ -104,13 +115,48 @@ def decompose_and_extract(sentence: str) -> List[Dict[str, str]]:
     
     Returns a list of dictionaries, one per clause.
     """
-    clauses = clause_decomposition(sentence)
-    components_list = []
-    for clause in clauses:
-        components = extract_components(clause)
-        components["clause"] = clause  # add the original clause text for reference
-        components_list.append(components)
-    return components_list
+    return decompose_and_extract_many([sentence])[0]
+
+def decompose_and_extract_many(sentences: Iterable[str], batch_size: int = 64,
+                               n_process: int = 1) -> List[List[Dict[str, str]]]:
+    """
+    Batch version of decompose_and_extract.
+
+    Sentences are parsed with nlp.pipe. A single-clause sentence is extracted from that
+    parse directly. The clauses of the other sentences are still parsed a second time, on
+    their own as extract_components does, in one more nlp.pipe pass: parsed within the
+    sentence, a subordinate clause can get a different root or subject, so extracting from
+    the sentence parse would change the output. Only the batching is gained for them.
+
+    Args:
+        sentences: The sentences to process
+        batch_size: Number of sentences per nlp.pipe batch
+        n_process: Number of processes used by nlp.pipe
+
+    Returns:
+        One list of clause dictionaries per sentence, in input order.
+    """
+    nlp = get_nlp()
+    results = []
+    pending = []  # (clause list, position, clause text) of the clauses to parse on their own
+    for doc in nlp.pipe(sentences, batch_size=batch_size, n_process=n_process):
+        spans = _clause_spans(doc)
+        if len(spans) == 1 and doc.text == doc.text.strip():
+            components = _extract_doc_components(doc)
+            components["clause"] = doc.text  # add the original clause text for reference
+            results.append([components])
+            continue
+        clauses = [doc.text.strip()] if len(spans) == 1 else [span.text.strip() for span in spans]
+        components_list = [None] * len(clauses)
+        pending.extend((components_list, i, clause) for i, clause in enumerate(clauses))
+        results.append(components_list)
+
+    clause_docs = nlp.pipe([clause for _, _, clause in pending], batch_size=batch_size, n_process=n_process)
+    for (components_list, i, clause), clause_doc in zip(pending, clause_docs):
+        components = _extract_doc_components(clause_doc)
+        components["clause"] = clause
+        components_list[i] = components
+    return results
 
 # Test the functions with the provided sentence
 if __name__ == "__main__":
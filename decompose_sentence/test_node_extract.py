@@ -0,0 +1,37 @@
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+import node_extract
+from node_extract import clause_decomposition, decompose_and_extract_many, extract_components
+
+SENTENCES = [
+    "stereotype is a false generalizations of a target group if the generalizations does not "
+    "apply to some individuals from the target group",
+    "Women are bad drivers because they are emotional",
+    "Engineers are smart",
+    "  Nurses are caring when patients are sick ",
+]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def model():
+    try:
+        node_extract.get_nlp()
+    except OSError:
+        pytest.skip("en_core_web_sm is not installed")
+
+
+def _one_sentence_at_a_time(sentence):
+    # The unbatched path: split the sentence, then parse each clause on its own
+    results = []
+    for clause in clause_decomposition(sentence):
+        components = extract_components(clause)
+        components["clause"] = clause
+        results.append(components)
+    return results
+
+
+def test_batch_matches_parsing_each_clause():
+    assert decompose_and_extract_many(SENTENCES, batch_size=2) == \
+        [_one_sentence_at_a_time(sentence) for sentence in SENTENCES]
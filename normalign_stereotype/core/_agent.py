@@ -1,9 +1,16 @@
 import json
 import os
+import weakref
 from normalign_stereotype.core._tools import LLMTool as LLM
 import tempfile
 from normalign_stereotype.core._reference import element_action
+from normalign_stereotype.core._lazy_reference import materialize
+from normalign_stereotype.core._sparse_reference import SPARSE_DENSITY, sparsify
 from normalign_stereotype.core._concept import Concept
+from normalign_stereotype.core._token_budget import TokenLedger, fit_input_value
+from normalign_stereotype.core._memory import memory_key, open_body_memory, resolve_memory_backend
+from normalign_stereotype.core._result_store import open_body_result_store
+from normalign_stereotype.core._concurrency import AdaptiveConcurrencyLimiter
 import re
 
 
@@ -122,79 +129,134 @@ def customize_actuation_working_config(concept_name, prompt_template_dir=None, m
 
     return actuation_working_config
 
+
+def _remove_temporary_memory(path):
+    # The JSON memory also leaves the sidecar file of its lock
+    for file in (path, path + ".lock"):
+        try:
+            os.remove(file)
+        except OSError:
+            pass
+
+
 class Agent:
     def __init__(self, body):
+        # Without a memory_location the agent works in a temporary JSON memory it owns: the
+        # file is deleted by close(), or when the agent is collected or the process exits
+        self._memory_finalizer = None
+        if body.get('memory_location') is None:
+            fd, memory_location = tempfile.mkstemp(prefix="memory_", suffix=".json")
+            with os.fdopen(fd, "w") as f:
+                json.dump({}, f)
+            body = {**body, 'memory_location': memory_location}
+            self._memory_finalizer = weakref.finalize(self, _remove_temporary_memory, memory_location)
         self._validate_body(body)
         self.body = body
         self.working_memory = {
             'perception': {},
             'actuation': {},
         }
+        # body['memory_backend'] is "json" or "sqlite" (by default it follows the file suffix);
+        # an SQLite memory also takes 'memory_namespace' and 'shared_memory_namespace'
+        self.memory = open_body_memory(body)
+        # Optional body['result_store']: the outputs of cognition are also appended there per statement
+        self.result_store = open_body_result_store(body)
+        self.token_ledger = body.get('token_ledger') or TokenLedger()
+        # body['llm_cassette'] (an LLMCassette) records or replays the calls of every LLM of the body
+        cassette = body.get('llm_cassette')
+        # body['concurrency_limiter'] (an AdaptiveConcurrencyLimiter, or True for a default one)
+        # bounds the calls in flight across every LLM of the body; see concurrency_limiter.metrics()
+        self.concurrency_limiter = body.get('concurrency_limiter')
+        if self.concurrency_limiter is True:
+            self.concurrency_limiter = AdaptiveConcurrencyLimiter()
+        # Results of cognition with at most body['sparse_density'] of their cells present are
+        # kept as SparseReferences, so later inferences only visit (and call LLMs for) those cells
+        self.sparse_density = body.get('sparse_density', SPARSE_DENSITY)
+        for tool in body.values():
+            if isinstance(tool, LLM) and tool.token_ledger is None:
+                tool.token_ledger = self.token_ledger
+            if isinstance(tool, LLM) and cassette is not None:
+                tool.cassette = cassette
+            if isinstance(tool, LLM) and self.concurrency_limiter is not None:
+                tool.limiter = self.concurrency_limiter
 
     def _validate_body(self, body):
         """Validate initialization parameters"""
         if 'llm' not in body or not isinstance(body['llm'], LLM):
             raise ValueError("Requires LLM instance in body")
-        if 'memory_location' not in body or not os.path.exists(body['memory_location']):
+        # An SQLite memory is created on first use, a JSON memory file must exist
+        if (resolve_memory_backend(body['memory_location'], body.get('memory_backend')) == "json"
+                and not os.path.exists(body['memory_location'])):
             raise ValueError("Valid file path required for memory_location")
 
+    def close(self):
+        """Close the memory store, deleting it if it is the agent's temporary memory"""
+        self.memory.close()
+        if self._memory_finalizer is not None:
+            self._memory_finalizer()
+
     def cognition(self, concept, mode = "memory_bullet", perception_working_config = None, actuation_working_config = None, **kwargs):
         """Process values into names and store"""
 
         if not isinstance(concept, Concept):
             raise ValueError("Perception requires Concept instance")
 
-        raw_reference = concept.reference
+        # A lazy reference is evaluated first: element_action on it would only record the
+        # memory writes below, to run whenever (and as often as) its leaves are pulled.
+        # A mostly skipped reference is made sparse, so only its present cells are visited
+        raw_reference = sparsify(materialize(concept.reference), self.sparse_density)
         concept_name = concept.comprehension.get("name")
 
         if mode == "memory_bullet":
             self.working_memory['perception'][concept_name] = perception_working_config or {"mode": "memory_retrieval"}
             self.working_memory['actuation'][concept_name] = actuation_working_config or {"mode": "classification"}
+            # Collect the bullets of the whole reference and store them in one batch
+            pending = []
             _cognition_memory_bullet_element = lambda bullet: self._cognition_memory_bullet(
                 bullet,
                 concept_name,
+                pending,
             )
-            return element_action(_cognition_memory_bullet_element, [raw_reference])
+            names = element_action(_cognition_memory_bullet_element, [raw_reference])
+            self.memory.set_many(pending)
+            if self.result_store is not None:
+                self.result_store.append((concept_name, name, value) for name, concept_name, value in pending)
+            return names
 
         raise ValueError(f"Unknown cognition mode: {mode}")
 
-    def _cognition_memory_bullet(self, bullet, concept_name):
+    def _cognition_memory_bullet(self, bullet, concept_name, pending=None):
         value, name = bullet.rsplit(':', 1)
-        self._update_memory(name.strip(), value.strip(), concept_name)
+        if pending is None:
+            self._update_memory(name.strip(), value.strip(), concept_name)
+        else:
+            pending.append((name.strip(), concept_name, value.strip()))
         return name
 
-    def _key_memory(self, name_may_list, concept_name_may_list):
-        """Format name-concept pairs as key for searching in memory, handling both single values and lists"""
+    def _memory_pairs(self, name_may_list, concept_name_may_list):
+        """(name, concept) pairs addressing memory: two lists are zipped, a single name or concept is repeated"""
 
-        # Both are lists - zip them together
         if isinstance(name_may_list, list) and isinstance(concept_name_may_list, list):
             if len(name_may_list) != len(concept_name_may_list):
                 raise ValueError("name_may_list and concept_name_may_list must be same length when both are lists")
-            return [f"{n} ({c})" for n, c in zip(name_may_list, concept_name_may_list)]
-
-        # Name is list but concept is single - apply same concept to all names
+            return list(zip(name_may_list, concept_name_may_list))
         elif isinstance(name_may_list, list):
-            return [f"{n} ({concept_name_may_list})" for n in name_may_list]
-
-        # Concept is list but name is single - apply same name to all concepts
+            return [(n, concept_name_may_list) for n in name_may_list]
         elif isinstance(concept_name_may_list, list):
-            return [f"{name_may_list} ({c})" for c in concept_name_may_list]
-
-        # Both are single values - simple combination
+            return [(name_may_list, c) for c in concept_name_may_list]
         else:
-            return f"{name_may_list} ({concept_name_may_list})"
+            return (name_may_list, concept_name_may_list)
 
-    def _update_memory(self, name, value, concept_name):
-        """Persist data to JSON file using JSON Lines format (one JSON object per line)"""
-
-        _key_memory_concept = lambda x:self._key_memory(x, concept_name)
+    def _key_memory(self, name_may_list, concept_name_may_list):
+        """Format name-concept pairs as key for searching in memory, handling both single values and lists"""
+        pairs = self._memory_pairs(name_may_list, concept_name_may_list)
+        if isinstance(pairs, list):
+            return [memory_key(n, c) for n, c in pairs]
+        return memory_key(*pairs)
 
-        with open(self.body['memory_location'], 'r+') as f:
-            data = json.load(f)  # Reads and moves pointer to EOF
-            data[_key_memory_concept(name)] = value  # Modify data
-            f.seek(0)  # Move pointer back to start
-            json.dump(data, f)  # Write new data (overwrites from position 0)
-            f.truncate()
+    def _update_memory(self, name, value, concept_name):
+        """Persist one name-value pair of a concept to the memory store"""
+        self.memory.set(name, concept_name, value)
 
     def perception(self, concept):
         """Retrieve values through different perception modes"""
@@ -228,7 +290,8 @@ class Agent:
         elif mode == 'memory_retrieval':
             _memory_retrieval_perception = lambda name_may_list:(
                 self._perception_memory_retrieval(
-                    _key_memory_concept(name_may_list)
+                    name_may_list,
+                    concept_name_may_list,
                 )
             )
 
@@ -254,21 +317,13 @@ class Agent:
         """Direct value return"""
         return [name_may_list, name_may_list]
 
-    def _perception_memory_retrieval(self, name_may_list):
-        """File-based value retrieval from JSONL storage"""
-        with open(self.body['memory_location'], 'r', encoding='utf-8') as f:
-            memory = eval(f.read())
-            if isinstance(name_may_list,list):
-                name_list = name_may_list
-                value_list = []
-                for name in name_list:
-                    value = memory.get(name)
-                    value_list.append(value)
-                return [name_list, value_list]
-            else:
-                name = name_may_list
-                value = memory.get(name)
-                return [name, value]
+    def _perception_memory_retrieval(self, name_may_list, concept_name_may_list):
+        """Value retrieval from the memory store, one batched lookup for list-valued names"""
+        keys = self._key_memory(name_may_list, concept_name_may_list)
+        pairs = self._memory_pairs(name_may_list, concept_name_may_list)
+        if isinstance(pairs, list):
+            return [keys, self.memory.get_many(pairs)]
+        return [keys, self.memory.get(pairs)]
 
     def _perception_llm_generation(self, name_may_list, prompt_template, llm, name_holder="{input}"):
         """LLM-processed value retrieval (supports single names or lists)"""
@@ -298,7 +353,7 @@ class Agent:
         actuation_configuration = self.working_memory['actuation']
         concept_configuration = actuation_configuration.get(concept_name)
 
-        _key_memory_concept = lambda x:self._key_memory(x, concept_name)
+        _memory_pair_concept = lambda x:self._memory_pairs(x, concept_name)
         mode = concept_configuration.get("mode")
      
 
@@ -315,8 +370,9 @@ class Agent:
                 name,
                 prompt_template,
                 place_holders,
-                _key_memory_concept,
+                _memory_pair_concept,
                 actuated_llm,
+                prompt_budget=self._prompt_budget(concept_configuration),
             ))
 
             return element_action(_classification_actuation, [reference])
@@ -335,9 +391,10 @@ class Agent:
                 name,
                 prompt_template,
                 place_holders,
-                _key_memory_concept,
+                _memory_pair_concept,
                 meta_llm,
                 actuated_llm,
+                prompt_budget=self._prompt_budget(concept_configuration),
             ))
             return element_action(_pos_actuation, [reference])
         
@@ -355,9 +412,10 @@ class Agent:
                     name,
                     prompt_template,
                     place_holders,
-                    _key_memory_concept,
+                    _memory_pair_concept,
                     meta_prompt_llm,
                     actuated_llm,
+                    prompt_budget=self._prompt_budget(concept_configuration),
                 ))
             return element_action(_llm_prompt_generation_replacement_actuation, [reference])
 
@@ -374,8 +432,9 @@ class Agent:
                 name,
                 prompt_template,
                 place_holders,
-                _key_memory_concept,
+                _memory_pair_concept,
                 actuated_llm,
+                prompt_budget=self._prompt_budget(concept_configuration),
             ))
 
             return element_action(_classification_actuation, [reference])
@@ -390,24 +449,43 @@ class Agent:
         text = re.sub(r'\s+', ' ', text).strip()
         return text
 
-    def _actuation_llm_prompt_two_replacement(self, to_actuate_name, prompt_template, place_holders, key_build,
-                                              actuated_llm):
+    def _prompt_budget(self, concept_configuration):
+        """Prompt-size guardrail for a concept: its own 'prompt_budget' or the agent-wide one in the body.
+
+        A prompt budget looks like {"max_prompt_tokens": 4000, "policy": "truncate" | "summarize",
+        "summarizer_llm": "llm"}.
+        """
+        return concept_configuration.get('prompt_budget') or self.body.get('prompt_budget') or {}
+
+    def _fit_input_value(self, actuated_prompt, input_value, input_value_holder, prompt_budget):
+        """Shorten an oversized {input_value} substitution so the prompt respects the budget"""
+        if not prompt_budget:
+            return str(input_value)
+        return fit_input_value(
+            actuated_prompt,
+            input_value,
+            prompt_budget.get("max_prompt_tokens"),
+            input_value_holder=input_value_holder,
+            policy=prompt_budget.get("policy", "truncate"),
+            summarizer=self.body.get(prompt_budget.get("summarizer_llm", "llm")),
+        )
 
-        memory_location = self.body.get("memory_location")
-        memory = eval(open(memory_location).read())
+    def _actuation_llm_prompt_two_replacement(self, to_actuate_name, prompt_template, place_holders, key_build,
+                                              actuated_llm, prompt_budget=None):
 
         meta_input_name_holder = place_holders.get("meta_input_name_holder", "{meta_input_name}")
         meta_input_value_holder = place_holders.get("meta_input_value_holder", "{meta_input_value}")
         input_key_holder = place_holders.get("input_key_holder", "{input_name}")
         input_value_holder = place_holders.get("input_value_holder", "{input_value}")
 
-        to_actuate_value = memory.get(key_build(to_actuate_name), to_actuate_name)
+        to_actuate_value = self.memory.get(key_build(to_actuate_name), to_actuate_name)
         actuated_prompt = (prompt_template.replace(meta_input_name_holder, self._clean_parentheses(to_actuate_name)).
                            replace(meta_input_value_holder, to_actuate_value))
 
         def actuated_func(input_perception):
             input_key = input_perception[0]
             input_value = input_perception[1]
+            input_value = self._fit_input_value(actuated_prompt, input_value, input_value_holder, prompt_budget)
             passed_in_prompt = (actuated_prompt.replace(input_key_holder, self._clean_parentheses(str(input_key))).
                                 replace(input_value_holder, str(input_value)))
             print("         passed in prompt:  ", repr(passed_in_prompt))
@@ -417,17 +495,14 @@ class Agent:
 
     # actuation function for name and actuation
     def _actuation_llm_prompt_generation_replacement(self, to_actuate_name, meta_prompt_template, place_holders,
-                                                     key_build, meta_llm, actuated_llm):
-
-        memory_location = self.body.get("memory_location")
-        memory = eval(open(memory_location).read())
+                                                     key_build, meta_llm, actuated_llm, prompt_budget=None):
 
         meta_input_name_holder = place_holders.get("meta_input_name_holder", "{meta_input_name}")
         meta_input_value_holder = place_holders.get("meta_input_value_holder", "{meta_input_value}")
         input_key_holder = place_holders.get("input_key_holder", "{input_name}")
         input_value_holder = place_holders.get("input_value_holder", "{input_value}")
 
-        to_actuate_value = memory.get(key_build(to_actuate_name), to_actuate_name)
+        to_actuate_value = self.memory.get(key_build(to_actuate_name), to_actuate_name)
         meta_prompt = (meta_prompt_template.replace(meta_input_name_holder, self._clean_parentheses(to_actuate_name))
                        .replace(meta_input_value_holder, to_actuate_value))
         actuated_prompt = meta_llm.invoke(meta_prompt)
@@ -435,6 +510,7 @@ class Agent:
         def actuated_func(input_perception):
             input_key = input_perception[0]
             input_value = input_perception[1]
+            input_value = self._fit_input_value(actuated_prompt, input_value, input_value_holder, prompt_budget)
             passed_in_prompt = (actuated_prompt.replace(input_key_holder, self._clean_parentheses(str(input_key)))
                                 .replace(input_value_holder, str(input_value)))
             print("         passed in prompt:  ", repr(passed_in_prompt))
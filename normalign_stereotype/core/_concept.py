@@ -1,5 +1,126 @@
 from normalign_stereotype.core._reference import Reference
-from typing import Optional
+from typing import Optional, Dict, Tuple, Any
+import ast
+import copy
+import json
+import os
+import threading
+
+
+# Parsed reference tensors keyed by path, validated against (mtime, size) of the file. They are
+# stored frozen (see _freeze_tensor) so a hit only rebuilds the lists, sharing the leaves.
+_reference_tensor_cache: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+_reference_tensor_cache_lock = threading.Lock()
+_reference_tensor_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _parse_reference_text(text: str, path: str = "") -> list:
+    """Parse the contents of a reference file without executing it.
+
+    JSON is tried first since it is the fastest to parse, then Python literals
+    (the historical format of the `*_ref` files, e.g. ['... :Key']).
+    """
+    text = text.strip()
+    try:
+        tensor = json.loads(text)
+    except ValueError:
+        try:
+            tensor = ast.literal_eval(text)
+        except (SyntaxError, ValueError) as e:
+            raise ValueError(f"Reference file {path} is not a valid literal: {e}")
+    if not isinstance(tensor, list):
+        raise TypeError(f"Reference file {path} must contain a list, got {type(tensor).__name__}")
+    return tensor
+
+
+def _parse_reference_lines(f, path: str = "") -> list:
+    """Stream a line-based reference file: one JSON (or Python literal) value per non-empty line."""
+    tensor = []
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            tensor.append(json.loads(line))
+        except ValueError:
+            try:
+                tensor.append(ast.literal_eval(line))
+            except (SyntaxError, ValueError) as e:
+                raise ValueError(f"Reference file {path}, line {line_number} is not a valid literal: {e}")
+    return tensor
+
+
+_IMMUTABLE_LEAVES = (str, int, float, bool, type(None))
+
+
+def _freeze_tensor(value):
+    """Nested tuples of a parsed tensor, or None if a leaf is mutable (then cached hits deep-copy)"""
+    if type(value) is list:
+        items = []
+        for item in value:
+            frozen = _freeze_tensor(item)
+            if frozen is None and item is not None:
+                return None
+            items.append(frozen)
+        return tuple(items)
+    return value if isinstance(value, _IMMUTABLE_LEAVES) and type(value) is not tuple else None
+
+
+def _thaw_tensor(frozen) -> list:
+    return [_thaw_tensor(item) if type(item) is tuple else item for item in frozen]
+
+
+def load_reference_tensor(path: str) -> list:
+    """Load the nested list stored in a reference file, using a cache keyed by path and mtime.
+
+    Files ending in `.jsonl` are parsed line by line; any other file must hold a single
+    JSON or Python literal list. Each call returns a fresh copy so callers may mutate it.
+
+    Args:
+        path: Path to the reference file
+
+    Returns:
+        The nested list of reference values
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+
+    with _reference_tensor_cache_lock:
+        cached = _reference_tensor_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            _reference_tensor_cache_stats["hits"] += 1
+            frozen, tensor = cached[1]
+            if frozen is None:
+                return copy.deepcopy(tensor)
+            return _thaw_tensor(frozen)
+
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            tensor = _parse_reference_lines(f, path)
+        else:
+            tensor = _parse_reference_text(f.read(), path)
+
+    frozen = _freeze_tensor(tensor)
+    with _reference_tensor_cache_lock:
+        # The parsed lists go to the caller; the cache keeps the frozen copy (or, failing that, a deep copy)
+        _reference_tensor_cache[path] = (signature, (frozen, copy.deepcopy(tensor) if frozen is None else None))
+        _reference_tensor_cache_stats["misses"] += 1
+    return tensor
+
+
+def reference_cache_info() -> Dict[str, Any]:
+    """Hit/miss counters and current size of the reference file cache"""
+    with _reference_tensor_cache_lock:
+        return {**_reference_tensor_cache_stats, "size": len(_reference_tensor_cache)}
+
+
+def clear_reference_cache() -> None:
+    with _reference_tensor_cache_lock:
+        _reference_tensor_cache.clear()
+        _reference_tensor_cache_stats["hits"] = 0
+        _reference_tensor_cache_stats["misses"] = 0
+
 
 def create_concept_reference(concept: str, value: str, summary: Optional[str] = None) -> Reference:
     """Create a reference for a concept with an explicit value.
@@ -34,13 +155,11 @@ class Concept:
         self.reference: Reference = reference
 
     def read_reference_from_file(self, path):
-        # Load reference tensor from file
+        """Load the reference tensor of this concept from a reference file (see load_reference_tensor)"""
         concept_name = self.comprehension["name"]
 
-        ref_tensor = eval(open(path, encoding="utf-8").read())
-
-        # Store reference tensor in global namespace
-        globals()[f"{concept_name}_ref_tensor"] = ref_tensor
+        # A fresh list (thawed from the cache on a hit) that the reference can own
+        ref_tensor = load_reference_tensor(path)
 
         # Create and configure Reference object
         reference = Reference(
@@ -48,9 +167,14 @@ class Concept:
             shape=(len(ref_tensor),),
             initial_value=0
         )
-        reference.tensor = ref_tensor
-        globals()[f"{concept_name}_ref"] = reference
+        if not any(isinstance(item, list) for item in ref_tensor):
+            # Flat, as the single axis requires: intern the leaves in place and hand the list
+            # over instead of letting the tensor setter copy it again
+            intern = reference.value_table.intern
+            for i, item in enumerate(ref_tensor):
+                ref_tensor[i] = intern(item)
+            reference._replace_data(ref_tensor, trusted_shape=True)
+        else:
+            reference.tensor = ref_tensor
 
         self.reference = reference
-
-
@@ -0,0 +1,169 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from normalign_stereotype.core._llm_router import _is_client_error
+
+
+def is_overload_error(error: Exception) -> bool:
+    """Rate limits (429), timeouts and server errors: signs the provider is saturated"""
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and (status in (408, 429) or status >= 500):
+        return True
+    name = type(error).__name__
+    if isinstance(error, TimeoutError) or "Timeout" in name or "RateLimit" in name:
+        return True
+    # LLMRouter raises a RuntimeError from the last backend's error once every backend failed
+    cause = error.__cause__
+    return isinstance(cause, Exception) and is_overload_error(cause)
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on the number of LLM calls in flight, shared by the tools of an Agent body.
+
+    Every call takes a slot (see slot); callers beyond the current limit wait. The limit
+    grows additively, by about `increase` per limit's worth of successful calls, while the
+    p95 latency of the recent calls stays within latency_tolerance times the baseline
+    latency (the lowest median seen, i.e. the unloaded latency) and the error rate stays
+    below max_error_rate. It is multiplied by `decrease` on a rate limit, timeout or server
+    error (see is_overload_error) or on a p95 latency spike, at most once per cooldown
+    seconds, so one burst of failures backs off once. Errors caused by the request itself
+    (other 4xx) do not change the limit.
+
+    Args:
+        initial_limit: Starting limit
+        min_limit: Lowest limit
+        max_limit: Highest limit
+        increase: Additive increase per limit's worth of successes
+        decrease: Multiplicative decrease factor on overload
+        latency_tolerance: p95 latency over baseline latency considered a spike
+        max_error_rate: Error rate of the window above which the limit stops growing
+        window: Number of recent calls the latency and error statistics cover
+        cooldown: Minimum seconds between two decreases
+        clock: Monotonic time source in seconds
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 64,
+                 increase: float = 1.0, decrease: float = 0.5, latency_tolerance: float = 2.0,
+                 max_error_rate: float = 0.05, window: int = 50, cooldown: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Limits must satisfy 1 <= min_limit <= initial_limit <= max_limit")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self._clock = clock
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._outcomes = deque(maxlen=window)  # True for errors
+        self._baseline: Optional[float] = None
+        self._last_decrease = None
+        self._condition = threading.Condition()
+        self.counters = {"calls": 0, "errors": 0, "overloads": 0, "decreases": 0, "waits": 0}
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a slot, waiting while the limit is reached (False if timeout expired)"""
+        with self._condition:
+            if self._in_flight >= self.limit:
+                self.counters["waits"] += 1
+                if not self._condition.wait_for(lambda: self._in_flight < self.limit, timeout):
+                    return False
+            self._in_flight += 1
+            return True
+
+    def release(self, latency: Optional[float] = None, error: Optional[Exception] = None):
+        """Free a slot and adjust the limit from the outcome of the call"""
+        with self._condition:
+            self._in_flight -= 1
+            self.counters["calls"] += 1
+            if error is not None and _is_client_error(error):
+                # The request was at fault, not the provider
+                self._condition.notify_all()
+                return
+            self._outcomes.append(error is not None)
+            if error is not None:
+                self.counters["errors"] += 1
+                if is_overload_error(error):
+                    self.counters["overloads"] += 1
+                    self._back_off()
+            elif latency is not None:
+                self._latencies.append(latency)
+                self._on_success()
+            self._condition.notify_all()
+
+    def _on_success(self):
+        if len(self._latencies) >= 5:
+            median = _percentile(self._latencies, 0.5)
+            if self._baseline is None or median < self._baseline:
+                self._baseline = median
+            if _percentile(self._latencies, 0.95) > self.latency_tolerance * self._baseline:
+                if self.limit == self.min_limit:
+                    # Slow even with the fewest calls in flight: the provider got slower, not loaded
+                    self._baseline = median
+                else:
+                    self._back_off()
+                    return
+        if sum(self._outcomes) > self.max_error_rate * len(self._outcomes):
+            return
+        self._limit = min(float(self.max_limit), self._limit + self.increase / max(self._limit, 1.0))
+
+    def _back_off(self):
+        now = self._clock()
+        if self._last_decrease is not None and now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.decrease)
+        self.counters["decreases"] += 1
+        # Latencies observed at the old limit no longer describe the new one
+        self._latencies.clear()
+
+    @contextmanager
+    def slot(self):
+        """Hold a slot for the duration of one call, reporting its latency or error"""
+        self.acquire()
+        start = self._clock()
+        try:
+            yield
+        except BaseException as e:
+            self.release(error=e if isinstance(e, Exception) else None,
+                         latency=None if isinstance(e, Exception) else self._clock() - start)
+            raise
+        self.release(latency=self._clock() - start)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current limit, calls in flight, recent latency and error statistics, and counters"""
+        with self._condition:
+            latencies = list(self._latencies)
+            outcomes = list(self._outcomes)
+            return {
+                "limit": self.limit,
+                "in_flight": self._in_flight,
+                "p50_latency": _percentile(latencies, 0.5) if latencies else None,
+                "p95_latency": _percentile(latencies, 0.95) if latencies else None,
+                "baseline_latency": self._baseline,
+                "error_rate": sum(outcomes) / len(outcomes) if outcomes else 0.0,
+                **self.counters,
+            }
@@ -2,6 +2,3 @@ import os
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(os.path.dirname(CURRENT_DIR))
-
-print(f"Current Directory: {CURRENT_DIR}")
-print(f"Project Root: {PROJECT_ROOT}")
\ No newline at end of file
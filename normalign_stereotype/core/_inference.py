@@ -1,8 +1,12 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 
 from normalign_stereotype.core._reference import Reference, cross_action, cross_product, element_action
+from normalign_stereotype.core._lazy_reference import lazy_reference, materialize
 from normalign_stereotype.core._concept import Concept
 from normalign_stereotype.core._pos_analysis import _get_phrase_pos
+from normalign_stereotype.core._config import PROJECT_ROOT
 from normalign_stereotype.core._agent import Agent, get_default_working_config
 from typing import Optional
 
@@ -24,6 +28,7 @@ class Inference:
 
     def _combine_perception_concepts(self, perception_concepts):
         #use cross-product to make the only perception concept for processing
+        #(kept lazy: it is only evaluated leaf by leaf when cross-actioned)
         the_perception_concept_name = (
             str([pc.comprehension["name"] for pc in perception_concepts])
             if len(perception_concepts) > 1
@@ -31,10 +36,10 @@ class Inference:
         )
         the_perception_reference = (
             cross_product(
-                [pc.reference for pc in perception_concepts]
+                [lazy_reference(pc.reference) for pc in perception_concepts]
             )
             if len(perception_concepts) > 1
-            else perception_concepts[0].reference
+            else lazy_reference(perception_concepts[0].reference)
         )
 
         self.the_perception_concept = Concept(
@@ -75,6 +80,12 @@ class Inference:
         if actuation_working_config:
             self.actuation_working_config_concept_to_infer = actuation_working_config
 
+    def inference_key(self):
+        """Key identifying this inference, in the same format as Plan.inference_registry keys"""
+        perception_names = [pc.comprehension["name"] for pc in self.perception_concepts]
+        actuation_name = self.the_actuation_concept.comprehension["name"] if self.the_actuation_concept else None
+        return str([perception_names, actuation_name, self.concept_to_infer.comprehension["name"]])
+
     def view_definition(self, axes_list):
         """Directly set which axes to keep in the view"""
         if not isinstance(axes_list, list):
@@ -95,8 +106,8 @@ class Inference:
             if axis not in available_axes:
                 raise ValueError(f"Axis '{axis}' not found in reference axes")
 
-        # Create new reference with selected axes
-        self.viewed_ref = self.concept_to_infer.reference.slice(*selected_axes)
+        # Create new reference with selected axes (materialized in case the reference is still lazy)
+        self.viewed_ref = materialize(self.concept_to_infer.reference.slice(*selected_axes))
         return self.viewed_ref
 
     def execute(self, perception_config=None, actuation_config=None):
@@ -111,25 +122,36 @@ class Inference:
 
         agent = self.agent
 
-        self._combine_perception_concepts(self.perception_concepts)
-        perception_ref = agent.perception(self.the_perception_concept)
-        actuation_ref = agent.actuation(self.the_actuation_concept)
-
-        print("===========================")
-        print("Now processing inference execution:", self)
-        print("     concept to infer", self.concept_to_infer.comprehension["name"])
-        print("     perception", self.the_perception_concept.comprehension["name"])
-        print("     actuation", self.the_actuation_concept.comprehension["name"])
-
-        print("!! cross-actioning references:")
-        print("     actu:", actuation_ref.axes, actuation_ref.tensor)
-        print("     perc", perception_ref.axes, perception_ref.tensor)
-        self.raw_ref = cross_action(
-            actuation_ref,
-            perception_ref,
-            self.concept_to_infer.comprehension["name"]
-        )
-        print(" raw_result", self.raw_ref.axes, self.raw_ref.tensor)
+        # Tag every LLM call made while executing so token usage is aggregated per inference and concept
+        with agent.token_ledger.scope(inference=self.inference_key(),
+                                      concept=self.concept_to_infer.comprehension["name"]):
+            self._combine_perception_concepts(self.perception_concepts)
+            perception_ref = agent.perception(self.the_perception_concept)
+            actuation_ref = agent.actuation(self.the_actuation_concept)
+
+            print("===========================")
+            print("Now processing inference execution:", self)
+            print("     concept to infer", self.concept_to_infer.comprehension["name"])
+            print("     perception", self.the_perception_concept.comprehension["name"])
+            print("     actuation", self.the_actuation_concept.comprehension["name"])
+
+            print("!! cross-actioning references:")
+            print("     actu:", actuation_ref.axes, actuation_ref.tensor)
+            print("     perc", perception_ref.axes, perception_ref)
+            # The inferred axis is ragged: each cell keeps only the instances its LLM call returned.
+            # With a concurrency limiter the cells' LLM calls run concurrently, as many in flight
+            # as the limiter allows
+            limiter = getattr(agent, "concurrency_limiter", None)
+            with (ThreadPoolExecutor(max_workers=limiter.max_limit) if limiter is not None
+                  else nullcontext()) as executor:
+                self.raw_ref = cross_action(
+                    actuation_ref,
+                    perception_ref,
+                    self.concept_to_infer.comprehension["name"],
+                    ragged=True,
+                    executor=executor
+                )
+        print(" raw_result", self.raw_ref.axes, self.raw_ref)
         self.concept_to_infer.reference = self.raw_ref
 
         # Use custom config if provided by the class or the method, otherwise get default
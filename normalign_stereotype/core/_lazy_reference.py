@@ -0,0 +1,194 @@
+from typing import Any, Dict, List, Optional
+
+from normalign_stereotype.core._reference import Reference, ValueTable
+from normalign_stereotype.core._sparse_reference import _combine_axes
+
+
+SKIP = "@#SKIP#@"
+
+
+class LazyReference:
+    """Deferred Reference expression.
+
+    Operations on lazy references (element_action, cross_product, slice) only record the
+    pipeline. When a leaf is requested it is computed through the whole chain in one pass,
+    so chained element-wise steps are fused and intermediate references are never built.
+    Only materialize() (or accessing .tensor) builds nested lists.
+
+    Leaves of a node that is broadcast by a consumer (its axes are a strict subset of the
+    consumer's) are cached once computed, so a broadcast LLM call still runs once per cell.
+    Other recorded functions run whenever a leaf is pulled, so functions with side effects
+    (such as the memory writes of Agent.cognition) must be applied to materialized references.
+    """
+
+    is_lazy_reference = True
+
+    def __init__(self, op, inputs, axes, shape, value_table: ValueTable, func=None, reference=None):
+        self.op = op
+        self.inputs: List["LazyReference"] = inputs
+        self.axes: List[str] = axes
+        self.shape: tuple = tuple(shape)
+        self.value_table: ValueTable = value_table
+        self.skip_value: str = SKIP
+        self.func = func
+        self._reference: Optional[Reference] = reference
+        self._leaf_cache: Optional[Dict[tuple, Any]] = None
+
+    # -- construction -----------------------------------------------------------------------
+
+    @staticmethod
+    def source(reference) -> "LazyReference":
+        if isinstance(reference, LazyReference):
+            return reference
+        if not isinstance(reference, Reference) and not (getattr(reference, "is_sparse_reference", False)
+                                                         or getattr(reference, "is_ragged_reference", False)):
+            raise TypeError("All elements must be Reference instances")
+        return LazyReference("source", [], list(reference.axes), reference.shape,
+                             reference.value_table, reference=reference)
+
+    @staticmethod
+    def element_action(f, references) -> "LazyReference":
+        if not references:
+            raise ValueError("At least one reference must be provided")
+        inputs = [LazyReference.source(ref) for ref in references]
+        axes, shape = _combine_axes(inputs, "element_action")
+        return LazyReference("element_action", inputs, axes, shape, ValueTable(), func=f)
+
+    @staticmethod
+    def cross_product(references) -> "LazyReference":
+        if not references:
+            raise ValueError("At least one reference must be provided")
+        inputs = [LazyReference.source(ref) for ref in references]
+        axes, shape = _combine_axes(inputs, "cross_product")
+        return LazyReference("cross_product", inputs, axes, shape, ValueTable())
+
+    def slice(self, *selected_axes) -> "LazyReference":
+        for axis in selected_axes:
+            if axis not in self.axes:
+                raise KeyError(f"Axis '{axis}' not found in {self.axes}")
+        if len(selected_axes) != len(set(selected_axes)):
+            raise ValueError("Duplicate axes in selection")
+        if not selected_axes:
+            raise ValueError("At least one axis must be selected")
+        new_shape = tuple(self.shape[self.axes.index(axis)] for axis in selected_axes)
+        return LazyReference("slice", [self], list(selected_axes), new_shape, ValueTable())
+
+    def cache_leaves(self):
+        """Keep computed leaves so that broadcasting consumers do not recompute them"""
+        if self._leaf_cache is None and self.op != "source" and self._reference is None:
+            self._leaf_cache = {}
+        return self
+
+    # -- evaluation -------------------------------------------------------------------------
+
+    def _leaf(self, index: Dict[str, int]):
+        """Compute the leaf at a full index (a dict covering at least this node's axes)"""
+        if self._reference is not None and not isinstance(self._reference, Reference):
+            return self._reference._leaf(index)  # Sparse and ragged sources
+        if self._reference is not None:
+            data = self._reference.data
+            for axis in self.axes:
+                i = index[axis]
+                if not isinstance(data, list) or i >= len(data):
+                    return SKIP
+                data = data[i]
+                if data == self._reference.skip_value:
+                    return SKIP
+            return data
+
+        key = None
+        if self._leaf_cache is not None:
+            key = tuple(index[axis] for axis in self.axes)
+            if key in self._leaf_cache:
+                return self._leaf_cache[key]
+
+        value = self._compute_leaf(index)
+        if key is not None:
+            self._leaf_cache[key] = value
+        return value
+
+    def _compute_leaf(self, index):
+        if self.op == "slice":
+            source = self.inputs[0]
+            sub_tensor = source.get(**{axis: index[axis] for axis in self.axes})
+            if sub_tensor == SKIP:
+                return SKIP
+            if isinstance(sub_tensor, list) and any(elem == SKIP for elem in sub_tensor):
+                return SKIP
+            return sub_tensor
+
+        elements = [ref._leaf(index) for ref in self.inputs]
+        if any(e == SKIP for e in elements):
+            return SKIP
+        if self.op == "cross_product":
+            return elements
+        try:
+            return self.func(*elements)
+        except Exception:
+            return SKIP
+
+    def get(self, **kwargs):
+        """Get element(s) like Reference.get; a full index computes a single leaf"""
+        for key in kwargs:
+            if key not in self.axes:
+                raise KeyError(f"Axis '{key}' not found in {self.axes}")
+        if self._reference is not None:
+            return self._reference.get(**kwargs)
+
+        def gather(depth, index):
+            if depth == len(self.axes):
+                return self._leaf(index)
+            axis = self.axes[depth]
+            current = kwargs.get(axis, slice(None))
+            if isinstance(current, slice):
+                return [gather(depth + 1, {**index, axis: i})
+                        for i in range(*current.indices(self.shape[depth]))]
+            if current >= self.shape[depth]:
+                return SKIP
+            return gather(depth + 1, {**index, axis: current})
+
+        return gather(0, {})
+
+    def materialize(self) -> Reference:
+        """Evaluate the expression into a Reference (computed once, then reused)"""
+        if self._reference is None:
+            def build(depth, index):
+                if depth == len(self.axes):
+                    return self.value_table.intern(self._leaf(index))
+                axis = self.axes[depth]
+                return [build(depth + 1, {**index, axis: i}) for i in range(self.shape[depth])]
+
+            data = build(0, {})
+            self._reference = Reference(
+                axes=list(self.axes),
+                shape=self.shape,
+                initial_value=None,
+                skip_value=SKIP,
+                value_table=self.value_table
+            )._replace_data(data, trusted_shape=True)
+            # The inputs are no longer needed once the result is materialized
+            self.inputs = []
+            self._leaf_cache = None
+        return self._reference
+
+    @property
+    def tensor(self):
+        return self.materialize().tensor
+
+    def __repr__(self):
+        if self.op == "source" or self._reference is not None:
+            return f"LazyReference(materialized, axes={self.axes}, shape={self.shape})"
+        inputs = ", ".join(repr(ref) for ref in self.inputs)
+        return f"LazyReference({self.op}, axes={self.axes}, shape={self.shape}, inputs=[{inputs}])"
+
+
+def lazy_reference(reference) -> LazyReference:
+    """Wrap a Reference so that operations on it are deferred"""
+    return LazyReference.source(reference)
+
+
+def materialize(reference) -> Reference:
+    """Return a concrete Reference, evaluating it if it is lazy"""
+    if isinstance(reference, LazyReference):
+        return reference.materialize()
+    return reference
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from normalign_stereotype.core._memory import _file_lock
+
+# Record/replay of LLM traffic. A live run in "record" mode appends every completion to a
+# cassette; a "replay" run serves the same completions from it without any client, so a
+# plan can be re-executed (and profiled) with identical LLM outputs and no network.
+
+CASSETTE_MODES = ("record", "replay")
+
+# Environment variables configuring a cassette for every LLMTool that is not given one
+CASSETTE_ENV = "NORMALIGN_LLM_CASSETTE"
+CASSETTE_MODE_ENV = "NORMALIGN_LLM_CASSETTE_MODE"
+
+# Request arguments that change the transport but not the completion
+_TRANSPORT_KWARGS = ("stream_options", "timeout", "extra_headers")
+
+
+def request_key(model: str, messages: List[Dict[str, str]], api_kwargs: Dict[str, Any], stream: bool = False) -> str:
+    """Hash identifying a completion request.
+
+    Streamed requests are keyed apart: a streamed recording may have been cut short by
+    its consumer (see StructuredLLM), so it is only replayed to streamed calls.
+    """
+    kwargs = {key: value for key, value in api_kwargs.items() if key not in _TRANSPORT_KWARGS}
+    payload = json.dumps({"model": model, "messages": messages, "kwargs": kwargs, "stream": stream},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _usage_dict(usage) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    return {field: getattr(usage, field, None) for field in ("prompt_tokens", "completion_tokens", "total_tokens")}
+
+
+class LLMCassette:
+    """Append-only log of LLM completions keyed by request hash.
+
+    Each line of the file is one JSON record {"key", "content", "usage", "model", "latency"}.
+    In record mode every completion is appended (under a file lock, so several processes can
+    record into one cassette). In replay mode the file is indexed once; a request recorded
+    several times (retries of the same prompt) gets its responses in recording order, then
+    the last one again. A request that was never recorded raises a RuntimeError rather than
+    reaching the network.
+
+    Args:
+        path: The cassette file
+        mode: "record" or "replay"
+        latency_scale: In replay mode, sleep for the recorded latency times this factor
+            (None: answer immediately)
+        sleep: Function used to simulate latency
+    """
+
+    def __init__(self, path: str, mode: str = "record", latency_scale: Optional[float] = None,
+                 sleep: Callable[[float], Any] = time.sleep):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {CASSETTE_MODES}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursors: Dict[str, int] = {}
+        self.stats = {"recorded": 0, "replayed": 0}
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            raise ValueError(f"Cassette not found: {self.path}") from None
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # A line cut by an interrupted recording
+            self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, key: str, content: str, usage=None, model: Optional[str] = None, latency: float = 0.0):
+        """Append a completion (no-op in replay mode)"""
+        if self.replaying:
+            return
+        line = json.dumps({"key": key, "content": content, "usage": _usage_dict(usage), "model": model,
+                           "latency": round(latency, 4)}, ensure_ascii=False)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, _file_lock(self.path):
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self.stats["recorded"] += 1
+
+    def replay(self, key: str) -> Tuple[str, Any, Optional[str]]:
+        """Recorded (content, usage, model) of a request, after the simulated latency.
+
+        Raises:
+            RuntimeError: If the request was not recorded
+        """
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise RuntimeError(f"No recorded response in {self.path} for request {key[:12]}")
+            cursor = self._cursors.get(key, 0)
+            entry = entries[min(cursor, len(entries) - 1)]
+            self._cursors[key] = cursor + 1
+            self.stats["replayed"] += 1
+        if self.latency_scale:
+            self._sleep(entry.get("latency", 0.0) * self.latency_scale)
+        usage = SimpleNamespace(**entry["usage"]) if entry.get("usage") else None
+        return entry["content"], usage, entry.get("model")
+
+    def rewind(self):
+        """Serve every request from its first recorded response again"""
+        with self._lock:
+            self._cursors.clear()
+
+
+_cassettes: Dict[Tuple[str, str], LLMCassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def open_cassette(path: str, mode: str = "record", latency_scale: Optional[float] = None) -> LLMCassette:
+    """The cassette at path, shared by every tool of the process opening it in the same mode"""
+    key = (os.path.abspath(path), mode)
+    with _cassettes_lock:
+        cassette = _cassettes.get(key)
+        if cassette is None:
+            cassette = _cassettes[key] = LLMCassette(path, mode, latency_scale)
+        return cassette
+
+
+def cassette_from_env() -> Optional[LLMCassette]:
+    """Cassette configured by NORMALIGN_LLM_CASSETTE (path) and NORMALIGN_LLM_CASSETTE_MODE (default "replay")"""
+    path = os.environ.get(CASSETTE_ENV)
+    if not path:
+        return None
+    return open_cassette(path, os.environ.get(CASSETTE_MODE_ENV, "replay"))
@@ -0,0 +1,142 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _http_module():
+    """The httpx package used by the installed OpenAI SDK (recent releases ship it as httpx2)"""
+    try:
+        import httpx
+    except ImportError:
+        import httpx2 as httpx
+    return httpx
+
+
+class LLMClientFactory:
+    """Process-wide cache of parsed settings files and LLM HTTP clients.
+
+    LLM tools ask the factory for their settings and client instead of parsing the
+    settings file and opening a client each. Settings are parsed once per path and
+    modification time. One client is kept per (kind, base_url, api_key, ...), backed by
+    a pooled HTTP connection with keep-alive, so tools built for every agent or job reuse
+    warm connections. After a fork the child starts with no clients instead of sharing the
+    parent's sockets.
+
+    Args:
+        max_connections: Maximum open connections per client
+        max_keepalive_connections: Idle connections kept alive per client
+        keepalive_expiry: Seconds an idle connection is kept
+        timeout: Request timeout in seconds (None keeps the SDK default)
+    """
+
+    def __init__(self, max_connections: int = 64, max_keepalive_connections: int = 32,
+                 keepalive_expiry: float = 60.0, timeout: Optional[float] = None):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.stats = {"settings_parsed": 0, "clients_created": 0}
+        self._settings: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._clients: Dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # Connections belong to the parent process: start over without closing them
+            self._clients = {}
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+    def settings(self, settings_path) -> Dict[str, Any]:
+        """Parsed YAML settings file (shared between callers, do not mutate)"""
+        mtime = os.stat(settings_path).st_mtime_ns
+        cached = self._settings.get(settings_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        import yaml
+
+        with open(settings_path, 'r') as f:
+            settings = yaml.safe_load(f) or {}
+        with self._lock:
+            self._settings[settings_path] = (mtime, settings)
+            self.stats["settings_parsed"] += 1
+        return settings
+
+    def _http_client(self):
+        from openai import DefaultHttpxClient
+
+        httpx = _http_module()
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        return DefaultHttpxClient(limits=limits)
+
+    def _get_client(self, key: tuple, build: Callable[[], Any]):
+        self._check_fork()
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = build()
+                    self._clients[key] = client
+                    self.stats["clients_created"] += 1
+        return client
+
+    def _client_kwargs(self):
+        kwargs = {"http_client": self._http_client()}
+        if self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+        return kwargs
+
+    def openai_client(self, api_key: str, base_url: str):
+        """Shared OpenAI-compatible client for an endpoint and key"""
+        def build():
+            from openai import OpenAI
+            return OpenAI(api_key=api_key, base_url=base_url, **self._client_kwargs())
+
+        return self._get_client(("openai", base_url, api_key), build)
+
+    def azure_client(self, api_key: str, api_version: str, azure_endpoint: str):
+        """Shared Azure OpenAI client for an endpoint, API version and key"""
+        def build():
+            from openai import AzureOpenAI
+            return AzureOpenAI(api_key=api_key, api_version=api_version, azure_endpoint=azure_endpoint,
+                               **self._client_kwargs())
+
+        return self._get_client(("azure", azure_endpoint, api_version, api_key), build)
+
+    def close(self):
+        """Close every client of this process and forget them"""
+        self._check_fork()
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            try:
+                client.close()
+            except Exception:
+                pass
+
+
+_default_factory: Optional[LLMClientFactory] = None
+_default_factory_lock = threading.Lock()
+
+
+def get_client_factory() -> LLMClientFactory:
+    """The process-wide factory used by LLM tools unless they are given one"""
+    global _default_factory
+    if _default_factory is None:
+        with _default_factory_lock:
+            if _default_factory is None:
+                _default_factory = LLMClientFactory()
+    return _default_factory
+
+
+def set_client_factory(factory: Optional[LLMClientFactory]) -> None:
+    """Replace the process-wide factory (None restores a default one on next use)"""
+    global _default_factory
+    _default_factory = factory
@@ -0,0 +1,312 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from normalign_stereotype.core._llm_client import LLMClientFactory, get_client_factory
+
+
+ROUTING_POLICIES = ("weighted_round_robin", "least_outstanding")
+
+
+class Backend:
+    """One OpenAI-compatible endpoint behind an LLMRouter.
+
+    Args:
+        name: Name used in logs and status
+        client: Client exposing chat.completions.create (e.g. an OpenAI client)
+        model: Model name to request from this endpoint
+        weight: Relative share of traffic
+    """
+
+    def __init__(self, name: str, client: Any, model: str, weight: float = 1.0):
+        if weight <= 0:
+            raise ValueError(f"Backend '{name}' must have a positive weight")
+        self.name = name
+        self.client = client
+        self.model = model
+        self.weight = weight
+        self.outstanding = 0
+        self.latency = None  # Moving average of successful call latency, in seconds
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.retry_at = 0.0
+        self.requests = 0
+        self.failures = 0
+        self._current_weight = 0.0
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "weight": self.weight,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "latency": self.latency,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+    def __repr__(self):
+        return f"Backend(name={self.name!r}, model={self.model!r}, healthy={self.healthy})"
+
+
+def _is_client_error(error: Exception) -> bool:
+    """Errors caused by the request itself (4xx other than timeouts and rate limits) are not retried elsewhere"""
+    status = getattr(error, "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 409, 429)
+
+
+class _RoutedStream:
+    """Streamed completion of a routed request.
+
+    The backend's slot is held until the stream is exhausted or closed; its outcome and
+    its full latency are then recorded (an early close frees the slot without a latency
+    sample). An error mid-stream counts as a backend failure but is not failed over,
+    since part of the response was already consumed.
+    """
+
+    def __init__(self, router: "LLMRouter", backend: Backend, stream, start: float):
+        self._router = router
+        self._backend = backend
+        self._stream = stream
+        self._start = start
+        self._finished = False
+
+    def __iter__(self):
+        try:
+            for chunk in self._stream:
+                yield chunk
+        except Exception as e:
+            self._finish(error=e)
+            raise
+        self._finish(complete=True)
+
+    def _finish(self, error: Optional[Exception] = None, complete: bool = False):
+        if self._finished:
+            return
+        self._finished = True
+        if error is not None:
+            if _is_client_error(error):
+                self._router._release(self._backend)
+            else:
+                self._router._record_failure(self._backend)
+        else:
+            self._router._record_success(self._backend, self._router._clock() - self._start if complete else None)
+
+    def close(self):
+        try:
+            close = getattr(self._stream, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self._finish()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class LLMRouter:
+    """Routes chat completions across several OpenAI-compatible backends.
+
+    Policies:
+        weighted_round_robin: Smooth weighted round-robin, traffic proportional to weights
+        least_outstanding: Fewest in-flight requests per unit of weight, ties broken by
+            lower observed latency (untried backends first)
+
+    A backend that fails max_failures times in a row is taken out of rotation for
+    cooldown seconds; a failed call fails over to the next backend. Once the cooldown
+    has passed, the backend is probed with health_check (by default models.list())
+    before it gets a request again, and stays out for another cooldown if the probe
+    fails. check_health() probes every backend to mark it healthy or not ahead of
+    traffic; with health_check_interval, complete() runs it at most once per interval,
+    otherwise callers schedule it. A probe answered with a client error (e.g. an
+    endpoint without /models) still shows the server is up.
+
+    With stream=True, the backend counts as outstanding, and its latency is measured,
+    until the returned stream is exhausted or closed.
+
+    Args:
+        backends: The backends to route across
+        policy: One of ROUTING_POLICIES
+        max_failures: Consecutive failures before a backend is marked unhealthy
+        cooldown: Seconds before an unhealthy backend is tried again
+        health_check: Optional callable(backend) raising if the backend is down
+        health_check_interval: Seconds between two check_health() runs from complete()
+            (None: only probe backends coming out of cooldown)
+        latency_smoothing: Weight of the newest sample in the latency moving average
+        clock: Monotonic time source in seconds
+    """
+
+    def __init__(self, backends: Iterable[Backend], policy: str = "weighted_round_robin",
+                 max_failures: int = 3, cooldown: float = 30.0,
+                 health_check: Optional[Callable[[Backend], Any]] = None,
+                 health_check_interval: Optional[float] = None,
+                 latency_smoothing: float = 0.2, clock: Callable[[], float] = time.monotonic):
+        self.backends: List[Backend] = list(backends)
+        if not self.backends:
+            raise ValueError("LLMRouter requires at least one backend")
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy '{policy}', expected one of {ROUTING_POLICIES}")
+        self.policy = policy
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.health_check = health_check or (lambda backend: backend.client.models.list())
+        self.health_check_interval = health_check_interval
+        self.latency_smoothing = latency_smoothing
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._next_health_check = 0.0
+        self._checking_health = False
+
+    @classmethod
+    def from_settings(cls, backend_settings: List[Dict[str, Any]], policy: str = "weighted_round_robin",
+                      factory: Optional[LLMClientFactory] = None, **kwargs) -> "LLMRouter":
+        """Build a router from settings entries with NAME, BASE_URL, API_KEY (or
+        DASHSCOPE_API_KEY), MODEL and optional WEIGHT; clients come from the client factory."""
+        factory = factory or get_client_factory()
+        backends = []
+        for i, spec in enumerate(backend_settings):
+            api_key = spec.get("API_KEY") or spec.get("DASHSCOPE_API_KEY")
+            if not spec.get("BASE_URL") or not spec.get("MODEL") or not api_key:
+                raise ValueError(f"Backend settings need BASE_URL, MODEL and API_KEY: {spec.get('NAME', i)}")
+            backends.append(Backend(
+                name=spec.get("NAME", f"backend-{i}"),
+                client=factory.openai_client(api_key, spec["BASE_URL"]),
+                model=spec["MODEL"],
+                weight=spec.get("WEIGHT", 1.0),
+            ))
+        return cls(backends, policy=policy, **kwargs)
+
+    def _available(self, now: float, exclude) -> List[Backend]:
+        return [b for b in self.backends
+                if b not in exclude and (b.healthy or now >= b.retry_at)]
+
+    def _choose(self, exclude) -> Optional[Backend]:
+        with self._lock:
+            candidates = self._available(self._clock(), exclude)
+            if not candidates:
+                return None
+            if self.policy == "weighted_round_robin":
+                total = sum(b.weight for b in candidates)
+                for b in candidates:
+                    b._current_weight += b.weight
+                chosen = max(candidates, key=lambda b: b._current_weight)
+                chosen._current_weight -= total
+            else:
+                chosen = min(candidates, key=lambda b: ((b.outstanding + 1) / b.weight,
+                                                         b.latency if b.latency is not None else 0.0))
+            chosen.outstanding += 1
+            chosen.requests += 1
+            return chosen
+
+    def _release(self, backend: Backend):
+        with self._lock:
+            backend.outstanding -= 1
+
+    def _record_success(self, backend: Backend, latency: Optional[float]):
+        with self._lock:
+            backend.outstanding -= 1
+            backend.consecutive_failures = 0
+            backend.healthy = True
+            if latency is not None:
+                backend.latency = latency if backend.latency is None else (
+                    self.latency_smoothing * latency + (1 - self.latency_smoothing) * backend.latency)
+
+    def _record_failure(self, backend: Backend):
+        with self._lock:
+            backend.outstanding -= 1
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            if backend.consecutive_failures >= self.max_failures or not backend.healthy:
+                if backend.healthy:
+                    logging.warning(f"LLM backend '{backend.name}' marked unhealthy for {self.cooldown}s")
+                backend.healthy = False
+                backend.retry_at = self._clock() + self.cooldown
+
+    def complete(self, messages, **kwargs) -> Tuple[Any, Backend]:
+        """Create a chat completion on the chosen backend, failing over to the others.
+
+        Returns:
+            The provider response and the backend that served it
+
+        Raises:
+            RuntimeError: If every available backend failed
+        """
+        self._maybe_check_health()
+        tried = set()
+        last_error = None
+        while True:
+            backend = self._choose(tried)
+            if backend is None:
+                break
+            tried.add(backend)
+            if not backend.healthy and not self._probe(backend):
+                # Still down after its cooldown: keep it out without spending the request on it
+                self._record_failure(backend)
+                continue
+            start = self._clock()
+            try:
+                response = backend.client.chat.completions.create(model=backend.model, messages=messages, **kwargs)
+            except Exception as e:
+                if _is_client_error(e):
+                    # The request is at fault, another backend would reject it too
+                    self._release(backend)
+                    raise
+                self._record_failure(backend)
+                logging.warning(f"LLM backend '{backend.name}' failed ({type(e).__name__}: {e}); failing over")
+                last_error = e
+                continue
+            if kwargs.get("stream"):
+                return _RoutedStream(self, backend, response, start), backend
+            self._record_success(backend, self._clock() - start)
+            return response, backend
+        raise RuntimeError(f"All LLM backends failed: {last_error}") from last_error
+
+    def _probe(self, backend: Backend) -> bool:
+        try:
+            self.health_check(backend)
+        except Exception as e:
+            if _is_client_error(e):
+                return True
+            logging.warning(f"Health check of LLM backend '{backend.name}' failed: {e}")
+            return False
+        return True
+
+    def _maybe_check_health(self):
+        if self.health_check_interval is None:
+            return
+        with self._lock:
+            now = self._clock()
+            if self._checking_health or now < self._next_health_check:
+                return
+            self._checking_health = True
+            self._next_health_check = now + self.health_check_interval
+        try:
+            self.check_health()
+        finally:
+            self._checking_health = False
+
+    def check_health(self) -> Dict[str, bool]:
+        """Probe every backend and update its health"""
+        results = {}
+        for backend in self.backends:
+            healthy = self._probe(backend)
+            with self._lock:
+                backend.healthy = healthy
+                if healthy:
+                    backend.consecutive_failures = 0
+                else:
+                    backend.retry_at = self._clock() + self.cooldown
+            results[backend.name] = healthy
+        return results
+
+    def status(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [b.status() for b in self.backends]
@@ -0,0 +1,372 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+MEMORY_BACKENDS = ("json", "sqlite")
+
+_SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+# Names per "IN (...)" query, below SQLite's default limit of bound parameters
+_SQLITE_BATCH = 500
+
+_LEGACY_KEY = re.compile(r"(.*) \((.*)\)", re.DOTALL)
+
+DEFAULT_NAMESPACE = "default"
+
+
+def memory_key(name: str, concept: str) -> str:
+    """Key of a (name, concept) pair in the legacy JSON memory"""
+    return f"{name} ({concept})"
+
+
+def split_memory_key(key: str) -> Tuple[str, str]:
+    """(name, concept) of a legacy key; the concept is the last parenthesized part"""
+    match = _LEGACY_KEY.fullmatch(key)
+    if not match:
+        raise ValueError(f"Not a memory key of the form 'name (concept)': {key!r}")
+    return match.group(1), match.group(2)
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Exclusive lock between processes, held on a sidecar file next to path"""
+    with open(path + ".lock", "a+") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _new_file_mode(path: str) -> int:
+    """Mode of path, or the default mode of a new file (0o666 less the umask) if it is missing"""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+class JSONMemory:
+    """Agent memory kept in a JSON file mapping "name (concept)" to a value (the legacy format).
+
+    The file is parsed again only when it changes on disk, and set_many writes it once
+    for a whole batch. Writes re-read the file and replace it atomically under a file
+    lock, so several processes can share one file without losing each other's updates;
+    readers never see a partly written file.
+
+    Args:
+        path: The JSON file (created empty if missing)
+    """
+
+    backend = "json"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._cache: Optional[Dict[str, Any]] = None
+        self._stamp = None
+        self._lock = threading.Lock()
+        if not os.path.exists(path):
+            self._write({})
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self, force: bool = False) -> Dict[str, Any]:
+        stamp = self._file_stamp()
+        if force or self._cache is None or stamp != self._stamp:
+            with open(self.path, encoding="utf-8") as f:
+                text = f.read()
+            self._cache = json.loads(text) if text.strip() else {}
+            self._stamp = stamp
+        return self._cache
+
+    def _write(self, data: Dict[str, Any]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            # mkstemp creates the file owner-only; keep the permissions of the file it replaces
+            os.chmod(tmp_path, _new_file_mode(self.path))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._cache = data
+        self._stamp = self._file_stamp()
+
+    def get(self, pair: Tuple[str, str], default: Any = None) -> Any:
+        with self._lock:
+            return self._read().get(memory_key(*pair), default)
+
+    def get_many(self, pairs: Iterable[Tuple[str, str]], default: Any = None) -> List[Any]:
+        with self._lock:
+            data = self._read()
+            return [data.get(memory_key(*pair), default) for pair in pairs]
+
+    def set(self, name: str, concept: str, value: Any):
+        self.set_many([(name, concept, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, str, Any]]):
+        items = list(items)
+        if not items:
+            return
+        with self._lock, _file_lock(self.path):
+            data = dict(self._read(force=True))
+            for name, concept, value in items:
+                data[memory_key(name, concept)] = value
+            self._write(data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._read())
+
+    def load_dict(self, data: Dict[str, Any]):
+        """Replace the whole memory with a legacy dict"""
+        with self._lock, _file_lock(self.path):
+            self._write(dict(data))
+
+    def export_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def close(self):
+        pass
+
+
+class SQLiteMemory:
+    """Agent memory in an SQLite database keyed by (namespace, name, concept).
+
+    The key is the primary key of a WITHOUT ROWID table, so a lookup is an index search
+    rather than a parse of the whole memory; list-valued names are fetched with one
+    "name IN (...)" query per concept. The database runs in WAL mode, so readers in other
+    connections or processes do not block the writer, and concurrent writers wait for
+    each other up to timeout.
+
+    Each store reads and writes a single namespace, so runs sharing one database (e.g.
+    plans executed by several processes) do not see each other's memory. A store may also
+    read from a shared namespace holding static concept definitions: it is published once
+    (see publish_shared), never written by the runs, and cached by each store on first use.
+    Lookups check the run's namespace first, then the shared one.
+
+    to_dict/export_json give the run's namespace in the legacy JSON format.
+
+    Args:
+        path: The database file (created if missing)
+        namespace: Namespace of this run
+        shared_namespace: Optional read-only namespace consulted on misses
+        timeout: Seconds to wait for a lock held by another connection
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str, namespace: Optional[str] = None, shared_namespace: Optional[str] = None,
+                 timeout: float = 30.0):
+        self.path = path
+        self.namespace = namespace or DEFAULT_NAMESPACE
+        self.shared_namespace = shared_namespace
+        if self.shared_namespace == self.namespace:
+            raise ValueError("A run cannot write to the shared memory namespace")
+        self.timeout = timeout
+        self._shared: Optional[Dict[Tuple[str, str], Any]] = None
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(memory)")]
+            if columns and "namespace" not in columns:
+                # Databases written before namespaces: their rows go to the default namespace
+                self._conn.execute("ALTER TABLE memory RENAME TO memory_unnamespaced")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS memory ("
+                "namespace TEXT NOT NULL, name TEXT NOT NULL, concept TEXT NOT NULL, value TEXT, "
+                "PRIMARY KEY (namespace, name, concept)) WITHOUT ROWID"
+            )
+            if columns and "namespace" not in columns:
+                self._conn.execute("INSERT INTO memory SELECT ?, name, concept, value FROM memory_unnamespaced",
+                                   (DEFAULT_NAMESPACE,))
+                self._conn.execute("DROP TABLE memory_unnamespaced")
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # The connection belongs to the parent process: open our own
+            self._lock = threading.Lock()
+            self._connect()
+
+    def _shared_values(self) -> Dict[Tuple[str, str], Any]:
+        """The shared namespace, read once (callers hold the lock)"""
+        if self._shared is None:
+            rows = self._conn.execute(
+                "SELECT name, concept, value FROM memory WHERE namespace = ?", (self.shared_namespace,))
+            self._shared = {(name, concept): json.loads(value) for name, concept, value in rows}
+        return self._shared
+
+    def get(self, pair: Tuple[str, str], default: Any = None) -> Any:
+        return self.get_many([pair], default)[0]
+
+    def get_many(self, pairs: Iterable[Tuple[str, str]], default: Any = None) -> List[Any]:
+        pairs = [(str(name), str(concept)) for name, concept in pairs]
+        names_by_concept: Dict[str, List[str]] = {}
+        for name, concept in pairs:
+            names_by_concept.setdefault(concept, []).append(name)
+
+        self._check_fork()
+        found = {}
+        with self._lock:
+            for concept, names in names_by_concept.items():
+                names = list(dict.fromkeys(names))
+                for start in range(0, len(names), _SQLITE_BATCH):
+                    batch = names[start:start + _SQLITE_BATCH]
+                    placeholders = ", ".join("?" * len(batch))
+                    rows = self._conn.execute(
+                        f"SELECT name, value FROM memory WHERE namespace = ? AND concept = ? "
+                        f"AND name IN ({placeholders})",
+                        [self.namespace, concept, *batch],
+                    )
+                    for name, value in rows:
+                        found[(name, concept)] = json.loads(value)
+            if self.shared_namespace is not None and len(found) < len(set(pairs)):
+                shared = self._shared_values()
+                for pair in pairs:
+                    if pair not in found and pair in shared:
+                        found[pair] = shared[pair]
+        return [found.get(pair, default) for pair in pairs]
+
+    def set(self, name: str, concept: str, value: Any):
+        self.set_many([(name, concept, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, str, Any]]):
+        rows = [(self.namespace, str(name), str(concept), json.dumps(value)) for name, concept, value in items]
+        if not rows:
+            return
+        self._check_fork()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO memory (namespace, name, concept, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, name, concept) DO UPDATE SET value = excluded.value",
+                rows,
+            )
+
+    def items(self) -> List[Tuple[str, str, Any]]:
+        """(name, concept, value) of every entry of the run's namespace"""
+        self._check_fork()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, concept, value FROM memory WHERE namespace = ?", (self.namespace,)).fetchall()
+        return [(name, concept, json.loads(value)) for name, concept, value in rows]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {memory_key(name, concept): value for name, concept, value in self.items()}
+
+    def load_dict(self, data: Dict[str, Any]):
+        """Replace the run's namespace with a legacy dict"""
+        rows = [(self.namespace, *split_memory_key(key), json.dumps(value)) for key, value in data.items()]
+        self._check_fork()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM memory WHERE namespace = ?", (self.namespace,))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO memory (namespace, name, concept, value) VALUES (?, ?, ?, ?)", rows)
+
+    def publish_shared(self, data: Dict[str, Any]) -> bool:
+        """Fill the shared namespace with a legacy dict unless another run already did.
+
+        Returns:
+            True if this call published the data
+        """
+        if self.shared_namespace is None:
+            raise ValueError("This memory has no shared namespace")
+        rows = [(self.shared_namespace, *split_memory_key(key), json.dumps(value)) for key, value in data.items()]
+        self._check_fork()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock first, so exactly one process publishes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                published = self._conn.execute(
+                    "SELECT 1 FROM memory WHERE namespace = ? LIMIT 1", (self.shared_namespace,)).fetchone()
+                if published is None:
+                    self._conn.executemany(
+                        "INSERT INTO memory (namespace, name, concept, value) VALUES (?, ?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._shared = None
+        return published is None
+
+    def clear(self):
+        """Delete the run's namespace"""
+        self.load_dict({})
+
+    def export_json(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def resolve_memory_backend(location: str, backend: Optional[str] = None) -> str:
+    """The backend for a memory location: the one given, else inferred from the file suffix"""
+    if backend is None:
+        backend = "sqlite" if location.lower().endswith(_SQLITE_SUFFIXES) else "json"
+    if backend not in MEMORY_BACKENDS:
+        raise ValueError(f"Unknown memory backend '{backend}', expected one of {MEMORY_BACKENDS}")
+    return backend
+
+
+def open_memory(location: str, backend: Optional[str] = None, namespace: Optional[str] = None,
+                shared_namespace: Optional[str] = None):
+    """Open the memory store at location.
+
+    Args:
+        location: JSON file or SQLite database
+        backend: "json" or "sqlite"; inferred from the suffix (.db, .sqlite, .sqlite3) if omitted
+        namespace: Namespace of the run (SQLite only)
+        shared_namespace: Read-only namespace of static definitions (SQLite only)
+
+    Returns:
+        A JSONMemory or SQLiteMemory
+    """
+    if resolve_memory_backend(location, backend) == "sqlite":
+        return SQLiteMemory(location, namespace=namespace, shared_namespace=shared_namespace)
+    if namespace is not None or shared_namespace is not None:
+        raise ValueError("Memory namespaces require the sqlite backend")
+    return JSONMemory(location)
+
+
+def open_body_memory(body: Dict[str, Any]):
+    """Open the memory store described by an Agent body: memory_location, and optionally
+    memory_backend, memory_namespace and shared_memory_namespace."""
+    return open_memory(body["memory_location"], body.get("memory_backend"),
+                       body.get("memory_namespace"), body.get("shared_memory_namespace"))
@@ -1,12 +1,148 @@
 import re
 import ast
-from typing import List
+from typing import List, Optional
 import logging
-from normalign_stereotype.core._tools import LLMTool as LLM
+import threading
+from normalign_stereotype.core._tools import LLMTool as LLM, _parse_structured_output, _validate_structured_list
+
+
+_stats_lock = threading.Lock()
+
+
+class StreamingListParser:
+    """Incrementally finds the list of strings in a streamed StructuredLLM output.
+
+    Text is fed chunk by chunk. Outside the list the scanner skips <think> blocks and
+    waits for a '['; inside it tracks string literals, so brackets and commas in an
+    explanation do not count. A '[' not followed by string elements (e.g. "[1]" in the
+    reasoning) is dropped and scanning resumes after it. Once the list closes it is parsed
+    and validated: the state becomes "complete", or "invalid" when an entry lacks a colon.
+    A stream without any list for max_preamble_chars characters, not counting <think>
+    blocks, is "invalid" as well.
+
+    Args:
+        max_preamble_chars: Characters allowed before the list starts, outside <think>
+            blocks (None for no limit)
+    """
+
+    PENDING = "pending"
+    COMPLETE = "complete"
+    INVALID = "invalid"
+
+    _THINK_OPEN = "<think>"
+    _THINK_CLOSE = "</think>"
+
+    def __init__(self, max_preamble_chars: Optional[int] = None):
+        self.max_preamble_chars = max_preamble_chars
+        self.text = ""
+        self.state = self.PENDING
+        self.result: Optional[List[str]] = None
+        self.error: Optional[str] = None
+        self._pos = 0
+        self._start = None  # Index of the '[' of the list being read
+        self._in_think = False
+        self._preamble_chars = 0  # Characters scanned outside <think> blocks and lists
+        self._quote = None
+        self._escape = False
+        self._expect_element = True
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of output and return the state"""
+        if self.state != self.PENDING:
+            return self.state
+        self.text += chunk
+        self._scan()
+        if (self.state == self.PENDING and self._start is None and self.max_preamble_chars is not None
+                and self._preamble_chars > self.max_preamble_chars):
+            self._fail(f"No list within the first {self.max_preamble_chars} characters")
+        return self.state
+
+    def finish(self) -> List[str]:
+        """The validated list, once the output is complete or the parser stopped.
+
+        Raises:
+            ValueError: If the output holds no valid list
+        """
+        if self.state == self.PENDING:
+            # The stream ended without a list the scanner accepts: fall back to the
+            # non-streaming extraction of the whole text
+            self.result = _parse_structured_output(self.text.replace("/n", ""))
+            self.state = self.COMPLETE
+        if self.state == self.INVALID:
+            raise ValueError(self.error)
+        return self.result
+
+    def _fail(self, error: str):
+        self.state = self.INVALID
+        self.error = error
+
+    def _abandon(self):
+        """The current '[' does not start the list: resume scanning right after it"""
+        self._pos = self._start + 1
+        self._start = None
+        self._quote = None
+        self._escape = False
+
+    def _scan(self):
+        text = self.text
+        while self._pos < len(text) and self.state == self.PENDING:
+            i = self._pos
+            ch = text[i]
+            if self._start is None:
+                if ch == "<":
+                    tag = self._THINK_CLOSE if self._in_think else self._THINK_OPEN
+                    if text.startswith(tag, i):
+                        self._in_think = not self._in_think
+                        self._pos = i + len(tag)
+                        continue
+                    if tag.startswith(text[i:]):
+                        return  # Possibly a tag split across chunks
+                elif ch == "[" and not self._in_think:
+                    self._start = i
+                    self._expect_element = True
+                if not self._in_think:
+                    self._preamble_chars += 1
+                self._pos = i + 1
+            elif self._quote is not None:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == self._quote:
+                    self._quote = None
+                    self._expect_element = False
+                self._pos = i + 1
+            elif ch.isspace():
+                self._pos = i + 1
+            elif ch == "]":
+                self._pos = i + 1
+                self._close(text[self._start:i + 1])
+            elif self._expect_element and ch in "\"'":
+                self._quote = ch
+                self._pos = i + 1
+            elif not self._expect_element and ch == ",":
+                self._expect_element = True
+                self._pos = i + 1
+            else:
+                self._abandon()
+
+    def _close(self, candidate: str):
+        try:
+            parsed = ast.literal_eval(candidate.replace("/n", ""))
+        except (SyntaxError, ValueError):
+            self._abandon()
+            return
+        try:
+            self.result = _validate_structured_list(parsed)
+            self.state = self.COMPLETE
+        except ValueError as e:
+            self._fail(str(e))
+
 
 class ConfiguredLLM(LLM):
     def __init__(self, model_name = "deepseek-r1-distill-qwen-1.5b",max_retries=5, *args, **kwargs):
-        super().__init__('temp', {}, model_name)
+        # kwargs are LLMTool parameters (settings_path, router, cassette, ...)
+        super().__init__('temp', dict(kwargs), model_name)
         self.max_retries = max_retries
 
     def invoke(self, user_input, max_retries = None):
@@ -23,7 +159,8 @@ class ConfiguredLLM(LLM):
 
 class BulletLLM(LLM):
     def __init__(self, model_name = "deepseek-r1-distill-qwen-1.5b", max_retries=5, *args, **kwargs):
-        super().__init__('temp', {}, model_name)
+        # kwargs are LLMTool parameters (settings_path, router, cassette, ...)
+        super().__init__('temp', dict(kwargs), model_name)
         self.max_retries = max_retries
 
     def bullet_invoke(self, user_input: str, max_retries: int = 3) -> str:
@@ -71,9 +208,23 @@ class BulletLLM(LLM):
 
 
 class StructuredLLM(LLM):
-    def __init__(self,  model_name = "deepseek-r1-distill-qwen-1.5b",max_retries=5, *args, **kwargs):
-        super().__init__('temp', {}, model_name)
+    def __init__(self,  model_name = "deepseek-r1-distill-qwen-1.5b",max_retries=5, *args,
+                 stream=False, max_preamble_chars=None, **kwargs):
+        """
+        Args:
+            model_name: Model to call
+            max_retries: Default number of attempts of invoke
+            stream: Stream the completion and stop it as soon as the list is complete or
+                clearly malformed (see StreamingListParser)
+            max_preamble_chars: In stream mode, give up on an attempt when no list has
+                started after this many characters
+            **kwargs: LLMTool parameters (settings_path, router, token_ledger, cassette, ...)
+        """
+        super().__init__('temp', dict(kwargs), model_name)
         self.max_retries = max_retries
+        self.stream = stream
+        self.max_preamble_chars = max_preamble_chars
+        self.stream_stats = {"attempts": 0, "stopped_early": 0}
 
     def structured_invoke(self, user_input: str, max_retries: int = 3) -> List[str]:
         """
@@ -101,38 +252,54 @@ class StructuredLLM(LLM):
 Example: ["Marie Curie was a Polish-French physicist and chemist who discovered radioactivity elements polonium/radium. She became first woman Nobel laureate (1903) and first double Nobel winner, revolutionizing radiation therapy :Marie Curie", "Alan Turing was a British mathematician who developed modern computing concepts through his Turing Machine model. He decrypted Nazi Enigma codes in WWII and established foundational AI principles in his Turing Test :Alan Turing"]
 """
         for _ in range(max_retries):
+            raw_output = None
             try:
+                if self.stream:
+                    return self._stream_structured(user_input, system_prompt)
+
                 # Call base LLM implementation
                 raw_output = super()._invoke(
                     prompt=user_input,
                     system_prompt=system_prompt,
                     temperature=0,
                 )
-
-                # Extract and parse list
-                list_match = re.search(r'\[.*\]', raw_output, re.DOTALL)
-                if not list_match:
-                    raise ValueError("No valid list found in output")
-
-                parsed = ast.literal_eval(list_match.group().replace("/n",""))
-                if not isinstance(parsed, list):
-                    raise ValueError("Output is not a list")
-
-                # Validate each entry
-                for entry in parsed:
-                    if not (isinstance(entry, str) and ':' in entry):
-                        raise ValueError(f"Invalid entry: {entry}")
-
-                return parsed
+                return _parse_structured_output(raw_output.replace("/n", ""))
 
             except (SyntaxError, ValueError, AttributeError, TypeError) as e:
                 logging.warning(f"==============")
                 logging.warning(f"Validation failed: {str(e)}")
-                logging.warning(f"incorrect result: {raw_output}")
+                logging.warning(f"incorrect result: {getattr(e, 'raw_output', raw_output)}")
                 continue
 
         return []
 
+    def _stream_structured(self, user_input: str, system_prompt: str):
+        """Stream one attempt, closing the request as soon as the parser reaches a verdict.
+
+        Returns:
+            The validated list
+
+        Raises:
+            ValueError: If the output holds no valid list (with the text received as raw_output)
+        """
+        parser = StreamingListParser(self.max_preamble_chars)
+        chunks = self._stream_invoke(prompt=user_input, system_prompt=system_prompt, temperature=0)
+        with _stats_lock:  # Calls of one tool may run in several threads (see cross_action)
+            self.stream_stats["attempts"] += 1
+        try:
+            for chunk in chunks:
+                if parser.feed(chunk) != parser.PENDING:
+                    with _stats_lock:
+                        self.stream_stats["stopped_early"] += 1
+                    break
+        finally:
+            chunks.close()
+        try:
+            return parser.finish()
+        except (SyntaxError, ValueError) as e:
+            e.raw_output = parser.text
+            raise
+
     def invoke(self, user_input: str, max_retries = None):
         if max_retries:
             pass
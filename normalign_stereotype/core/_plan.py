@@ -2,15 +2,41 @@ from normalign_stereotype.core._concept import Concept, create_concept_reference
 from normalign_stereotype.core._agent import Agent, get_default_working_config
 from normalign_stereotype.core._inference import Inference
 from normalign_stereotype.core._reference import Reference
+from normalign_stereotype.core._token_budget import TokenUsage
+from normalign_stereotype.core._lazy_reference import materialize
+from normalign_stereotype.core._result_store import ResultStore
+from normalign_stereotype.core._memory import open_body_memory
+from normalign_stereotype.core._pos_analysis import tag_phrases
 
 
 from typing import Optional, Any, Dict, List
 from collections import defaultdict, deque
 import ast
+import copy
+import logging
+import os
+import pickle
+import tempfile
+
+
+# Bump when the layout of compiled plan artifacts changes
+COMPILED_PLAN_VERSION = 1
+
+
+def _resolve_working_config(config):
+    """Copy a working config, inlining the contents of its prompt_template_path"""
+    if config is None:
+        return None
+    config = copy.deepcopy(config)
+    if not config.get("prompt_template") and config.get("prompt_template_path"):
+        with open(config.pop("prompt_template_path"), encoding="utf-8") as f:
+            config["prompt_template"] = f.read()
+    return config
 
 class Plan:
-    def __init__(self, agent: Agent):
+    def __init__(self, agent: Agent, name: Optional[str] = None):
         self.agent = agent
+        self.name = name
         self.concept_registry: Dict[str, Concept] = {}
         self.inference_registry: Dict[str, Inference] = {}
         self.inference_order: List[Inference] = []
@@ -47,9 +73,9 @@ class Plan:
         
         # Execute cognition with custom configuration
         concept.reference = self.agent.cognition(
-            concept_name,
-            perception_working_config=self.perception_config,
-            actuation_working_config=self.actuation_config
+            concept,
+            perception_working_config=perception_config,
+            actuation_working_config=actuation_config
         )
         return self
 
@@ -173,10 +199,30 @@ class Plan:
             )
 
         self.inference_order = ordered
+        self._prefetch_phrase_pos()
         return self
 
-    def execute(self, input_data: Optional[dict[str, Reference]] = None, input_config: Optional[dict[str, dict[str, dict]]] = None):
-        """Execute the plan with optional input data, returning the output concept reference"""
+    def _prefetch_phrase_pos(self):
+        """Tag the part of speech of every inferred concept name in one batch (see _pos_analysis).
+
+        Inference.cognition_configuration then finds every name cached. Without spaCy the
+        prefetch is skipped: plans that never configure cognition do not need it.
+        """
+        names = [inf.concept_to_infer.comprehension["name"] for inf in self.inference_order]
+        names = [name for name in names if "classification" not in name]
+        if not names:
+            return
+        try:
+            tag_phrases(names)
+        except (ImportError, OSError) as e:
+            logging.warning(f"Part-of-speech prefetch skipped: {e}")
+
+    def execute(self, input_data: Optional[dict[str, Reference]] = None, input_config: Optional[dict[str, dict[str, dict]]] = None,
+                statement: Optional[str] = None):
+        """Execute the plan with optional input data, returning the output concept reference.
+
+        statement labels the results the agent's result store records during this execution.
+        """
         # Validate I/O configuration
         if not self.input_concept_names or not self.output_concept_name:
             raise ValueError("I/O not configured. Call configure_io() first")
@@ -200,7 +246,7 @@ class Plan:
                 self.make_reference(
                     concept_name=name,
                     reference=input_data[name],
-                    actuation_working_config=input_config[name]["actuation"],
+                    actuation_working_config=(input_config or {}).get(name, {}).get("actuation"),
                     read_reference=False
                 )
         else:
@@ -219,8 +265,10 @@ class Plan:
         if not self.inference_order:
             self.order_inference()
 
-        for inf in self.inference_order:
-            inf.execute()
+        with self.agent.token_ledger.scope(plan=self.name or self.output_concept_name), \
+                ResultStore.scope(statement=statement):
+            for inf in self.inference_order:
+                inf.execute()
 
         # Retrieve and validate final output
         output_concept = self.concept_registry[self.output_concept_name]
@@ -232,3 +280,164 @@ class Plan:
             )
 
         return output_concept.reference
+
+    def compile(self, path, model_name=None):
+        """Save the plan as a compiled artifact that Plan.load_compiled can restore without re-planning.
+
+        The artifact holds the ordered inferences with their resolved working configs (prompt
+        templates read from disk and inlined), the references of the base and classification
+        concepts as they stand after cognition, the agent's working memory and the contents of
+        its memory file. LLM clients are not stored; they are rebuilt from model_name (or
+        supplied) when loading.
+
+        Args:
+            path: Destination file
+            model_name: Model used to rebuild the default LLM clients on load
+        """
+        if not self.inference_order:
+            self.order_inference()
+
+        inferences = []
+        for inf in self.inference_order:
+            perception_config, actuation_config = get_default_working_config(
+                inf.concept_to_infer.comprehension["name"]
+            )
+            inferences.append({
+                "perception_concept_names": [pc.comprehension["name"] for pc in inf.perception_concepts],
+                "actuation_concept_name": inf.the_actuation_concept.comprehension["name"],
+                "inferred_concept_name": inf.concept_to_infer.comprehension["name"],
+                "view": list(inf.view),
+                "perception_working_config": _resolve_working_config(
+                    inf.perception_working_config_concept_to_infer or perception_config),
+                "actuation_working_config": _resolve_working_config(
+                    inf.actuation_working_config_concept_to_infer or actuation_config),
+            })
+
+        # Input and inferred references belong to a run, not to the plan
+        per_run = set(self.input_concept_names) | {spec["inferred_concept_name"] for spec in inferences}
+        concepts = {
+            name: {
+                "context": concept.comprehension.get("context", ""),
+                "reference": (materialize(concept.reference)
+                              if concept.reference is not None and name not in per_run else None),
+            }
+            for name, concept in self.concept_registry.items()
+        }
+
+        working_memory = {
+            kind: {name: _resolve_working_config(config) for name, config in configs.items()}
+            for kind, configs in self.agent.working_memory.items()
+        }
+
+        memory = self.agent.memory.to_dict()
+
+        artifact = {
+            "version": COMPILED_PLAN_VERSION,
+            "name": self.name,
+            "model_name": model_name,
+            "input_concept_names": list(self.input_concept_names),
+            "output_concept_name": self.output_concept_name,
+            "concepts": concepts,
+            "inferences": inferences,
+            "working_memory": working_memory,
+            "memory": memory,
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @classmethod
+    def load_compiled(cls, path, body=None, memory_location=None, model_name=None):
+        """Restore a plan saved with Plan.compile, ready to execute.
+
+        Args:
+            path: The compiled artifact
+            body: Agent body to use (LLM clients, memory_location); built from the model name if omitted
+            memory_location: Memory file or database to write the compiled memory into; defaults to the
+                body's memory_location, or a temporary JSON file owned by the agent (deleted by
+                Plan.close, or when the agent is collected). With a shared_memory_namespace in
+                the body, the compiled memory is published there once for every worker and the run's
+                own namespace starts empty.
+            model_name: Overrides the model name stored in the artifact when building the body
+
+        Returns:
+            A Plan with its concepts, references and ordered inferences restored
+        """
+        with open(path, "rb") as f:
+            artifact = pickle.load(f)
+        if not isinstance(artifact, dict) or artifact.get("version") != COMPILED_PLAN_VERSION:
+            raise ValueError(f"{path} is not a compiled plan (version {COMPILED_PLAN_VERSION})")
+
+        body = dict(body) if body is not None else {}
+        body["memory_location"] = memory_location or body.get("memory_location")
+        if body["memory_location"] is not None:
+            # Creates the store if it does not exist yet
+            open_body_memory(body).close()
+
+        if "llm" not in body:
+            from normalign_stereotype.core._modified_llm import ConfiguredLLM, BulletLLM, StructuredLLM
+
+            model_name = model_name or artifact["model_name"]
+            if not model_name:
+                raise ValueError("A model_name or a body with LLM clients is required to load this plan")
+            body.update({
+                "llm": ConfiguredLLM(model_name),
+                "structured_llm": StructuredLLM(model_name),
+                "bullet_llm": BulletLLM(model_name),
+            })
+
+        agent = Agent(body)
+        if body.get("shared_memory_namespace"):
+            # The compiled memory only holds static definitions: workers share one copy
+            agent.memory.publish_shared(artifact["memory"])
+            agent.memory.clear()
+        else:
+            agent.memory.load_dict(artifact["memory"])
+        agent.working_memory = copy.deepcopy(artifact["working_memory"])
+
+        plan = cls(agent, name=artifact["name"])
+        for name, state in artifact["concepts"].items():
+            plan.concept_registry[name] = Concept(name, state["context"], state["reference"])
+
+        for spec in artifact["inferences"]:
+            plan.add_inference(
+                perception_concept_names=spec["perception_concept_names"],
+                actuation_concept_name=spec["actuation_concept_name"],
+                inferred_concept_name=spec["inferred_concept_name"],
+                view=spec["view"],
+                actuation_working_config=spec["actuation_working_config"],
+                perception_working_config=spec["perception_working_config"],
+            )
+        plan.inference_order = list(plan.inference_registry.values())
+
+        plan.input_concept_names = artifact["input_concept_names"]
+        plan.output_concept_name = artifact["output_concept_name"]
+        return plan
+
+    def close(self):
+        """Release the agent's memory (see Agent.close)"""
+        self.agent.close()
+
+    def token_usage(self):
+        """Token usage of this plan's LLM calls, aggregated per concept and per inference"""
+        plan_tag = self.name or self.output_concept_name
+        records = [r for r in self.agent.token_ledger.records if r.get("plan") == plan_tag]
+        by_concept = defaultdict(TokenUsage)
+        by_inference = defaultdict(TokenUsage)
+        total = TokenUsage()
+        for r in records:
+            for usage in (by_concept[r.get("concept")], by_inference[r.get("inference")], total):
+                usage.add(r["prompt_tokens"], r["completion_tokens"], r["total_tokens"])
+        return {
+            "total": total,
+            "by_concept": dict(by_concept),
+            "by_inference": dict(by_inference),
+        }
@@ -0,0 +1,177 @@
+import logging
+import multiprocessing
+import multiprocessing.util
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from normalign_stereotype.core._reference import Reference
+from normalign_stereotype.core._lazy_reference import materialize
+
+
+def statement_reference(concept_name: str, statement: str) -> Reference:
+    """Input reference of one statement, in the "value :name" form cognition expects"""
+    return Reference(axes=[concept_name], shape=(1,), initial_value=f"{statement} :{statement}")
+
+
+def merge_references(references: Sequence[Optional[Reference]], axis: str,
+                     skip_value: str = "@#SKIP#@") -> Reference:
+    """Concatenate per-statement results along axis into one Reference.
+
+    Axes keep the order of the first result (axis is put first if no result has it).
+    Every other axis takes the largest size seen, shorter results are padded with the
+    skip value, and a None result (a failed statement) becomes one slot of skip values.
+
+    Args:
+        references: Results in statement order
+        axis: Axis along which the results are stacked
+        skip_value: Value filling padded and failed slots
+
+    Returns:
+        The merged Reference
+    """
+    results = [materialize(ref) if ref is not None else None for ref in references]
+    present = [ref for ref in results if ref is not None]
+    if not present:
+        raise ValueError("Cannot merge: no statement produced a result")
+
+    axes = list(present[0].axes)
+    if axis not in axes:
+        axes.insert(0, axis)
+    others = [a for a in axes if a != axis]
+    for ref in present:
+        if set(ref.axes) - {axis} != set(others):
+            raise ValueError(f"Cannot merge results with axes {ref.axes} and {present[0].axes}")
+
+    sizes = {a: max(ref.shape[ref.axes.index(a)] for ref in present) for a in others}
+    stacked = []
+    for ref in results:
+        if ref is None:
+            stacked.append(skip_value)
+        elif axis in ref.axes:
+            # Move the merge axis first; each of its slots becomes one row
+            stacked.extend(ref.slice(axis, *others).tensor)
+        else:
+            stacked.append(ref.slice(*others).tensor if others else ref.tensor)
+
+    merged = Reference(
+        axes=[axis] + others,
+        shape=(len(stacked), *(sizes[a] for a in others)),
+        skip_value=skip_value,
+    )._replace_data(stacked)
+    return merged if merged.axes == axes else merged.slice(*axes)
+
+
+# Plan of the current worker process, loaded once by _init_worker
+_worker_plan = None
+_worker_input = None
+
+
+def _init_worker(compiled_path: str, body_factory: Optional[Callable[[], Dict[str, Any]]], input_concept: str):
+    global _worker_plan, _worker_input
+    from normalign_stereotype.core._plan import Plan
+
+    body = body_factory() if body_factory is not None else None
+    _worker_plan = Plan.load_compiled(compiled_path, body=body)
+    _worker_input = input_concept
+    # Worker processes exit without running atexit hooks, only multiprocessing finalizers
+    multiprocessing.util.Finalize(None, _worker_plan.close, exitpriority=10)
+
+
+def _run_in_worker(index: int, statement: str):
+    try:
+        output = _worker_plan.execute({_worker_input: statement_reference(_worker_input, statement)},
+                                      statement=statement)
+        return index, materialize(output), None
+    except Exception as e:
+        return index, None, f"{type(e).__name__}: {e}"
+
+
+class ParallelPlanRunner:
+    """Executes a compiled plan over a batch of statements with a pool of worker processes.
+
+    Each worker loads the compiled plan (see Plan.compile) once, keeping a warm Agent and
+    fully built Plan for every statement it runs; statements are sent in chunks and the
+    per-statement outputs are merged along the input axis (see merge_references). CPU-bound
+    stages (reference recursion, output parsing, prompt cleaning) then run on all cores
+    instead of sharing one interpreter.
+
+    Args:
+        compiled_path: Compiled plan artifact
+        workers: Number of worker processes (default: CPU count)
+        body_factory: Optional picklable callable returning the Agent body of a worker
+            (LLM clients, memory); by default it is built from the artifact's model name
+        input_concept: Input concept fed with the statements (default: the plan's only input)
+        chunksize: Statements sent to a worker at a time
+        mp_context: Multiprocessing start method ("fork", "spawn", ...), default of the platform if None
+    """
+
+    def __init__(self, compiled_path: str, workers: Optional[int] = None,
+                 body_factory: Optional[Callable[[], Dict[str, Any]]] = None,
+                 input_concept: Optional[str] = None, chunksize: int = 1,
+                 mp_context: Optional[str] = None):
+        self.compiled_path = compiled_path
+        self.workers = workers
+        self.body_factory = body_factory
+        if input_concept is None:
+            with open(compiled_path, "rb") as f:
+                input_names = pickle.load(f)["input_concept_names"]
+            if len(input_names) != 1:
+                raise ValueError(f"The plan has inputs {input_names}: pass input_concept")
+            input_concept = input_names[0]
+        self.input_concept = input_concept
+        self.chunksize = chunksize
+        self.mp_context = mp_context
+        self.errors: Dict[int, str] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            context = multiprocessing.get_context(self.mp_context) if self.mp_context else None
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.compiled_path, self.body_factory, self.input_concept),
+            )
+        return self._pool
+
+    def run_each(self, statements: Sequence[str]) -> List[Optional[Reference]]:
+        """Output reference of every statement, in order (None where a statement failed)"""
+        statements = list(statements)
+        results: List[Optional[Reference]] = [None] * len(statements)
+        self.errors = {}
+        pool = self._get_pool()
+        for index, output, error in pool.map(_run_in_worker, range(len(statements)), statements,
+                                             chunksize=self.chunksize):
+            if error is not None:
+                logging.warning(f"Statement {index} failed: {error}")
+                self.errors[index] = error
+            results[index] = output
+        return results
+
+    def run(self, statements: Sequence[str], axis: Optional[str] = None) -> Reference:
+        """Execute the plan on every statement and merge the outputs into one Reference.
+
+        Args:
+            statements: Input statements
+            axis: Axis the outputs are stacked along (default: the input concept)
+
+        Returns:
+            The merged output; failed statements (see errors) hold skip values
+        """
+        results = self.run_each(statements)
+        if all(ref is None for ref in results):
+            raise RuntimeError(f"Every statement failed: {self.errors}")
+        return merge_references(results, axis or self.input_concept)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
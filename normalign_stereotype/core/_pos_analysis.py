@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Iterable, Optional
+
+from normalign_stereotype.core._memory import _file_lock
+
+# Part of speech of concept names, used to pick the noun or verb prompt templates.
+# Results are cached by name in a JSON file shared by the runs of a user, so the spaCy
+# model is only loaded when a name has never been seen.
+
+POS_MODEL = "en_core_web_sm"
+_POS_CACHE_VERSION = 1
+# The tags name prompt template directories: any other cached value is dropped
+_POS_TAGS = ("noun", "verb")
+
+# Tagging a short phrase needs the tagger and parser only
+_UNUSED_COMPONENTS = ["ner", "lemmatizer"]
+
+_nlp = None
+_cache: Optional[Dict[str, str]] = None
+_cache_path: Optional[str] = None
+_lock = threading.Lock()
+
+
+def pos_cache_path() -> str:
+    """Location of the persistent cache: NORMALIGN_POS_CACHE, or a per-user directory under ~/.cache"""
+    return os.environ.get("NORMALIGN_POS_CACHE") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "normalign_stereotype", "pos_cache.json"
+    )
+
+
+def get_nlp():
+    """Import spaCy and load the English model on first use"""
+    global _nlp
+    if _nlp is None:
+        import spacy
+
+        _nlp = spacy.load(POS_MODEL, exclude=_UNUSED_COMPONENTS)
+    return _nlp
+
+
+def _read_cache_file(path: str) -> Dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _POS_CACHE_VERSION or data.get("model") != POS_MODEL:
+        return {}
+    pos = data.get("pos")
+    if not isinstance(pos, dict):
+        return {}
+    return {name: tag for name, tag in pos.items() if tag in _POS_TAGS}
+
+
+def _load_cache() -> Dict[str, str]:
+    global _cache, _cache_path
+    path = pos_cache_path()
+    if _cache is None or _cache_path != path:
+        _cache = _read_cache_file(path)
+        _cache_path = path
+    return _cache
+
+
+def _save_cache(new_entries: Dict[str, str]):
+    """Merge new entries into the cache file (written atomically under a file lock, so the
+    entries of concurrent writers are kept)"""
+    path = pos_cache_path()
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        # Only the current user may write (or list) the cache
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        with _file_lock(path):
+            merged = _read_cache_file(path)
+            merged.update(new_entries)
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=directory, suffix=".tmp",
+                                             delete=False) as f:
+                json.dump({"version": _POS_CACHE_VERSION, "model": POS_MODEL, "pos": merged}, f)
+            os.replace(f.name, path)
+    except OSError as e:
+        logging.warning(f"Could not write the POS cache {path}: {e}")
+
+
+def _phrase_text(phrase: str) -> str:
+    """Concept names to plain words: "not_possess?" -> "not possess" """
+    return re.sub(r"\s+", " ", re.sub(r"[_\W]+", " ", phrase)).strip()
+
+
+def _doc_pos(doc) -> str:
+    root = next((token for token in doc if token.dep_ == "ROOT"), None)
+    if root is not None and root.pos_ in ("VERB", "AUX"):
+        return "verb"
+    return "noun"
+
+
+def tag_phrases(phrases: Iterable[str], batch_size: int = 64) -> Dict[str, str]:
+    """Part of speech ("noun" or "verb") of each phrase, tagging the uncached ones in one batch.
+
+    Args:
+        phrases: Concept names
+        batch_size: Phrases per nlp.pipe batch
+
+    Returns:
+        Phrase -> "noun" or "verb"
+    """
+    phrases = list(dict.fromkeys(phrases))
+    with _lock:
+        cache = _load_cache()
+        missing = [phrase for phrase in phrases if phrase not in cache]
+        if missing:
+            nlp = get_nlp()
+            tagged = {phrase: _doc_pos(doc)
+                      for phrase, doc in zip(missing, nlp.pipe((_phrase_text(p) for p in missing),
+                                                               batch_size=batch_size))}
+            cache.update(tagged)
+            _save_cache(tagged)
+        return {phrase: cache[phrase] for phrase in phrases}
+
+
+def _get_phrase_pos(phrase: str) -> str:
+    """Part of speech of a concept name ("noun" or "verb"), cached"""
+    return tag_phrases([phrase])[phrase]
+
+
+def clear_pos_cache(persistent: bool = False):
+    """Forget the cached tags of this process (and delete the cache file if persistent)"""
+    global _cache
+    with _lock:
+        _cache = None
+        if persistent:
+            try:
+                os.remove(pos_cache_path())
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,324 @@
+import itertools
+from typing import Any, Dict, List, Optional, Sequence
+
+from normalign_stereotype.core._reference import Reference, ValueTable, _is_ragged, _leaf_getter, _map_cells
+from normalign_stereotype.core._sparse_reference import _combine_axes
+
+
+SKIP = "@#SKIP#@"
+
+
+def _row_major(shape):
+    return itertools.product(*(range(size) for size in shape))
+
+
+def _trim(row: List[Any]) -> List[Any]:
+    """Drop trailing skip values: a row is only as long as its last present item"""
+    end = len(row)
+    while end and row[end - 1] == SKIP:
+        end -= 1
+    return row[:end]
+
+
+class RaggedReference:
+    """Reference with one axis whose length differs from row to row.
+
+    The rows (one per index of the other, rectangular axes, in row-major order) are stored
+    back to back in one flat list of values; offsets[r]:offsets[r + 1] delimits row r, so a
+    row costs its own length instead of the longest row's. Items past the end of a row read
+    as skip values, and shape reports the padded size (the longest row) so a RaggedReference
+    can be combined with dense references.
+
+    The storage is independent of the order of the axes: axes may put the ragged axis
+    anywhere, as the equivalent dense reference does.
+
+    Args:
+        outer_axes: The rectangular axes, in the order of the stored rows
+        outer_shape: Size of each rectangular axis
+        ragged_axis: Name of the ragged axis
+        rows: Optional rows in row-major order of the outer axes
+        skip_value: Value read for missing items
+        value_table: ValueTable of the leaves (default: a new one)
+        axes: Order of the axes (default: the rectangular axes, then the ragged axis)
+        ragged_size: Minimum padded size of the ragged axis (the longest row is used when
+            longer)
+    """
+
+    is_ragged_reference = True
+
+    def __init__(self, outer_axes, outer_shape, ragged_axis: str, rows: Optional[Sequence[List[Any]]] = None,
+                 skip_value: str = SKIP, value_table: Optional[ValueTable] = None,
+                 axes: Optional[Sequence[str]] = None, ragged_size: int = 0):
+        if len(outer_axes) != len(outer_shape):
+            raise ValueError("Axes and shape must have the same length")
+        if ragged_axis in outer_axes:
+            raise ValueError(f"Ragged axis '{ragged_axis}' is also a rectangular axis")
+        self.outer_axes: List[str] = list(outer_axes)
+        self.outer_shape: tuple = tuple(outer_shape)
+        self.ragged_axis: str = ragged_axis
+        self._axes: List[str] = list(axes) if axes is not None else self.outer_axes + [ragged_axis]
+        if sorted(self._axes) != sorted(self.outer_axes + [ragged_axis]):
+            raise ValueError(f"Axes {self._axes} must be the rectangular axes and the ragged axis")
+        self.skip_value: str = skip_value
+        self.value_table: ValueTable = value_table if value_table is not None else ValueTable()
+
+        row_count = 1
+        for size in self.outer_shape:
+            row_count *= size
+        rows = list(rows) if rows is not None else [[] for _ in range(row_count)]
+        if len(rows) != row_count:
+            raise ValueError(f"Expected {row_count} rows for shape {self.outer_shape}, got {len(rows)}")
+        self.values: List[Any] = []
+        self.offsets: List[int] = [0]
+        for row in rows:
+            row = [SKIP if item == skip_value else item for item in row] if isinstance(row, list) else []
+            self.values.extend(self.value_table.intern(item) for item in _trim(row))
+            self.offsets.append(len(self.values))
+        self.ragged_size: int = max([ragged_size] + self.lengths)
+
+        self._strides = []
+        stride = 1
+        for size in reversed(self.outer_shape):
+            self._strides.insert(0, stride)
+            stride *= size
+
+    @property
+    def axes(self) -> List[str]:
+        return list(self._axes)
+
+    @property
+    def lengths(self) -> List[int]:
+        """Length of every row"""
+        return [end - start for start, end in zip(self.offsets, self.offsets[1:])]
+
+    @property
+    def shape(self) -> tuple:
+        sizes = dict(zip(self.outer_axes, self.outer_shape))
+        sizes[self.ragged_axis] = self.ragged_size
+        return tuple(sizes[axis] for axis in self._axes)
+
+    def _row_number(self, outer_index: Sequence[int]) -> int:
+        return sum(i * stride for i, stride in zip(outer_index, self._strides))
+
+    def row(self, **outer_index) -> List[Any]:
+        """Items of the row at an index of the rectangular axes"""
+        r = self._row_number([outer_index[axis] for axis in self.outer_axes])
+        return self.values[self.offsets[r]:self.offsets[r + 1]]
+
+    def _rows(self):
+        return (self.values[start:end] for start, end in zip(self.offsets, self.offsets[1:]))
+
+    # -- conversion -------------------------------------------------------------------------
+
+    @staticmethod
+    def from_reference(reference) -> "RaggedReference":
+        """Ragged copy of a Reference, making its last axis ragged (trailing skip values are dropped)"""
+        if _is_ragged(reference):
+            return reference
+        if getattr(reference, "is_lazy_reference", False) or getattr(reference, "is_sparse_reference", False):
+            reference = reference.materialize()
+            if not isinstance(reference, Reference):
+                reference = reference.to_dense()
+        if not isinstance(reference, Reference):
+            raise TypeError("Expected a Reference instance")
+        if not reference.axes:
+            raise ValueError("A ragged reference needs at least one axis")
+
+        outer_axes, outer_shape = reference.axes[:-1], reference.shape[:-1]
+        get = _leaf_getter(reference)
+        last = reference.axes[-1]
+        rows = []
+        for outer_index in _row_major(outer_shape):
+            index = dict(zip(outer_axes, outer_index))
+            rows.append([get({**index, last: k}) for k in range(reference.shape[-1])])
+        return RaggedReference(outer_axes, outer_shape, last, rows, value_table=reference.value_table,
+                               ragged_size=reference.shape[-1])
+
+    def to_dense(self) -> Reference:
+        """Equivalent Reference, with every row padded to the longest one"""
+        shape = self.shape
+        dense = Reference(self.axes, shape, initial_value=self.skip_value,
+                          skip_value=self.skip_value, value_table=self.value_table)
+        if self._axes[-1] == self.ragged_axis and self._axes[:-1] == self.outer_axes:
+            for outer_index, row in zip(_row_major(self.outer_shape), self._rows()):
+                data = dense.data
+                for i in outer_index:
+                    data = data[i]
+                data[:len(row)] = row
+            return dense
+
+        for outer_index, row in zip(_row_major(self.outer_shape), self._rows()):
+            index = dict(zip(self.outer_axes, outer_index))
+            for k, item in enumerate(row):
+                index[self.ragged_axis] = k
+                data = dense.data
+                for axis in self._axes[:-1]:
+                    data = data[index[axis]]
+                data[index[self._axes[-1]]] = item
+        return dense
+
+    def materialize(self) -> "RaggedReference":
+        return self
+
+    @property
+    def tensor(self):
+        """Padded nested-list view of the data (built on access)"""
+        return self.to_dense().data
+
+    def _leaf(self, index: Dict[str, int]):
+        r = self._row_number([index[axis] for axis in self.outer_axes])
+        position = self.offsets[r] + index[self.ragged_axis]
+        return self.values[position] if position < self.offsets[r + 1] else SKIP
+
+    def get(self, **kwargs):
+        """Get element(s) like Reference.get, reading past the end of a row as skip values"""
+        for key in kwargs:
+            if key not in self.axes:
+                raise KeyError(f"Axis '{key}' not found in {self.axes}")
+        axes, shape = self.axes, self.shape
+
+        def gather(depth, index):
+            if depth == len(axes):
+                return self._leaf(index)
+            current = kwargs.get(axes[depth], slice(None))
+            if isinstance(current, slice):
+                return [gather(depth + 1, {**index, axes[depth]: i})
+                        for i in range(*current.indices(shape[depth]))]
+            if current >= shape[depth]:
+                return self.skip_value
+            return gather(depth + 1, {**index, axes[depth]: current})
+
+        return gather(0, {})
+
+    def slice(self, *selected_axes):
+        """Select and reorder axes like Reference.slice, reading only the items of the rows.
+
+        While the ragged axis is selected the result stays ragged; a row of the result
+        ends where the last of the rows it gathers ends. Without the ragged axis, each leaf
+        of the (dense) result holds the padded sub-tensor, as in Reference.slice.
+        """
+        for axis in selected_axes:
+            if axis not in self.axes:
+                raise KeyError(f"Axis '{axis}' not found in {self.axes}")
+        if len(selected_axes) != len(set(selected_axes)):
+            raise ValueError("Duplicate axes in selection")
+        if not selected_axes:
+            raise ValueError("At least one axis must be selected")
+
+        def sliced_leaf(**index):
+            # As in the dense slice, leaves holding skip values are skipped
+            sub_tensor = self.get(**index)
+            if isinstance(sub_tensor, list) and any(elem == self.skip_value for elem in sub_tensor):
+                return SKIP
+            return sub_tensor
+
+        sizes = dict(zip(self.axes, self.shape))
+        new_outer = [axis for axis in selected_axes if axis != self.ragged_axis]
+        new_shape = tuple(sizes[axis] for axis in new_outer)
+        if self.ragged_axis not in selected_axes:
+            def build(depth, index):
+                if depth == len(new_outer):
+                    return sliced_leaf(**index)
+                return [build(depth + 1, {**index, new_outer[depth]: i}) for i in range(new_shape[depth])]
+
+            return Reference(axes=new_outer, shape=new_shape, initial_value=None,
+                             skip_value=SKIP)._replace_data(build(0, {}), trusted_shape=True)
+
+        dropped = [(axis, size) for axis, size in zip(self.outer_axes, self.outer_shape) if axis not in selected_axes]
+        rows = []
+        for new_index in _row_major(new_shape):
+            index = dict(zip(new_outer, new_index))
+            length = max((len(self.row(**index, **dict(zip([axis for axis, _ in dropped], dropped_index))))
+                          for dropped_index in _row_major([size for _, size in dropped])), default=0)
+            rows.append([sliced_leaf(**index, **{self.ragged_axis: k}) for k in range(length)])
+        return RaggedReference(new_outer, new_shape, self.ragged_axis, rows, axes=selected_axes,
+                               ragged_size=self.ragged_size)
+
+    # -- operations -------------------------------------------------------------------------
+
+    @staticmethod
+    def _combine(op, references):
+        """Apply op to the aligned leaves of references, visiting only the items of the ragged rows.
+
+        The ragged axis is that of the first ragged input; the other inputs with a different
+        ragged axis are read densely. Rows end at the shortest of the ragged inputs' rows.
+        The axes are ordered as in the dense operation.
+        """
+        ragged_axis = next(ref.ragged_axis for ref in references if _is_ragged(ref))
+        references = [ref.to_dense() if _is_ragged(ref) and ref.ragged_axis != ragged_axis else ref
+                      for ref in references]
+        axes, shape = _combine_axes(references, op.__name__)
+        outer = [(axis, size) for axis, size in zip(axes, shape) if axis != ragged_axis]
+        outer_axes = [axis for axis, _ in outer]
+        outer_shape = tuple(size for _, size in outer)
+        ragged_inputs = [ref for ref in references if _is_ragged(ref)]
+        getters = [_leaf_getter(ref) for ref in references]
+
+        rows = []
+        for outer_index in _row_major(outer_shape):
+            index = dict(zip(outer_axes, outer_index))
+            length = min(len(ref.row(**{axis: index[axis] for axis in ref.outer_axes})) for ref in ragged_inputs)
+            row = []
+            for k in range(length):
+                index[ragged_axis] = k
+                elements = [get(index) for get in getters]
+                row.append(SKIP if any(e == SKIP for e in elements) else op(elements))
+            rows.append(row)
+        return RaggedReference(outer_axes, outer_shape, ragged_axis, rows, axes=axes,
+                               ragged_size=shape[axes.index(ragged_axis)])
+
+    @staticmethod
+    def element_action(f, references) -> "RaggedReference":
+        def element_action(elements):
+            try:
+                return f(*elements)
+            except Exception:
+                return SKIP
+        return RaggedReference._combine(element_action, references)
+
+    @staticmethod
+    def cross_product(references) -> "RaggedReference":
+        def cross_product(elements):
+            return elements
+        return RaggedReference._combine(cross_product, references)
+
+    @staticmethod
+    def cross_action(A, B, new_axis_name, executor=None) -> "RaggedReference":
+        """cross_action whose new axis is ragged: each cell keeps only the items its function returned"""
+        axes, shape = _combine_axes([A, B], "cross_action")
+        get_func, get_input = _leaf_getter(A), _leaf_getter(B)
+        cells = []
+        for combined_index in _row_major(shape):
+            index = dict(zip(axes, combined_index))
+            func = get_func(index)
+            input_val = get_input(index)
+            if func == SKIP or input_val == SKIP:
+                cells.append(None)
+                continue
+            if not callable(func):
+                raise TypeError(f"Element at {dict((axis, index[axis]) for axis in A.axes)} in A "
+                                f"is not a callable function")
+            cells.append((func, input_val))
+
+        def call(cell):
+            if cell is None:
+                return []
+            func, input_val = cell
+            try:
+                result = func(input_val)
+            except Exception:
+                return []
+            if not isinstance(result, list) or any(r == SKIP for r in result):
+                return []
+            return result
+
+        return RaggedReference(axes, shape, new_axis_name, _map_cells(call, cells, executor))
+
+    def __repr__(self):
+        return (f"RaggedReference(axes={self.axes}, outer_shape={self.outer_shape}, "
+                f"items={len(self.values)})")
+
+
+def ragged_reference(reference) -> RaggedReference:
+    """Convert a Reference so that its last axis only stores each row's own items"""
+    return RaggedReference.from_reference(reference)
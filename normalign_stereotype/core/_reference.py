@@ -1,13 +1,82 @@
-from typing import Any
+from typing import Any, Optional
+import contextvars
+import itertools
+import threading
+
+
+def _value_key(value):
+    """Hashable key identifying a scalar leaf value, or None if the value is not interned"""
+    if isinstance(value, (list, tuple)):
+        # Cells holding lists (cross_product combinations, slices) are built per cell and
+        # already point at interned scalars; hashing them would only cost time and memory
+        return None
+    try:
+        hash(value)
+    except TypeError:
+        return None
+    return (type(value), value)
+
+
+class ValueTable:
+    """Table of the scalar leaves of a Reference: equal values are stored once and identified by an integer code.
+
+    Every Reference owns its table. Derived references (slice, cross_product, cross_action,
+    element_action) get a new one, so a long-lived input never accumulates the values of its
+    results. Leaves copied from the inputs stay the same objects, so broadcasting a leaf along
+    new axes only adds pointers to it, and equality of interned leaves reduces to identity.
+    Lists are not interned. Interned leaves are shared and must be treated as immutable.
+    """
+
+    def __init__(self):
+        self.values: list[Any] = []
+        self._codes: dict = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value) -> Optional[int]:
+        """Return the code of value, adding it to the table if needed (None if it is unhashable)"""
+        key = _value_key(value)
+        if key is None:
+            return None
+        code = self._codes.get(key)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(key)
+                if code is None:
+                    code = len(self.values)
+                    self.values.append(value)
+                    self._codes[key] = code
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+    def intern(self, value):
+        """Return the canonical object equal to value"""
+        code = self.encode(value)
+        return value if code is None else self.values[code]
+
+    def __getstate__(self):
+        # The lock cannot be pickled; a fresh one is created on load
+        return {"values": self.values, "_codes": self._codes}
+
+    def __setstate__(self, state):
+        self.values = state["values"]
+        self._codes = state["_codes"]
+        self._lock = threading.Lock()
+
 
 class Reference:
-    def __init__(self, axes, shape, initial_value=None, skip_value="@#SKIP#@"):
+    def __init__(self, axes, shape, initial_value=None, skip_value="@#SKIP#@", value_table=None):
         if len(axes) != len(shape):
             raise ValueError("Axes and shape must have the same length")
         self.axes: list[str] = axes
         self.shape: tuple[int, ...] = shape
         self.skip_value: str = skip_value
-        self.data: list[Any] = self._create_nested_list(shape, initial_value)
+        self.value_table: ValueTable = value_table if value_table is not None else ValueTable()
+        self.data: list[Any] = self._create_nested_list(shape, self.value_table.intern(initial_value))
 
     @staticmethod
     def _create_nested_list(shape, initial_value):
@@ -30,9 +99,9 @@ class Reference:
         if not isinstance(value, list):
             raise TypeError("Tensor must be a nested list structure")
 
-        # First compute the shape
-        new_shape = self._compute_shape(value)
-        
+        # Shape and regularity come from a single traversal
+        new_shape, rectangular = self._scan_shape(value)
+
         # Then validate the rank
         observed_rank = len(new_shape)
         expected_rank = len(self.axes)
@@ -43,15 +112,17 @@ class Reference:
                 f"expected {expected_rank} (number of axes)"
             )
 
-        # Finally pad and set the tensor
-        padded_data = self._pad_tensor(value, new_shape)
-        self.data = padded_data
+        # Finally set a copy of the tensor, padding it only if it is irregular
+        if rectangular:
+            self.data = self._copy_leaves(value, len(new_shape))
+        else:
+            self.data = self._pad_tensor(value, new_shape)
         self.shape = new_shape
 
     def _pad_tensor(self, tensor, target_shape):
-        """Pad a tensor to match the target shape with skip values"""
+        """Pad a tensor to match the target shape with skip values, interning its leaves"""
         if not target_shape:
-            return tensor
+            return self.value_table.intern(tensor)
 
         current_dim = target_shape[0]
         if not isinstance(tensor, list):
@@ -78,30 +149,50 @@ class Reference:
             current = current[0]
         return rank
 
-    def _compute_shape(self, lst):
-        """Calculate tensor shape from nested list structure, handling irregular dimensions"""
+    @staticmethod
+    def _scan_shape(lst, max_rank=None):
+        """Maximal shape of a nested list and whether it is already rectangular, in one traversal.
+
+        The nested list is walked level by level: the size of each axis is the longest list at
+        that depth, and the tensor is rectangular if every list at a depth has that length and
+        lists and non-lists are not mixed at a depth. Levels below max_rank are leaves.
+
+        Returns:
+            (shape, rectangular)
+        """
         shape = []
-        current = lst
-        while isinstance(current, list):
-            if not current:  # Handle empty lists
-                shape.append(0)
+        rectangular = True
+        level = [lst]
+        while level:
+            size = max(len(node) for node in level)
+            shape.append(size)
+            if rectangular and any(len(node) != size for node in level):
+                rectangular = False
+            if max_rank is not None and len(shape) == max_rank:
                 break
-            # Handle mixed list and non-list elements
-            max_len = 0
-            for sublist in current:
-                if isinstance(sublist, list):
-                    max_len = max(max_len, len(sublist))
-                else:
-                    max_len = max(max_len, 1)  # Count non-list elements as length 1
-            shape.append(max_len)
-            # Find first list element to continue traversal
-            for elem in current:
-                if isinstance(elem, list):
-                    current = elem
-                    break
-            else:
-                break  # No more list elements found
-        return tuple(shape)
+            next_level = []
+            leaves = 0
+            for node in level:
+                for item in node:
+                    if isinstance(item, list):
+                        next_level.append(item)
+                    else:
+                        leaves += 1
+            if next_level and leaves:
+                rectangular = False
+            level = next_level
+        return tuple(shape), rectangular
+
+    def _compute_shape(self, lst):
+        """Calculate tensor shape from nested list structure, handling irregular dimensions"""
+        return self._scan_shape(lst)[0]
+
+    def _copy_leaves(self, data, rank):
+        """Copy of a rectangular nested list of the given rank, with interned leaves"""
+        if rank == 1:
+            intern = self.value_table.intern
+            return [intern(item) for item in data]
+        return [self._copy_leaves(node, rank - 1) for node in data]
 
     def _validate_shape(self, lst, expected_shape):
         """Verify dimensions throughout the tensor, allowing for irregular structures"""
@@ -156,7 +247,20 @@ class Reference:
         indices = []
         for axis in self.axes:
             indices.append(kwargs.get(axis, slice(None)))
-        self._set_element(self.data, indices, value)
+        self._set_element(self.data, indices, self.value_table.intern(value))
+
+    def codes(self):
+        """Nested list of the value-table codes of the leaves (-1 for skip values and unhashable leaves)"""
+        def encode(data, depth):
+            if depth == len(self.shape):
+                if data == self.skip_value:
+                    return -1
+                code = self.value_table.encode(data)
+                return -1 if code is None else code
+            if not isinstance(data, list):
+                return [encode(data, depth + 1) for _ in range(self.shape[depth])]
+            return [encode(item, depth + 1) for item in data]
+        return encode(self.data, 0)
 
     def _set_element(self, data, indices, value):
         """Set element(s) in the tensor, handling skip values"""
@@ -229,20 +333,104 @@ class Reference:
             shape=new_shape,
             initial_value=None,
             skip_value="@#SKIP#@"
-        )._replace_data(sliced_data)
+        )._replace_data(sliced_data, trusted_shape=True)
 
-    def _replace_data(self, new_data):
-        """Private method to directly set data (bypassing normal initialization)"""
-        # Ensure the new data is properly padded
-        padded_data = self._pad_tensor(new_data, self.shape)
-        self.data = padded_data
+    def save(self, path):
+        """Save to path in the binary reference format (see _reference_io)"""
+        from normalign_stereotype.core._reference_io import save_reference
+        save_reference(self, path)
+
+    @staticmethod
+    def load(path, lazy=False):
+        """Load a Reference saved with save(); lazy=True returns a memory-mapped MappedReference"""
+        from normalign_stereotype.core._reference_io import load_reference
+        return load_reference(path, lazy=lazy)
+
+    def _replace_data(self, new_data, trusted_shape=False):
+        """Private method to directly set data (bypassing normal initialization)
+
+        Args:
+            new_data: Nested list of the leaves, copied (and padded to self.shape if irregular)
+            trusted_shape: The caller guarantees new_data is already rectangular with
+                self.shape and interned leaves, and hands it over: it is used without a copy
+        """
+        if trusted_shape:
+            self.data = new_data
+            return self
+        if not self.shape:
+            self.data = self.value_table.intern(new_data)
+            return self
+        shape, rectangular = self._scan_shape(new_data, len(self.shape)) if isinstance(new_data, list) else ((), False)
+        if rectangular and shape == tuple(self.shape):
+            # Already regular: copy without the padding checks
+            self.data = self._copy_leaves(new_data, len(shape))
+        else:
+            self.data = self._pad_tensor(new_data, self.shape)
         return self
 
 
+def _is_lazy(ref):
+    return getattr(ref, "is_lazy_reference", False)
+
+
+def _is_sparse(ref):
+    return getattr(ref, "is_sparse_reference", False)
+
+
+def _is_ragged(ref):
+    return getattr(ref, "is_ragged_reference", False)
+
+
+def _leaf_getter(ref):
+    """Function from a full index (dict over at least ref's axes) to the leaf of ref there"""
+    if not isinstance(ref, Reference):
+        return ref._leaf  # Lazy, sparse and ragged references
+
+    def dense_leaf(index):
+        data = ref.data
+        for axis in ref.axes:
+            i = index[axis]
+            if not isinstance(data, list) or i >= len(data):
+                return "@#SKIP#@"
+            data = data[i]
+            if data == ref.skip_value:
+                return "@#SKIP#@"
+        return data
+    return dense_leaf
+
+
+def _map_cells(call, cells, executor=None):
+    """call on every cell, in order; with an executor the calls run in its threads, each in a
+    copy of the caller's context (so token and result scopes still apply)"""
+    if executor is None:
+        return [call(cell) for cell in cells]
+    futures = [executor.submit(contextvars.copy_context().run, call, cell) for cell in cells]
+    return [future.result() for future in futures]
+
+
+def _cache_if_broadcast(ref, combined_axes):
+    """Lazy inputs broadcast along extra axes keep their leaves so they are computed once"""
+    if _is_lazy(ref) and len(ref.axes) < len(combined_axes):
+        ref.cache_leaves()
+
+
 def cross_product(references):
     if not references:
         raise ValueError("At least one reference must be provided")
 
+    # Sparse inputs restrict the result to the cells they all have
+    if any(_is_sparse(ref) for ref in references):
+        from normalign_stereotype.core._sparse_reference import SparseReference
+        return SparseReference.cross_product(references)
+
+    if any(_is_ragged(ref) for ref in references):
+        from normalign_stereotype.core._ragged_reference import RaggedReference
+        return RaggedReference.cross_product(references)
+
+    if any(_is_lazy(ref) for ref in references):
+        from normalign_stereotype.core._lazy_reference import LazyReference
+        return LazyReference.cross_product(references)
+
     for ref in references:
         if not isinstance(ref, Reference):
             raise TypeError("All elements must be Reference instances")
@@ -266,19 +454,16 @@ def cross_product(references):
     combined_axes = axis_order
     combined_shape = tuple(axis_shapes[axis] for axis in combined_axes)
 
+    getters = [_leaf_getter(ref) for ref in references]
+
     # Build the nested data structure
     def build_data(current_axes, index_dict):
         if not current_axes:
-            # Collect elements from all references
-            elements = []
-            for ref in references:
-                # Get relevant indices for this reference
-                ref_indices = {axis: index_dict[axis] for axis in ref.axes}
-                element = ref.get(**ref_indices)
-                elements.append(element)
-            
+            # Collect elements from all references (the leaves themselves, not copies)
+            elements = [get(index_dict) for get in getters]
+
             # If any element is a skip value, return skip value for the entire sub-tensor
-            if any(e == ref.skip_value for e, ref in zip(elements, references)):
+            if any(e == "@#SKIP#@" for e in elements):
                 return "@#SKIP#@"
             return elements
         else:
@@ -296,14 +481,36 @@ def cross_product(references):
         shape=combined_shape,
         initial_value=None,
         skip_value="@#SKIP#@"
-    )._replace_data(new_data)
+    )._replace_data(new_data, trusted_shape=True)
 
 
-def cross_action(A, B, new_axis_name):
-    # Validate inputs
-    if not isinstance(A, Reference) or not isinstance(B, Reference):
+def cross_action(A, B, new_axis_name, ragged=False, executor=None):
+    """Apply each function of A to the aligned input of B; every call returns the items of
+    its cell along the new axis.
+
+    Args:
+        A: Reference of functions
+        B: Reference of inputs
+        new_axis_name: Axis of the returned items
+        ragged: Return a RaggedReference, keeping only each cell's own items
+        executor: Optional concurrent.futures executor running the calls concurrently
+            (e.g. LLM calls, whose number in flight the agent's concurrency limiter bounds)
+    """
+    # Validate inputs (lazy references are evaluated leaf by leaf)
+    if not all(isinstance(ref, Reference) or _is_lazy(ref) or _is_sparse(ref) or _is_ragged(ref)
+               for ref in (A, B)):
         raise TypeError("Both A and B must be Reference instances")
 
+    if _is_sparse(A) or _is_sparse(B) or ragged:
+        _cache_if_broadcast(A, list(dict.fromkeys(A.axes + B.axes)))
+        _cache_if_broadcast(B, list(dict.fromkeys(A.axes + B.axes)))
+        if _is_sparse(A) or _is_sparse(B):
+            from normalign_stereotype.core._sparse_reference import SparseReference
+            return SparseReference.cross_action(A, B, new_axis_name, executor=executor)
+        # Each cell keeps the items its function returned, without padding to the longest result
+        from normalign_stereotype.core._ragged_reference import RaggedReference
+        return RaggedReference.cross_action(A, B, new_axis_name, executor=executor)
+
     # Combine axes from A and B
     combined_axes = list(A.axes)  # Start with axes from A
     for axis in B.axes:
@@ -326,30 +533,50 @@ def cross_action(A, B, new_axis_name):
             # Axis only in B
             combined_shape.append(B.shape[B.axes.index(axis)])
 
+    _cache_if_broadcast(A, combined_axes)
+    _cache_if_broadcast(B, combined_axes)
+
+    def prepare_cell(index_dict):
+        # Retrieve the function from A and the input from B (None for a skipped cell)
+        a_indices = {axis: index_dict[axis] for axis in A.axes}
+        b_indices = {axis: index_dict[axis] for axis in B.axes}
+        func = A.get(**a_indices)
+        input_val = B.get(**b_indices)
+
+        if func == A.skip_value or input_val == B.skip_value:
+            return None
+
+        if not callable(func):
+            raise TypeError(f"Element at {a_indices} in A is not a callable function")
+        return a_indices, func, input_val
+
+    def call_cell(cell):
+        if cell is None:
+            return "@#SKIP#@"
+        a_indices, func, input_val = cell
+        try:
+            result = func(input_val)
+            if not isinstance(result, list):
+                raise TypeError(f"Function at {a_indices} in A must return a list")
+            # If any element in the result is a skip value, return skip value for the entire result
+            if any(r == "@#SKIP#@" for r in result):
+                return "@#SKIP#@"
+            return result
+        except Exception:
+            return "@#SKIP#@"
+
+    if executor is not None:
+        # All the calls are submitted at once, then placed in row-major order
+        cells = [prepare_cell(dict(zip(combined_axes, index)))
+                 for index in itertools.product(*(range(size) for size in combined_shape))]
+        results = iter(_map_cells(call_cell, cells, executor))
+
     # Build the new data structure
     def build_data(current_axes, index_dict):
         if not current_axes:
-            # Retrieve the function from A and the input from B
-            a_indices = {axis: index_dict[axis] for axis in A.axes}
-            b_indices = {axis: index_dict[axis] for axis in B.axes}
-            func = A.get(**a_indices)
-            input_val = B.get(**b_indices)
-            
-            if func == A.skip_value or input_val == B.skip_value:
-                return "@#SKIP#@"
-                
-            if not callable(func):
-                raise TypeError(f"Element at {a_indices} in A is not a callable function")
-            try:
-                result = func(input_val)
-                if not isinstance(result, list):
-                    raise TypeError(f"Function at {a_indices} in A must return a list")
-                # If any element in the result is a skip value, return skip value for the entire result
-                if any(r == "@#SKIP#@" for r in result):
-                    return "@#SKIP#@"
-                return result
-            except Exception:
-                return "@#SKIP#@"
+            if executor is not None:
+                return next(results)
+            return call_cell(prepare_cell(index_dict))
         else:
             axis = current_axes[0]
             axis_size = combined_shape[len(index_dict)]
@@ -360,12 +587,14 @@ def cross_action(A, B, new_axis_name):
 
     # Create the new Reference
     new_axes = combined_axes + [new_axis_name]
-    retrieved_entry = new_data
-    for i in range(len(combined_shape)):
-        if not retrieved_entry:
-            break
-        retrieved_entry = retrieved_entry[0]
-    new_shape = combined_shape + [len(retrieved_entry) if retrieved_entry else 0]  # New axis size
+
+    # New axis size: the longest result (shorter ones are padded with skip values)
+    def longest(data, depth):
+        if depth == len(combined_shape):
+            return len(data) if isinstance(data, list) else 0
+        return max((longest(item, depth + 1) for item in data), default=0)
+
+    new_shape = combined_shape + [longest(new_data, 0)]
     result_ref = Reference(new_axes, new_shape, None, skip_value="@#SKIP#@")
     result_ref._replace_data(new_data)
     return result_ref
@@ -385,6 +614,20 @@ def element_action(f, references):
     # Validate inputs
     if not references:
         raise ValueError("At least one reference must be provided")
+
+    if any(_is_sparse(ref) for ref in references):
+        from normalign_stereotype.core._sparse_reference import SparseReference
+        return SparseReference.element_action(f, references)
+
+    if any(_is_ragged(ref) for ref in references):
+        from normalign_stereotype.core._ragged_reference import RaggedReference
+        return RaggedReference.element_action(f, references)
+
+    # Element-wise steps on lazy references are recorded and fused instead of evaluated
+    if any(_is_lazy(ref) for ref in references):
+        from normalign_stereotype.core._lazy_reference import LazyReference
+        return LazyReference.element_action(f, references)
+
     for ref in references:
         if not isinstance(ref, Reference):
             raise TypeError("All elements must be Reference instances")
@@ -412,26 +655,20 @@ def element_action(f, references):
 
     # Compute combined shape
     combined_shape = [axis_sizes[axis] for axis in combined_axes]
+    value_table = ValueTable()
+    getters = [_leaf_getter(ref) for ref in references]
 
     # Build the nested data structure
     def build_data(current_axes, index_dict):
         if not current_axes:
             # Collect elements from all references
-            elements = []
-            for ref in references:
-                # Get relevant indices for this reference
-                ref_indices = {axis: index_dict[axis] for axis in ref.axes}
-                element = ref.get(**ref_indices)
-                if element != ref.skip_value:
-                    elements.append(element)
-                else:
-                    elements.append("@#SKIP#@")
-            
+            elements = [get(index_dict) for get in getters]
+
             # Apply function to collected elements
             try:
                 if any(e == "@#SKIP#@" for e in elements):
                     return "@#SKIP#@"
-                return f(*elements)
+                return value_table.intern(f(*elements))
             except Exception:
                 return "@#SKIP#@"
         else:
@@ -448,8 +685,9 @@ def element_action(f, references):
         axes=combined_axes,
         shape=combined_shape,
         initial_value=None,
-        skip_value="@#SKIP#@"
-    )._replace_data(new_data)
+        skip_value="@#SKIP#@",
+        value_table=value_table
+    )._replace_data(new_data, trusted_shape=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,302 @@
+import json
+import mmap
+import struct
+from typing import Any, Dict, List
+
+from normalign_stereotype.core._reference import Reference
+
+
+# File layout (all integers little-endian, every section aligned to 8 bytes):
+#
+#   magic            8 bytes   b"NRREF\x00\x01\x00"
+#   header length    uint32
+#   header           JSON: axes, shape, skip_value, counts and section offsets
+#   skip mask        1 bit per cell (row-major), set when the cell is skipped
+#   cell codes       uint32 per cell, index into the value table
+#   value offsets    uint64 per value + 1 end offset, relative to the blob
+#   value kinds      uint8 per value: 0 = utf-8 string, 1 = JSON-encoded value
+#   value blob       concatenated encoded values
+#
+# Values are deduplicated, so identical leaves repeated along broadcast axes are stored once.
+
+MAGIC = b"NRREF\x00\x01\x00"
+KIND_STR = 0
+KIND_JSON = 1
+
+
+def _align(n, alignment=8):
+    return (n + alignment - 1) // alignment * alignment
+
+
+def _iter_cells(data, shape, skip_value):
+    """Yield leaves in row-major order. Non-list entries above leaf depth (padding skips) skip the whole block."""
+    if not shape:
+        yield data
+        return
+    size = shape[0]
+    sub_cells = 1
+    for dim in shape[1:]:
+        sub_cells *= dim
+    for i in range(size):
+        if isinstance(data, list) and i < len(data):
+            child = data[i]
+            if len(shape) == 1 or isinstance(child, list):
+                yield from _iter_cells(child, shape[1:], skip_value)
+                continue
+        for _ in range(sub_cells):
+            yield skip_value
+
+
+def _encode_value(value):
+    if isinstance(value, str):
+        return KIND_STR, value.encode("utf-8")
+    if callable(value):
+        raise TypeError(f"Cannot serialize callable leaf {value!r}")
+    try:
+        return KIND_JSON, json.dumps(value, ensure_ascii=False).encode("utf-8")
+    except TypeError as e:
+        raise TypeError(f"Cannot serialize leaf {value!r}: {e}")
+
+
+def save_reference(reference: Reference, path: str) -> None:
+    """Write a Reference to path in the binary reference format.
+
+    Args:
+        reference: The Reference to save; leaves must be strings or JSON-serializable values
+        path: Destination file path
+    """
+    shape = tuple(reference.shape)
+    skip_value = reference.skip_value
+    n_cells = 1
+    for dim in shape:
+        n_cells *= dim
+
+    skip_mask = bytearray((n_cells + 7) // 8)
+    codes = []
+    value_ids: Dict[tuple, int] = {}
+    value_kinds = bytearray()
+    value_offsets = [0]
+    blob = bytearray()
+
+    for i, cell in enumerate(_iter_cells(reference.data, shape, skip_value)):
+        if isinstance(cell, str) and cell == skip_value:
+            skip_mask[i >> 3] |= 1 << (i & 7)
+            codes.append(0)
+            continue
+        kind, encoded = _encode_value(cell)
+        key = (kind, encoded)
+        code = value_ids.get(key)
+        if code is None:
+            code = len(value_kinds)
+            value_ids[key] = code
+            value_kinds.append(kind)
+            blob += encoded
+            value_offsets.append(len(blob))
+        codes.append(code)
+
+    n_values = len(value_kinds)
+    header = {
+        "axes": list(reference.axes),
+        "shape": list(shape),
+        "skip_value": skip_value,
+        "n_cells": n_cells,
+        "n_values": n_values,
+    }
+
+    # Section offsets depend on the header size, which depends on the offsets: settle with a fixed point
+    sections = {}
+    for _ in range(3):
+        header_bytes = json.dumps({**header, "sections": sections}).encode("utf-8")
+        position = _align(len(MAGIC) + 4 + len(header_bytes))
+        new_sections = {}
+        for name, size in (("skip_mask", len(skip_mask)), ("codes", 4 * n_cells),
+                           ("value_offsets", 8 * (n_values + 1)), ("value_kinds", n_values),
+                           ("blob", len(blob))):
+            new_sections[name] = position
+            position = _align(position + size)
+        if new_sections == sections:
+            break
+        sections = new_sections
+    header_bytes = json.dumps({**header, "sections": sections}).encode("utf-8")
+
+    with open(path, "wb") as f:
+        def write_section(name, payload):
+            f.write(b"\x00" * (sections[name] - f.tell()))
+            f.write(payload)
+
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        write_section("skip_mask", bytes(skip_mask))
+        write_section("codes", struct.pack(f"<{n_cells}I", *codes))
+        write_section("value_offsets", struct.pack(f"<{n_values + 1}Q", *value_offsets))
+        write_section("value_kinds", bytes(value_kinds))
+        write_section("blob", bytes(blob))
+
+
+class MappedReference:
+    """Read-only, memory-mapped view of a saved Reference.
+
+    Only the header is parsed when the file is opened; cells and values are decoded
+    on access, so large saved outputs can be inspected and sliced without reading
+    the whole file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            self._file.close()
+            raise ValueError(f"{path} is not a reference file")
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a reference file")
+
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mm[start:start + header_len].decode("utf-8"))
+
+        self.axes: List[str] = header["axes"]
+        self.shape: tuple = tuple(header["shape"])
+        self.skip_value: str = header["skip_value"]
+        self.n_cells: int = header["n_cells"]
+        self.n_values: int = header["n_values"]
+        self._sections: Dict[str, int] = header["sections"]
+        self._value_cache: Dict[int, Any] = {}
+
+        self._strides = []
+        stride = 1
+        for dim in reversed(self.shape):
+            self._strides.insert(0, stride)
+            stride *= dim
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __repr__(self):
+        return f"MappedReference(path={self.path!r}, axes={self.axes}, shape={self.shape})"
+
+    def _is_skipped(self, cell_index):
+        byte = self._mm[self._sections["skip_mask"] + (cell_index >> 3)]
+        return bool(byte & (1 << (cell_index & 7)))
+
+    def _value(self, code):
+        if code in self._value_cache:
+            return self._value_cache[code]
+        start, end = struct.unpack_from("<QQ", self._mm, self._sections["value_offsets"] + 8 * code)
+        kind = self._mm[self._sections["value_kinds"] + code]
+        blob = self._sections["blob"]
+        raw = self._mm[blob + start:blob + end].decode("utf-8")
+        value = raw if kind == KIND_STR else json.loads(raw)
+        self._value_cache[code] = value
+        return value
+
+    def cell(self, *indices):
+        """Decode a single leaf given one index per axis"""
+        if len(indices) != len(self.shape):
+            raise ValueError(f"Expected {len(self.shape)} indices, got {len(indices)}")
+        cell_index = 0
+        for axis, (index, dim, stride) in enumerate(zip(indices, self.shape, self._strides)):
+            if not 0 <= index < dim:
+                raise IndexError(f"Index {index} out of range for axis '{self.axes[axis]}' of size {dim}")
+            cell_index += index * stride
+        if self._is_skipped(cell_index):
+            return self.skip_value
+        (code,) = struct.unpack_from("<I", self._mm, self._sections["codes"] + 4 * cell_index)
+        return self._value(code)
+
+    def _resolve(self, selection):
+        for key in selection:
+            if key not in self.axes:
+                raise KeyError(f"Axis '{key}' not found in {self.axes}")
+        ranges = []
+        for axis, dim in zip(self.axes, self.shape):
+            index = selection.get(axis, slice(None))
+            if isinstance(index, slice):
+                ranges.append(list(range(*index.indices(dim))))
+            elif isinstance(index, (list, tuple, range)):
+                ranges.append(list(index))
+            else:
+                ranges.append(index)
+        return ranges
+
+    def _build(self, ranges, prefix):
+        if len(prefix) == len(ranges):
+            return self.cell(*prefix)
+        current = ranges[len(prefix)]
+        if isinstance(current, list):
+            return [self._build(ranges, prefix + [i]) for i in current]
+        return self._build(ranges, prefix + [current])
+
+    def get(self, **kwargs):
+        """Get element(s) like Reference.get: integer indices drop an axis, missing axes keep it whole"""
+        return self._build(self._resolve(kwargs), [])
+
+    def select(self, **kwargs) -> Reference:
+        """Materialize a sub-block as a Reference keeping every axis.
+
+        Each keyword maps an axis to an integer, a slice or a list of indices.
+        """
+        ranges = [r if isinstance(r, list) else [r] for r in self._resolve(kwargs)]
+        new_shape = tuple(len(r) for r in ranges)
+        return Reference(
+            axes=list(self.axes),
+            shape=new_shape,
+            initial_value=None,
+            skip_value=self.skip_value
+        )._replace_data(self._build(ranges, []))
+
+    def to_reference(self) -> Reference:
+        """Materialize the whole file as a Reference"""
+        codes = struct.unpack_from(f"<{self.n_cells}I", self._mm, self._sections["codes"])
+        mask = self._mm[self._sections["skip_mask"]:self._sections["skip_mask"] + (self.n_cells + 7) // 8]
+        cells = [
+            self.skip_value if mask[i >> 3] & (1 << (i & 7)) else self._value(code)
+            for i, code in enumerate(codes)
+        ]
+
+        def nest(offset, depth):
+            if depth == len(self.shape):
+                return cells[offset]
+            stride = self._strides[depth]
+            return [nest(offset + i * stride, depth + 1) for i in range(self.shape[depth])]
+
+        data = nest(0, 0) if self.shape else (cells[0] if cells else None)
+        return Reference(
+            axes=list(self.axes),
+            shape=self.shape,
+            initial_value=None,
+            skip_value=self.skip_value
+        )._replace_data(data)
+
+
+def load_reference(path: str, lazy: bool = False):
+    """Load a Reference saved with save_reference.
+
+    Args:
+        path: Path to the saved reference
+        lazy: If True return a MappedReference that decodes cells on access,
+            otherwise read everything into a Reference
+
+    Returns:
+        A Reference, or a MappedReference when lazy is True
+    """
+    mapped = MappedReference(path)
+    if lazy:
+        return mapped
+    try:
+        return mapped.to_reference()
+    finally:
+        mapped.close()
@@ -0,0 +1,148 @@
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Statement (and any other tag) the results recorded in the current context belong to
+_current_scope = contextvars.ContextVar("result_store_scope", default={})
+
+_COLUMNS = ("run", "model", "statement", "concept", "key", "explanation")
+
+
+def new_run_id() -> str:
+    """Sortable, unique id of a run: its start time and a random suffix"""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class ResultStore:
+    """Append-only store of the outputs of plan runs, one row per (run, statement, concept, key).
+
+    Agent.cognition appends the (key, explanation) bullets of every concept it processes,
+    tagged with the store's run and model and the statement of the current scope (see
+    scope and Plan.execute). Rows are kept in an SQLite table clustered on (concept, model,
+    run, statement, key), so reading every output of one concept for one model is a range
+    scan over those rows only, and a second index serves per-run reviews.
+
+    Args:
+        path: The database file (created if missing)
+        run: Id of this run (default: new_run_id())
+        model: Model name recorded with every row
+        timeout: Seconds to wait for a lock held by another connection
+    """
+
+    def __init__(self, path: str, run: Optional[str] = None, model: Optional[str] = None, timeout: float = 30.0):
+        self.path = path
+        self.run = run or new_run_id()
+        self.model = model
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._connect()
+
+    def _connect(self):
+        self._pid = os.getpid()
+        self._conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "concept TEXT NOT NULL, model TEXT NOT NULL, run TEXT NOT NULL, statement TEXT NOT NULL, "
+                "key TEXT NOT NULL, explanation TEXT, "
+                "PRIMARY KEY (concept, model, run, statement, key)) WITHOUT ROWID"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_by_run ON results (run, statement)")
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # The connection belongs to the parent process: open our own
+            self._lock = threading.Lock()
+            self._connect()
+
+    def __getstate__(self):
+        # Connections cannot be pickled; workers reopen the database
+        return {"path": self.path, "run": self.run, "model": self.model, "timeout": self.timeout}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._connect()
+
+    @staticmethod
+    @contextmanager
+    def scope(**tags):
+        """Tag the results appended inside the block, e.g. scope(statement=...)"""
+        token = _current_scope.set({**_current_scope.get(), **tags})
+        try:
+            yield
+        finally:
+            _current_scope.reset(token)
+
+    @staticmethod
+    def current_statement() -> str:
+        statement = _current_scope.get().get("statement")
+        return "" if statement is None else str(statement)
+
+    def append(self, results: Iterable[Tuple[str, str, Any]], statement: Optional[str] = None):
+        """Record (concept, key, explanation) results of this run.
+
+        Args:
+            results: The results
+            statement: Statement they belong to (default: that of the current scope)
+        """
+        statement = self.current_statement() if statement is None else statement
+        rows = [(str(concept), self.model or "", self.run, statement, str(key),
+                 explanation if isinstance(explanation, str) else json.dumps(explanation))
+                for concept, key, explanation in results]
+        if not rows:
+            return
+        self._check_fork()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO results (concept, model, run, statement, key, explanation) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def query(self, concept: Optional[str] = None, model: Optional[str] = None, run: Optional[str] = None,
+              statement: Optional[str] = None) -> List[Dict[str, str]]:
+        """Rows matching every given field, as dicts with the keys run, model, statement, concept, key, explanation"""
+        filters = {"concept": concept, "model": model, "run": run, "statement": statement}
+        clauses = [f"{column} = ?" for column, value in filters.items() if value is not None]
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        self._check_fork()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM results{where}",
+                [value for value in filters.values() if value is not None],
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def runs(self) -> List[Tuple[str, str]]:
+        """(run, model) of every run in the store, oldest first"""
+        self._check_fork()
+        with self._lock:
+            return self._conn.execute("SELECT DISTINCT run, model FROM results ORDER BY run").fetchall()
+
+    def to_dict(self, statement: str, run: Optional[str] = None) -> Dict[str, str]:
+        """Results of one statement in the legacy memory JSON format ("key (concept)" -> explanation)"""
+        from normalign_stereotype.core._memory import memory_key
+        return {memory_key(row["key"], row["concept"]): row["explanation"]
+                for row in self.query(run=run or self.run, statement=statement)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_body_result_store(body: Dict[str, Any]) -> Optional[ResultStore]:
+    """The result store of an Agent body: body['result_store'] is a ResultStore or a database path
+    (then opened with body['result_run'] and the model of body['llm']); None if absent"""
+    store = body.get("result_store")
+    if store is None or isinstance(store, ResultStore):
+        return store
+    return ResultStore(store, run=body.get("result_run"), model=getattr(body.get("llm"), "model", None))
@@ -0,0 +1,328 @@
+import itertools
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from normalign_stereotype.core._reference import Reference, ValueTable, _leaf_getter, _map_cells
+
+
+SKIP = "@#SKIP#@"
+# Largest fraction of present cells at which sparsify converts a reference
+SPARSE_DENSITY = 0.25
+
+
+def _is_sparse(ref):
+    return getattr(ref, "is_sparse_reference", False)
+
+
+def _combine_axes(references, op_name):
+    """Union of axes in order of first occurrence, validating that shared axes have the same size"""
+    axes: List[str] = []
+    sizes: Dict[str, int] = {}
+    for ref in references:
+        for axis, size in zip(ref.axes, ref.shape):
+            if axis not in sizes:
+                axes.append(axis)
+                sizes[axis] = size
+            elif sizes[axis] != size:
+                if op_name == "element_action":
+                    raise ValueError(f"Shape mismatch for axis '{axis}'")
+                raise ValueError(f"Shape mismatch for axis '{axis}': {size} vs {sizes[axis]}")
+    return axes, tuple(sizes[axis] for axis in axes)
+
+
+def _support(references, axes, shape) -> Iterator[Dict[str, int]]:
+    """Indices of the combined axes where every sparse input has a cell.
+
+    The coordinates of the sparse inputs are hash-joined on their shared axes, so only
+    cells present in all of them are visited; axes that no sparse input covers are
+    enumerated in full (the dense inputs are looked up leaf by leaf afterwards).
+    """
+    rows: List[Dict[str, int]] = [{}]
+    bound: List[str] = []
+    for ref in references:
+        if not _is_sparse(ref):
+            continue
+        shared = [axis for axis in ref.axes if axis in bound]
+        positions = [ref.axes.index(axis) for axis in shared]
+        by_shared = defaultdict(list)
+        for coord in ref.cells:
+            by_shared[tuple(coord[p] for p in positions)].append(coord)
+        rows = [{**row, **dict(zip(ref.axes, coord))}
+                for row in rows
+                for coord in by_shared.get(tuple(row[axis] for axis in shared), ())]
+        bound.extend(axis for axis in ref.axes if axis not in bound)
+        if not rows:
+            return
+
+    free = [(axis, size) for axis, size in zip(axes, shape) if axis not in bound]
+    for row in rows:
+        for free_index in itertools.product(*(range(size) for _, size in free)):
+            yield {**row, **{axis: i for (axis, _), i in zip(free, free_index)}}
+
+
+class SparseReference:
+    """Reference storing only its present cells.
+
+    Cells are kept in a dict from coordinates (a tuple of indices in axes order) to leaves;
+    a missing coordinate is a skip value. element_action, cross_product and cross_action on
+    sparse inputs (see the functions of _reference) visit only the coordinates present in
+    every sparse input, so skipped branches are never looked up or computed, and their
+    results are sparse as well.
+
+    Args:
+        axes: Axis names
+        shape: Size of each axis
+        cells: Optional mapping from coordinates to leaves (skip values are dropped)
+        skip_value: Value returned for missing cells
+        value_table: ValueTable of the leaves (default: a new one)
+    """
+
+    is_sparse_reference = True
+
+    def __init__(self, axes, shape, cells: Optional[Dict[Tuple[int, ...], Any]] = None,
+                 skip_value: str = SKIP, value_table: Optional[ValueTable] = None):
+        if len(axes) != len(shape):
+            raise ValueError("Axes and shape must have the same length")
+        self.axes: List[str] = list(axes)
+        self.shape: Tuple[int, ...] = tuple(shape)
+        self.skip_value: str = skip_value
+        self.value_table: ValueTable = value_table if value_table is not None else ValueTable()
+        self.cells: Dict[Tuple[int, ...], Any] = {}
+        for coord, value in (cells or {}).items():
+            self._put(tuple(coord), value)
+
+    def _put(self, coord, value):
+        if len(coord) != len(self.axes) or any(not 0 <= i < size for i, size in zip(coord, self.shape)):
+            raise IndexError(f"Coordinate {coord} out of range for shape {self.shape}")
+        if value == self.skip_value or value == SKIP:
+            self.cells.pop(coord, None)
+        else:
+            self.cells[coord] = self.value_table.intern(value)
+
+    # -- conversion -------------------------------------------------------------------------
+
+    @staticmethod
+    def from_reference(reference) -> "SparseReference":
+        """Sparse copy of a Reference (lazy references are materialized first)"""
+        if _is_sparse(reference):
+            return reference
+        if getattr(reference, "is_lazy_reference", False):
+            reference = reference.materialize()
+        if getattr(reference, "is_ragged_reference", False):
+            reference = reference.to_dense()
+        if not isinstance(reference, Reference):
+            raise TypeError("Expected a Reference instance")
+
+        sparse = SparseReference(reference.axes, reference.shape, skip_value=SKIP,
+                                 value_table=reference.value_table)
+
+        def collect(data, coord):
+            if data == reference.skip_value:
+                return
+            if len(coord) == len(reference.axes):
+                sparse.cells[coord] = data
+                return
+            if isinstance(data, list):
+                for i, item in enumerate(data[:reference.shape[len(coord)]]):
+                    collect(item, coord + (i,))
+
+        collect(reference.data, ())
+        return sparse
+
+    def to_dense(self) -> Reference:
+        """Equivalent Reference with nested-list data"""
+        dense = Reference(self.axes, self.shape, initial_value=self.skip_value,
+                          skip_value=self.skip_value, value_table=self.value_table)
+        for coord, value in self.cells.items():
+            data = dense.data
+            for i in coord[:-1]:
+                data = data[i]
+            if coord:
+                data[coord[-1]] = value
+            else:
+                dense.data = value
+        return dense
+
+    def materialize(self) -> "SparseReference":
+        return self
+
+    def _leaf(self, index: Dict[str, int]):
+        return self.cells.get(tuple(index[axis] for axis in self.axes), SKIP)
+
+    @property
+    def tensor(self):
+        """Nested-list view of the data (built on access)"""
+        return self.to_dense().data
+
+    @property
+    def density(self) -> float:
+        """Fraction of the cells that are present"""
+        total = 1
+        for size in self.shape:
+            total *= size
+        return len(self.cells) / total if total else 0.0
+
+    def __len__(self):
+        return len(self.cells)
+
+    # -- access -----------------------------------------------------------------------------
+
+    def get(self, **kwargs):
+        """Get element(s) like Reference.get"""
+        for key in kwargs:
+            if key not in self.axes:
+                raise KeyError(f"Axis '{key}' not found in {self.axes}")
+
+        def gather(depth, coord):
+            if depth == len(self.axes):
+                return self.cells.get(coord, self.skip_value)
+            current = kwargs.get(self.axes[depth], slice(None))
+            if isinstance(current, slice):
+                return [gather(depth + 1, coord + (i,))
+                        for i in range(*current.indices(self.shape[depth]))]
+            if current >= self.shape[depth]:
+                return self.skip_value
+            return gather(depth + 1, coord + (current,))
+
+        return gather(0, ())
+
+    def set(self, value, **kwargs):
+        """Set element(s) like Reference.set; setting the skip value removes the cells"""
+        for key in kwargs:
+            if key not in self.axes:
+                raise KeyError(f"Axis '{key}' not found in {self.axes}")
+        if isinstance(value, list):
+            raise ValueError("Cannot set a list as a leaf value")
+        ranges = []
+        for axis, size in zip(self.axes, self.shape):
+            current = kwargs.get(axis, slice(None))
+            ranges.append(range(*current.indices(size)) if isinstance(current, slice) else (current,))
+        for coord in itertools.product(*ranges):
+            self._put(coord, value)
+
+    def slice(self, *selected_axes) -> "SparseReference":
+        """Select and reorder axes like Reference.slice.
+
+        The leaves of the result are the sub-tensors over the dropped axes; with a single
+        dropped axis a sub-tensor missing any cell is skipped, as in the dense slice.
+        """
+        for axis in selected_axes:
+            if axis not in self.axes:
+                raise KeyError(f"Axis '{axis}' not found in {self.axes}")
+        if len(selected_axes) != len(set(selected_axes)):
+            raise ValueError("Duplicate axes in selection")
+        if not selected_axes:
+            raise ValueError("At least one axis must be selected")
+
+        positions = [self.axes.index(axis) for axis in selected_axes]
+        new_shape = tuple(self.shape[p] for p in positions)
+        result = SparseReference(list(selected_axes), new_shape, skip_value=SKIP)
+        dropped = [axis for axis in self.axes if axis not in selected_axes]
+
+        if not dropped:
+            for coord, value in self.cells.items():
+                if isinstance(value, list) and any(elem == self.skip_value for elem in value):
+                    continue
+                result.cells[tuple(coord[p] for p in positions)] = value
+            return result
+
+        if len(dropped) == 1:
+            # Only complete rows survive, so rows are grouped from the present cells
+            size = self.shape[self.axes.index(dropped[0])]
+            counts = defaultdict(int)
+            for coord in self.cells:
+                counts[tuple(coord[p] for p in positions)] += 1
+            for key, count in counts.items():
+                if count == size:
+                    result.cells[key] = self.get(**dict(zip(selected_axes, key)))
+            return result
+
+        # Deeper sub-tensors are nested lists, which are never skipped
+        for key in itertools.product(*(range(size) for size in new_shape)):
+            result.cells[key] = self.get(**dict(zip(selected_axes, key)))
+        return result
+
+    # -- operations -------------------------------------------------------------------------
+
+    @staticmethod
+    def element_action(f, references) -> "SparseReference":
+        axes, shape = _combine_axes(references, "element_action")
+        getters = [_leaf_getter(ref) for ref in references]
+        result = SparseReference(axes, shape, skip_value=SKIP)
+        for index in _support(references, axes, shape):
+            elements = [get(index) for get in getters]
+            if any(e == SKIP for e in elements):
+                continue
+            try:
+                value = f(*elements)
+            except Exception:
+                continue
+            if value != SKIP:
+                result.cells[tuple(index[axis] for axis in axes)] = result.value_table.intern(value)
+        return result
+
+    @staticmethod
+    def cross_product(references) -> "SparseReference":
+        axes, shape = _combine_axes(references, "cross_product")
+        getters = [_leaf_getter(ref) for ref in references]
+        result = SparseReference(axes, shape, skip_value=SKIP)
+        for index in _support(references, axes, shape):
+            elements = [get(index) for get in getters]
+            if any(e == SKIP for e in elements):
+                continue
+            result.cells[tuple(index[axis] for axis in axes)] = elements
+        return result
+
+    @staticmethod
+    def cross_action(A, B, new_axis_name, executor=None) -> "SparseReference":
+        axes, shape = _combine_axes([A, B], "cross_action")
+        get_func, get_input = _leaf_getter(A), _leaf_getter(B)
+        cells = []
+        for index in _support([A, B], axes, shape):
+            func = get_func(index)
+            input_val = get_input(index)
+            if func == SKIP or input_val == SKIP:
+                continue
+            if not callable(func):
+                raise TypeError(f"Element at {dict((axis, index[axis]) for axis in A.axes)} in A "
+                                f"is not a callable function")
+            cells.append((tuple(index[axis] for axis in axes), func, input_val))
+
+        def call(cell):
+            _, func, input_val = cell
+            try:
+                value = func(input_val)
+            except Exception:
+                return None
+            if not isinstance(value, list) or any(r == SKIP for r in value):
+                return None
+            return value
+
+        results = {}
+        for (coord, _, _), value in zip(cells, _map_cells(call, cells, executor)):
+            if value is not None:
+                results[coord] = value
+
+        # Results of different lengths are padded with skip values (missing cells)
+        new_size = max((len(value) for value in results.values()), default=0)
+        result = SparseReference(axes + [new_axis_name], shape + (new_size,), skip_value=SKIP)
+        for coord, value in results.items():
+            for k, item in enumerate(value):
+                result.cells[coord + (k,)] = result.value_table.intern(item)
+        return result
+
+    def __repr__(self):
+        return f"SparseReference(axes={self.axes}, shape={self.shape}, cells={len(self.cells)})"
+
+
+def sparse_reference(reference) -> SparseReference:
+    """Convert a Reference so that operations on it only visit its present cells"""
+    return SparseReference.from_reference(reference)
+
+
+def sparsify(reference, max_density: float = SPARSE_DENSITY):
+    """Sparse form of reference when at most max_density of its cells are present, else reference itself"""
+    if _is_sparse(reference):
+        return reference
+    sparse = SparseReference.from_reference(reference)
+    return sparse if sparse.density <= max_density else reference
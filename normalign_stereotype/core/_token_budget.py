@@ -0,0 +1,245 @@
+import re
+import math
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import Optional, Dict, List, Any
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_TRUNCATION_MARKER = " ...[truncated]... "
+
+_encoding_cache = {}
+
+# Scope of the LLM call currently being made: plan / inference / concept names.
+_current_scope = contextvars.ContextVar("token_budget_scope", default={})
+
+
+def _get_encoding(encoding_name):
+    # tiktoken is optional and only imported the first time an encoding is needed
+    if encoding_name not in _encoding_cache:
+        try:
+            import tiktoken
+            _encoding_cache[encoding_name] = tiktoken.get_encoding(encoding_name)
+        except Exception:
+            _encoding_cache[encoding_name] = None
+    return _encoding_cache[encoding_name]
+
+
+def estimate_tokens(text, encoding_name="cl100k_base") -> int:
+    """Estimate the number of tokens in text without calling the LLM provider.
+
+    Uses tiktoken when it is installed, otherwise falls back to a word/punctuation
+    count where long words are charged one token per four characters.
+
+    Args:
+        text: The text to estimate
+        encoding_name: The tiktoken encoding to use when available
+
+    Returns:
+        The estimated number of tokens
+    """
+    if not text:
+        return 0
+    text = str(text)
+    encoding = _get_encoding(encoding_name)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(max(1, math.ceil(len(piece) / 4)) for piece in _TOKEN_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text, max_tokens, keep="middle") -> str:
+    """Cut text down so that its estimated token count fits within max_tokens.
+
+    Args:
+        text: The text to truncate
+        max_tokens: The token budget for the returned text
+        keep: "head" keeps the beginning, "middle" keeps the beginning and the end
+            (dropping the middle), so that trailing ":Key" summaries survive
+
+    Returns:
+        The original text if it already fits, otherwise a truncated copy
+        marked with "...[truncated]..."
+    """
+    text = str(text)
+    if max_tokens is None or estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+
+    # Binary search on the number of characters to keep
+    low, high = 0, len(text)
+    best = ""
+    while low <= high:
+        mid = (low + high) // 2
+        if keep == "head":
+            candidate = text[:mid] + _TRUNCATION_MARKER
+        else:
+            head = mid // 2
+            tail = mid - head
+            candidate = text[:head] + _TRUNCATION_MARKER + (text[-tail:] if tail else "")
+        if estimate_tokens(candidate) <= max_tokens:
+            best = candidate
+            low = mid + 1
+        else:
+            high = mid - 1
+    return best
+
+
+summarization_prompt = """
+
+Summarize the following text so that it keeps every key fact, name and every ":Key" summary that appears in it.
+Keep the summary under {max_tokens} tokens.
+
+Text: "{input_value}"
+
+"""
+
+
+def fit_input_value(prompt_template, input_value, max_prompt_tokens, input_value_holder="{input_value}",
+                    policy="truncate", summarizer=None):
+    """Fit an {input_value} substitution into a prompt with a maximum token size.
+
+    Args:
+        prompt_template: The prompt that still contains the input value placeholder
+        input_value: The value to substitute into the placeholder
+        max_prompt_tokens: The maximum estimated size of the final prompt
+        input_value_holder: The placeholder string for the input value
+        policy: "truncate" to cut the value down, "summarize" to ask the summarizer LLM first
+        summarizer: An LLM with an invoke method, required for the "summarize" policy
+
+    Returns:
+        The input value, shortened if the prompt would otherwise exceed the limit
+
+    Raises:
+        ValueError: If the rest of the prompt alone does not fit within max_prompt_tokens
+    """
+    input_value = str(input_value)
+    if not max_prompt_tokens:
+        return input_value
+
+    occurrences = max(1, prompt_template.count(input_value_holder))
+    fixed_tokens = estimate_tokens(prompt_template.replace(input_value_holder, ""))
+    if fixed_tokens >= max_prompt_tokens:
+        raise ValueError(f"The prompt without its input value (~{fixed_tokens} tokens) already "
+                         f"reaches max_prompt_tokens={max_prompt_tokens}")
+    value_budget = (max_prompt_tokens - fixed_tokens) // occurrences
+    if estimate_tokens(input_value) <= value_budget:
+        return input_value
+
+    logging.warning(
+        f"Input value of ~{estimate_tokens(input_value)} tokens exceeds its budget of "
+        f"{value_budget} tokens; applying '{policy}' policy"
+    )
+
+    if policy == "summarize":
+        if summarizer is None:
+            raise ValueError("The 'summarize' policy requires a summarizer LLM")
+        prompt = (summarization_prompt.replace("{max_tokens}", str(max(value_budget, 1)))
+                  .replace("{input_value}", input_value))
+        input_value = summarizer.invoke(prompt)
+    elif policy != "truncate":
+        raise ValueError(f"Unknown input value policy: {policy}")
+
+    return truncate_to_tokens(input_value, value_budget)
+
+
+class TokenUsage:
+    """Running totals of tokens consumed by LLM calls."""
+
+    def __init__(self, prompt_tokens=0, completion_tokens=0, total_tokens=0, calls=0):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        self.total_tokens = total_tokens
+        self.calls = calls
+
+    def add(self, prompt_tokens=0, completion_tokens=0, total_tokens=None):
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.total_tokens += total_tokens if total_tokens is not None else prompt_tokens + completion_tokens
+        self.calls += 1
+        return self
+
+    def merge(self, other):
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.total_tokens += other.total_tokens
+        self.calls += other.calls
+        return self
+
+    def as_dict(self):
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "calls": self.calls,
+        }
+
+    def __repr__(self):
+        return f"TokenUsage({self.as_dict()})"
+
+
+class TokenLedger:
+    """Collects per-call token usage tagged with the plan, inference and concept being processed."""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def scope(self, **tags):
+        """Tag every usage recorded inside the block, e.g. scope(plan=..., inference=..., concept=...)"""
+        token = _current_scope.set({**_current_scope.get(), **tags})
+        try:
+            yield self
+        finally:
+            _current_scope.reset(token)
+
+    @staticmethod
+    def current_scope() -> Dict[str, Any]:
+        return dict(_current_scope.get())
+
+    def record(self, prompt_tokens=0, completion_tokens=0, total_tokens=None, model=None, estimated=False):
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+        entry = {
+            **self.current_scope(),
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens if total_tokens is not None else prompt_tokens + completion_tokens,
+            "estimated": estimated,
+        }
+        with self._lock:
+            self.records.append(entry)
+        return entry
+
+    def _aggregate(self, tag) -> Dict[Optional[str], TokenUsage]:
+        with self._lock:
+            records = list(self.records)
+        totals = defaultdict(TokenUsage)
+        for entry in records:
+            totals[entry.get(tag)].add(entry["prompt_tokens"], entry["completion_tokens"], entry["total_tokens"])
+        return dict(totals)
+
+    def by_concept(self):
+        return self._aggregate("concept")
+
+    def by_inference(self):
+        return self._aggregate("inference")
+
+    def by_plan(self):
+        return self._aggregate("plan")
+
+    def total(self) -> TokenUsage:
+        usage = TokenUsage()
+        for part in self._aggregate("plan").values():
+            usage.merge(part)
+        return usage
+
+    def reset(self):
+        with self._lock:
+            self.records = []
@@ -1,17 +1,27 @@
 from abc import ABC, abstractmethod
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
-import json
-import yaml
-import http.client
-from abc import ABC, abstractmethod
-from urllib.parse import urlparse
-from openai import AzureOpenAI
 import re
 import ast
-from typing import List
+from typing import Any, Dict, List
 import logging
+import time
+import threading
+from contextlib import nullcontext
+from normalign_stereotype.core._llm_cassette import cassette_from_env, request_key
+from normalign_stereotype.core._token_budget import TokenUsage, estimate_tokens
+from normalign_stereotype.core._llm_client import get_client_factory
+from normalign_stereotype.core._llm_router import LLMRouter
+
+# The OpenAI SDK and PyYAML are imported on first use, by the client factory, so that
+# importing the core modules stays cheap for code that never calls an LLM.
+
+
+_usage_lock = threading.Lock()
+
+
+def load_settings(settings_path) -> Dict[str, Any]:
+    """Read a YAML settings file through the process-wide client factory (parsed once per mtime)"""
+    return get_client_factory().settings(settings_path)
 
 
 class ConfiguredTool(ABC):
@@ -42,11 +52,22 @@ class LLMTool(ConfiguredTool):
           - settings_path: Path to the YAML settings file (default: 'settings.yaml')
           - model_name: The key within the YAML file for the desired model settings.
           - prompt_template: A template for the prompt that includes a placeholder '{input_data}'.
+          - client_factory: Optional LLMClientFactory (default: the process-wide factory)
+          - router / backends / routing: Optional LLMRouter, or backend settings and policy to build
+            one (see below), to spread requests over several endpoints
+          - limiter: Optional AdaptiveConcurrencyLimiter every call takes a slot from
+          - cassette: Optional LLMCassette recording every completion, or replaying recorded
+            ones instead of calling the model (default: from NORMALIGN_LLM_CASSETTE, see _llm_cassette)
 
         The YAML file should include keys such as:
           - DASHSCOPE_API_KEY (if not set in the environment variable)
           - BASE_URL (default: "https://dashscope.aliyuncs.com/compatible-mode/v1")
           - MODEL (e.g., "qwen-plus")
+          - MAX_PROMPT_TOKENS (optional, overridden by the 'max_prompt_tokens' parameter)
+
+        Instead of a single endpoint, a model may list BACKENDS (each with NAME, BASE_URL,
+        API_KEY, MODEL and optional WEIGHT) and a ROUTING policy ("weighted_round_robin" or
+        "least_outstanding"); requests are then routed across them with failover.
         """
         super().__init__(tool_id, parameters)
 
@@ -58,21 +79,39 @@ class LLMTool(ConfiguredTool):
         settings_path = self.parameters.get('settings_path', default_settings_path)
         model_name = self.parameters.get('model_name', model_name)
 
-        # Load settings from YAML.
-        with open(settings_path, 'r') as f:
-            settings = yaml.safe_load(f)
+        # Settings are parsed once per process and clients are shared, see LLMClientFactory.
+        self.client_factory = self.parameters.get('client_factory') or get_client_factory()
+        settings = self.client_factory.settings(settings_path)
         self.model_settings = settings.get(model_name, {})
 
+        # A model with several endpoints is served through a router
+        self.router = self.parameters.get('router')
+        backend_settings = self.parameters.get('backends', self.model_settings.get('BACKENDS'))
+        if self.router is None and backend_settings:
+            self.router = LLMRouter.from_settings(
+                backend_settings,
+                policy=self.parameters.get('routing', self.model_settings.get('ROUTING', 'weighted_round_robin')),
+                factory=self.client_factory,
+            )
+
+        # Optional AdaptiveConcurrencyLimiter bounding the calls in flight (shared by an Agent's tools)
+        self.limiter = self.parameters.get('limiter')
+
+        # Record/replay of completions; a replaying tool never calls the model
+        self.cassette = self.parameters.get('cassette')
+        if self.cassette is None:
+            self.cassette = cassette_from_env()
+
         # Retrieve API key from YAML or environment variable.
         self.api_key = self.model_settings.get('DASHSCOPE_API_KEY') or os.getenv("DASHSCOPE_API_KEY")
-        if not self.api_key:
+        if not self.api_key and self.router is None and not (self.cassette is not None and self.cassette.replaying):
             raise ValueError("DASHSCOPE_API_KEY not found in settings or environment variables.")
 
         # Set base URL (with a default if not provided).
         self.base_url = self.model_settings.get('BASE_URL', "https://dashscope.aliyuncs.com/compatible-mode/v1")
 
-        # Initialize the client using OpenAI interface.
-        self.client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        # The client (OpenAI interface) is obtained from the factory on first use.
+        self._client = None
 
         # Get the model name to use for completions.
         self.model = self.model_settings.get('MODEL', model_name)
@@ -80,6 +119,23 @@ class LLMTool(ConfiguredTool):
         # Get the prompt template, which should include a placeholder '{input_data}'
         self.prompt_template = self.parameters.get('prompt_template', '{input_data}')
 
+        # Token accounting: running totals for this tool, plus an optional shared ledger
+        # (the Agent attaches its ledger so usage is aggregated per concept/inference/plan).
+        self.max_prompt_tokens = self.parameters.get('max_prompt_tokens', self.model_settings.get('MAX_PROMPT_TOKENS'))
+        self.token_usage = TokenUsage()
+        self.token_ledger = self.parameters.get('token_ledger')
+
+    @property
+    def client(self):
+        """OpenAI-compatible client, shared with every tool using the same endpoint and key"""
+        if self._client is None:
+            self._client = self.client_factory.openai_client(self.api_key, self.base_url)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
     def apply(self, input_data):
         """
         Format the prompt with the input data and invoke the LLM.
@@ -89,6 +145,37 @@ class LLMTool(ConfiguredTool):
         clean_response = response.replace("\n```","").replace("```python\n","")
         return clean_response
 
+    def _call_slot(self):
+        """Slot of the concurrency limiter held while a call is in flight (no-op without one)"""
+        limiter = getattr(self, "limiter", None)
+        return limiter.slot() if limiter is not None else nullcontext()
+
+    def _prepare_request(self, prompt, system_prompt, temperature, kwargs):
+        """Chat messages and API arguments for a call.
+
+        Raises:
+            ValueError: If the messages exceed max_prompt_tokens. The prompt is not cut here,
+                which could drop the instructions of its template: its {input_value} is fitted
+                to the concept's prompt budget beforehand (see Agent._fit_input_value)
+        """
+        messages = [
+            {"role": "system",
+             "content": system_prompt if system_prompt is not None else "You are a helpful assistant."},
+            {"role": "user", "content": prompt}
+        ]
+
+        # Only include temperature in the API call if it's specified
+        api_kwargs = {**kwargs}
+        if temperature is not None:
+            api_kwargs['temperature'] = temperature
+
+        if self.max_prompt_tokens:
+            prompt_tokens = estimate_tokens(messages[0]["content"]) + estimate_tokens(prompt)
+            if prompt_tokens > self.max_prompt_tokens:
+                raise ValueError(f"Prompt of ~{prompt_tokens} tokens exceeds max_prompt_tokens="
+                                 f"{self.max_prompt_tokens}; not sent")
+        return messages, api_kwargs
+
     def _invoke(self, prompt, system_prompt=None, temperature=None, **kwargs):
         """
         Uses the Qwe-compatible client (via OpenAI interface) to create a chat completion and returns the response.
@@ -102,23 +189,122 @@ class LLMTool(ConfiguredTool):
         Returns:
             str: The assistant's response
         """
-        messages = [
-            {"role": "system",
-             "content": system_prompt if system_prompt is not None else "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ]
+        messages, api_kwargs = self._prepare_request(prompt, system_prompt, temperature, kwargs)
+
+        cassette = getattr(self, "cassette", None)
+        if cassette is not None:
+            key = request_key(self.model, messages, api_kwargs)
+            if cassette.replaying:
+                content, usage, model = cassette.replay(key)
+                self._record_usage(usage, messages, content, model)
+                return content
+        start = time.perf_counter()
+
+        model = self.model
+        with self._call_slot():
+            if self.router is not None:
+                response, backend = self.router.complete(messages, **api_kwargs)
+                model = backend.model
+            else:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    **api_kwargs
+                )
+        content = response.choices[0].message.content
+        usage = getattr(response, "usage", None)
+        self._record_usage(usage, messages, content, model)
+        if cassette is not None:
+            cassette.record(key, content, usage, model, time.perf_counter() - start)
+        return content
+
+    def _stream_invoke(self, prompt, system_prompt=None, temperature=None, **kwargs):
+        """
+        Streams the assistant's response, yielding text chunks as they arrive.
 
-        # Only include temperature in the API call if it's specified
-        api_kwargs = {**kwargs}
-        if temperature is not None:
-            api_kwargs['temperature'] = temperature
+        Closing the generator before it is exhausted closes the underlying HTTP response,
+        which cancels the generation server-side. Usage is recorded when the generator
+        finishes or is closed; if the stream was cut before the provider sent its usage
+        chunk, the prompt and the text received so far are estimated locally.
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            **api_kwargs
-        )
-        return response.choices[0].message.content
+        Args:
+            prompt (str): The user's input prompt
+            system_prompt (str, optional): Custom system prompt. Defaults to "You are a helpful assistant."
+            temperature (float, optional): Sampling temperature. Defaults to None (model default).
+            **kwargs: Additional arguments to pass to the chat completion API
+
+        Yields:
+            str: Successive pieces of the assistant's response
+        """
+        messages, api_kwargs = self._prepare_request(prompt, system_prompt, temperature, kwargs)
+        api_kwargs.setdefault("stream_options", {"include_usage": True})
+
+        cassette = getattr(self, "cassette", None)
+        if cassette is not None:
+            key = request_key(self.model, messages, api_kwargs, stream=True)
+            if cassette.replaying:
+                # The recorded text (as far as the recorded consumer read it) comes in one piece
+                content, usage, model = cassette.replay(key)
+                try:
+                    if content:
+                        yield content
+                finally:
+                    self._record_usage(usage, messages, content, model)
+                return
+        start = time.perf_counter()
+
+        model = self.model
+        # The slot is held until the stream is exhausted or closed
+        with self._call_slot():
+            if self.router is not None:
+                stream, backend = self.router.complete(messages, stream=True, **api_kwargs)
+                model = backend.model
+            else:
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    stream=True,
+                    **api_kwargs
+                )
+
+            parts = []
+            usage = None
+            try:
+                for chunk in stream:
+                    if getattr(chunk, "usage", None) is not None:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield delta
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+                self._record_usage(usage, messages, "".join(parts), model)
+                if cassette is not None:
+                    cassette.record(key, "".join(parts), usage, model, time.perf_counter() - start)
+
+    def _record_usage(self, usage, messages, content, model=None):
+        """Add the usage reported by the provider (or a local estimate) to the running totals."""
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            total_tokens = getattr(usage, "total_tokens", None)
+            estimated = False
+        else:
+            prompt_tokens = sum(estimate_tokens(m["content"]) for m in messages)
+            completion_tokens = estimate_tokens(content)
+            total_tokens = None
+            estimated = True
+
+        with _usage_lock:  # Calls of one tool may run in several threads (see cross_action)
+            self.token_usage.add(prompt_tokens, completion_tokens, total_tokens)
+        if self.token_ledger is not None:
+            self.token_ledger.record(prompt_tokens, completion_tokens, total_tokens,
+                                     model=model or self.model, estimated=estimated)
 
     def invoke(self, prompt, **kwargs):
         return self._invoke(prompt, **kwargs)
@@ -217,23 +403,32 @@ class LLMToolOpenAI(ConfiguredTool):
         settings_path = self.parameters.get('settings_path', 'settings.yaml')
         model_name = self.parameters.get('model_name', 'default')
 
-        # Load settings from YAML.
-        with open(settings_path, 'r') as f:
-            settings = yaml.safe_load(f)
+        self.client_factory = self.parameters.get('client_factory') or get_client_factory()
+        settings = self.client_factory.settings(settings_path)
         self.model_settings = settings.get(model_name, {})
 
-        # Initialize the Azure OpenAI client.
-        # You can adjust this to match the actual client initialization.
-        self.client = AzureOpenAI(
-            api_key=self.model_settings.get('AZURE_OPENAI_KEY'),
-            api_version=self.model_settings.get('AZURE_OPENAI_VERSION'),
-            azure_endpoint=self.model_settings.get('AZURE_OPENAI_ENDPOINT')
-        )
+        # The Azure OpenAI client is obtained from the factory on first use.
+        self._client = None
         self.deployment_name = self.model_settings.get('AZURE_DEPLOYMENT_NAME')
 
         # Get the prompt template, which should include a placeholder '{input_data}'
         self.prompt_template = self.parameters.get('prompt_template', '{input_data}')
 
+    @property
+    def client(self):
+        """Azure OpenAI client, shared with every tool using the same deployment settings"""
+        if self._client is None:
+            self._client = self.client_factory.azure_client(
+                api_key=self.model_settings.get('AZURE_OPENAI_KEY'),
+                api_version=self.model_settings.get('AZURE_OPENAI_VERSION'),
+                azure_endpoint=self.model_settings.get('AZURE_OPENAI_ENDPOINT')
+            )
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
     def apply(self, input_data):
         """
         Format the prompt with the input data and invoke the LLM.
@@ -264,6 +459,24 @@ class ConfiguredLLM(LLMTool):
         super().__init__('temp', {})
 
 
+def _validate_structured_list(parsed) -> List[str]:
+    """Check that a parsed output is a list of "Explanation :Key" strings"""
+    if not isinstance(parsed, list):
+        raise ValueError("Output is not a list")
+    for entry in parsed:
+        if not (isinstance(entry, str) and ':' in entry):
+            raise ValueError(f"Invalid entry: {entry}")
+    return parsed
+
+
+def _parse_structured_output(raw_output: str) -> List[str]:
+    """Extract and validate the list of a complete StructuredLLM output"""
+    list_match = re.search(r'\[.*\]', raw_output, re.DOTALL)
+    if not list_match:
+        raise ValueError("No valid list found in output")
+    return _validate_structured_list(ast.literal_eval(list_match.group()))
+
+
 class StructuredLLM(LLMTool):
     def __init__(self, *args, **kwargs):
         super().__init__('temp', {})
@@ -280,9 +493,6 @@ class StructuredLLM(LLMTool):
         Return [] if uncertain. Example: ["Quantum Computing: Quantum Computing uses qubits which are used to..."]"""
 
         full_prompt = f"Input: {user_input}\n Format: {system_prompt}\n Output list:"
-        entry_pattern = re.compile(
-            r':'
-        )
 
         for _ in range(max_retries):
             try:
@@ -293,21 +503,7 @@ class StructuredLLM(LLMTool):
                     # temperature=0.3
                 )
 
-                # Extract and parse list
-                list_match = re.search(r'\[.*\]', raw_output, re.DOTALL)
-                if not list_match:
-                    raise ValueError("No valid list found in output")
-
-                parsed = ast.literal_eval(list_match.group())
-                if not isinstance(parsed, list):
-                    raise ValueError("Output is not a list")
-
-                # Validate each entry
-                for entry in parsed:
-                    if not (isinstance(entry, str) and ':' in entry):
-                        raise ValueError(f"Invalid entry: {entry}")
-
-                return parsed
+                return _parse_structured_output(raw_output)
 
             except (SyntaxError, ValueError, AttributeError, TypeError) as e:
                 logging.warning(f"Validation failed: {str(e)}")
@@ -0,0 +1,107 @@
+"""Throughput of ParallelPlanRunner against a stubbed LLM.
+
+Builds a small classification plan whose actuation concept has --groups entries, answers
+every LLM call locally (so only the plan's own CPU work is measured), compiles it and
+runs --statements statements with 1, 2, ... --workers processes.
+
+    python -m normalign_stereotype.examples.bench_plan_runner --statements 64 --workers 4
+"""
+import argparse
+import contextlib
+import os
+import tempfile
+import time
+
+from normalign_stereotype.core._agent import Agent
+from normalign_stereotype.core._plan import Plan
+from normalign_stereotype.core._plan_runner import ParallelPlanRunner
+from normalign_stereotype.core._reference import Reference
+from normalign_stereotype.examples.stub_llm import StubLLM
+
+
+def stub_body():
+    """Agent body with stub LLMs; without a memory_location the agent uses a temporary memory
+    it deletes on close"""
+    answers = [f"Explanation {i} of the prompt :Instance {i}" for i in range(3)]
+    return {"llm": StubLLM(answers), "structured_llm": StubLLM(answers), "bullet_llm": StubLLM(answers)}
+
+
+_worker_output = None
+
+
+def worker_body():
+    """stub_body for a worker process, whose output (the plan's progress) is discarded for its lifetime"""
+    global _worker_output
+    if _worker_output is None:
+        _worker_output = contextlib.redirect_stdout(open(os.devnull, "w"))
+        _worker_output.__enter__()
+    return stub_body()
+
+
+def build_compiled_plan(path: str, groups: int) -> str:
+    template = os.path.join(os.path.dirname(path), "template")
+    with open(template, "w", encoding="utf-8") as f:
+        f.write("Find {meta_input_name} ({meta_input_value}) in {input_name}: {input_value}")
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        plan = _build_plan(template, groups)
+    compiled = plan.compile(path)
+    plan.close()
+    return compiled
+
+
+def _build_plan(template: str, groups: int) -> Plan:
+    plan = Plan(Agent(stub_body()), name="bench")
+    for name in ("statement", "group_classification", "answer"):
+        plan.add_concept(name, context="benchmark")
+    plan.configure_io(["statement"], "answer")
+
+    # Cognition stores each "definition :name" bullet in memory and keeps the names
+    groups_reference = Reference(axes=["group_classification"], shape=(groups,))._replace_data(
+        [f"Definition of group {i} :Group {i}" for i in range(groups)])
+    plan.make_reference("group_classification", reference=groups_reference, read_reference=False,
+                        actuation_working_config={
+                            "mode": "classification",
+                            "actuated_llm": "structured_llm",
+                            "prompt_template_path": template,
+                            "place_holders": {},
+                        })
+
+    plan.add_inference(["statement"], "group_classification", "answer")
+    plan.order_inference()
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--statements", type=int, default=64)
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--chunksize", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        compiled = build_compiled_plan(os.path.join(directory, "plan.pkl"), args.groups)
+        statements = [f"Statement number {i} about some people" for i in range(args.statements)]
+
+        baseline = None
+        print(f"{'workers':>7} {'seconds':>8} {'statements/s':>13} {'speedup':>8}")
+        workers = 1
+        while workers <= args.workers:
+            with ParallelPlanRunner(compiled, workers=workers, body_factory=worker_body,
+                                    chunksize=args.chunksize) as runner:
+                runner.run(statements[:workers])  # Start the workers before timing
+                start = time.perf_counter()
+                merged = runner.run(statements)
+                elapsed = time.perf_counter() - start
+            if runner.errors:
+                raise RuntimeError(f"Statements failed: {runner.errors}")
+            baseline = baseline or elapsed
+            print(f"{workers:>7} {elapsed:>8.2f} {args.statements / elapsed:>13.1f} "
+                  f"{baseline / elapsed:>7.2f}x")
+            workers *= 2
+        print(f"Output axes {merged.axes}, shape {merged.shape}")
+
+
+if __name__ == "__main__":
+    main()
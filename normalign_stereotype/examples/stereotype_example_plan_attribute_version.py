@@ -79,11 +79,15 @@ if __name__ == "__main__":
     # Initialize agent with memory and body
     with open(memory_path, "w") as f:
         json.dump({}, f)  # Initialize empty memory
+    # Outputs of every statement are appended to one result store (see ResultStore.query)
+    results_dir = os.path.join(PROJECT_ROOT, 'test_results')
+    os.makedirs(results_dir, exist_ok=True)
     body = {
         "llm": ConfiguredLLM(model_name),
         "structured_llm": StructuredLLM(model_name),
         "bullet_llm": BulletLLM(model_name),
-        "memory_location": memory_path
+        "memory_location": memory_path,
+        "result_store": os.path.join(results_dir, "results.db"),
     }
 
     class MockAgent(Agent):
@@ -242,7 +246,6 @@ if __name__ == "__main__":
         # "27":"I have an older sister. She's very bossy and controlling.",
     }
 
-    round = model_name
     for i, st in statements.items():
 
         for concept_name in concept_to_refer:
@@ -269,7 +272,7 @@ if __name__ == "__main__":
 
         try:
             # Execute the full plan
-            answer_ref = plan.execute(statement_input)
+            answer_ref = plan.execute(statement_input, statement=i)
             # Display results
             print("\nFinal Inference Results:")
             print("Reference Tensor:", answer_ref.tensor)
@@ -278,16 +281,9 @@ if __name__ == "__main__":
             # Inspect agent memory state
             print("\nAgent Memory State:")
             print("Working Memory:", agent.working_memory)
-            print("Persisted Memory:", json.dumps(json.load(open(memory_path)), indent=2))
+            print("Persisted Memory:", json.dumps(agent.memory.to_dict(), indent=2))
 
         except Exception as e:
             print(e)
 
-        results_dir = os.path.join(PROJECT_ROOT, 'test_results')
-        os.makedirs(results_dir, exist_ok=True)
-        with open(memory_path, 'r') as input_file, \
-                open(os.path.join(results_dir, f"{i}_{round}.json"), 'w') as output_file:
-            json.dump(json.load(input_file), output_file, indent=2)
-
-        with open(memory_path, "w") as f:
-            json.dump({}, f)  # Initialize empty memory
\ No newline at end of file
+        agent.memory.load_dict({})  # Initialize empty memory
\ No newline at end of file
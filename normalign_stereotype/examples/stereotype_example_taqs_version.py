@@ -1,3 +1,4 @@
+import os
 from normalign_stereotype.core._modified_llm import ConfiguredLLM, BulletLLM, StructuredLLM
 from normalign_stereotype.core._agent import Agent, get_default_working_config
 from normalign_stereotype.core._plan import Plan
@@ -70,13 +71,16 @@ if __name__ == "__main__":
     model_name = 'qwen-turbo-latest'
 
     # Initialize agent with memory and body
+    os.makedirs("test_results", exist_ok=True)
     with open("memory.json", "w") as f:
         json.dump({}, f)  # Initialize empty memory
     body = {
         "llm": ConfiguredLLM(model_name),
         "structured_llm": StructuredLLM(model_name),
         "bullet_llm": BulletLLM(model_name),
-        "memory_location": "memory.json"
+        "memory_location": "memory.json",
+        # Outputs of every statement are appended to one result store (see ResultStore.query)
+        "result_store": "test_results/results.db",
     }
 
     class MockAgent(Agent):
@@ -233,7 +237,6 @@ if __name__ == "__main__":
         # "27":"I have an older sister. She's very bossy and controlling.",
     }
 
-    round = model_name
     for i, st in statements.items():
 
         for concept_name in concept_to_refer:
@@ -259,7 +262,7 @@ if __name__ == "__main__":
 
         try:
             # Execute the full plan
-            answer_ref = plan.execute(statement_input)
+            answer_ref = plan.execute(statement_input, statement=i)
             # Display results
             print("\nFinal Inference Results:")
             print("Reference Tensor:", answer_ref.tensor)
@@ -268,13 +271,9 @@ if __name__ == "__main__":
             # Inspect agent memory state
             print("\nAgent Memory State:")
             print("Working Memory:", agent.working_memory)
-            print("Persisted Memory:", json.dumps(json.load(open("memory.json")), indent=2))
+            print("Persisted Memory:", json.dumps(agent.memory.to_dict(), indent=2))
 
         except Exception as e:
             print(e)
 
-        with open("memory.json", 'r') as input_file, open(f"test_results/{i}_{round}.json", 'w') as output_file:
-            json.dump(json.load(input_file), output_file, indent=2)
-
-        with open("memory.json", "w") as f:
-            json.dump({}, f)  # Initialize empty memory
\ No newline at end of file
+        agent.memory.load_dict({})  # Initialize empty memory
\ No newline at end of file
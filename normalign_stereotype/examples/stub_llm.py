@@ -0,0 +1,25 @@
+"""LLM stand-in answering every prompt locally, for benchmarks and tests of whole plans"""
+from normalign_stereotype.core._llm_client import LLMClientFactory
+from normalign_stereotype.core._tools import LLMTool
+
+
+class _StubClientFactory(LLMClientFactory):
+    """Client factory serving the settings of the stub model instead of reading a settings file"""
+
+    def settings(self, settings_path):
+        return {"stub": {"MODEL": "stub", "DASHSCOPE_API_KEY": "stub"}}
+
+
+class StubLLM(LLMTool):
+    """LLM answering every prompt with the same classification list, without calling a model
+
+    Args:
+        answers: The "explanation :Key" entries of the answer
+    """
+
+    def __init__(self, answers=("First instance found :Instance A", "Second instance found :Instance B")):
+        super().__init__("stub", {"client_factory": _StubClientFactory()}, model_name="stub")
+        self.answers = list(answers)
+
+    def invoke(self, prompt, **kwargs):
+        return str(self.answers)
@@ -0,0 +1,9 @@
+from normalign_stereotype.core._reference import Reference
+
+
+def axis_reference(axis, values, value_table=None):
+    """Single-axis Reference holding values, set one by one"""
+    ref = Reference([axis], (len(values),), value_table=value_table)
+    for i, value in enumerate(values):
+        ref.set(value, **{axis: i})
+    return ref
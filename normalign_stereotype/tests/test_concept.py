@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from normalign_stereotype.core import _concept
+from normalign_stereotype.core._concept import (
+    Concept, load_reference_tensor, reference_cache_info, clear_reference_cache
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    clear_reference_cache()
+    yield
+    clear_reference_cache()
+
+
+def test_read_reference_from_file_python_literal(tmp_path):
+    path = tmp_path / "target_group_classification_ref"
+    path.write_text("['Target group is a population :target group']", encoding="utf-8")
+
+    concept = Concept("target_group_classification")
+    concept.read_reference_from_file(str(path))
+
+    assert concept.reference.axes == ["target_group_classification"]
+    assert concept.reference.tensor == ["Target group is a population :target group"]
+    assert "target_group_classification_ref" not in vars(_concept)
+    assert "target_group_classification_ref_tensor" not in vars(_concept)
+
+
+def test_reload_is_a_cache_hit_until_file_changes(tmp_path):
+    path = tmp_path / "not_possess_ref"
+    path.write_text('["lacks A :not possess"]', encoding="utf-8")
+
+    first = load_reference_tensor(str(path))
+    first.append("mutated")
+    second = load_reference_tensor(str(path))
+    assert second == ["lacks A :not possess"]
+    assert reference_cache_info()["hits"] == 1
+
+    path.write_text('["lacks A :not possess", "other :key"]', encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_reference_tensor(str(path)) == ["lacks A :not possess", "other :key"]
+    assert reference_cache_info()["misses"] == 2
+
+
+def test_cache_hits_return_independent_lists(tmp_path):
+    nested = tmp_path / "nested_ref"
+    nested.write_text('[["a :x", "b :y"], ["c :z"]]', encoding="utf-8")
+    load_reference_tensor(str(nested))[0].append("mutated")
+    hit = load_reference_tensor(str(nested))
+    assert hit == [["a :x", "b :y"], ["c :z"]]
+    hit[1][0] = "changed"
+    assert load_reference_tensor(str(nested)) == [["a :x", "b :y"], ["c :z"]]
+
+    # Mutable leaves are deep-copied rather than shared
+    dicts = tmp_path / "dict_ref"
+    dicts.write_text('[{"k": [1]}]', encoding="utf-8")
+    load_reference_tensor(str(dicts))
+    load_reference_tensor(str(dicts))[0]["k"].append(2)
+    assert load_reference_tensor(str(dicts)) == [{"k": [1]}]
+
+
+def test_reading_a_cached_file_does_not_copy_the_tensor_again(tmp_path, monkeypatch):
+    from normalign_stereotype.core._reference import Reference
+
+    path = tmp_path / "classification_ref"
+    path.write_text('["a :x", "b :y", "a :x"]', encoding="utf-8")
+    Concept("classification").read_reference_from_file(str(path))
+
+    monkeypatch.setattr(Reference, "_copy_leaves", lambda *args: pytest.fail("second copy"))
+    concept = Concept("classification")
+    concept.read_reference_from_file(str(path))
+    assert reference_cache_info()["hits"] == 1
+    assert concept.reference.tensor == ["a :x", "b :y", "a :x"]
+    assert concept.reference.tensor[0] is concept.reference.tensor[2]
+
+
+def test_line_based_reference_file(tmp_path):
+    path = tmp_path / "individual_classification_ref.jsonl"
+    path.write_text('"first :a"\n\n"second :b"\n', encoding="utf-8")
+    assert load_reference_tensor(str(path)) == ["first :a", "second :b"]
+
+
+def test_code_is_not_executed(tmp_path):
+    path = tmp_path / "bad_ref"
+    path.write_text("[__import__('os').getcwd()]", encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_reference_tensor(str(path))
@@ -0,0 +1,140 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from normalign_stereotype.core._concurrency import AdaptiveConcurrencyLimiter, is_overload_error
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_limit_grows_additively_and_halves_on_overload():
+    clock = Clock()
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=8, cooldown=1.0, clock=clock)
+    for _ in range(5):
+        assert limiter.acquire()
+        limiter.release(latency=0.1)
+    assert limiter.limit == 5  # About one more slot per limit's worth of successes
+    for _ in range(40):
+        assert limiter.acquire()
+        limiter.release(latency=0.1)
+    assert limiter.limit == 8
+
+    limiter.acquire()
+    limiter.release(error=StatusError(429))
+    assert limiter.limit == 4
+    # A burst of failures within the cooldown backs off once
+    limiter.acquire()
+    limiter.release(error=TimeoutError())
+    assert limiter.limit == 4
+    clock.now = 2.0
+    wrapped = RuntimeError("All LLM backends failed")
+    wrapped.__cause__ = StatusError(503)
+    limiter.acquire()
+    limiter.release(error=wrapped)
+    assert limiter.limit == 2
+
+    # Errors of the request itself leave the limit alone
+    limiter.acquire()
+    limiter.release(error=StatusError(400))
+    metrics = limiter.metrics()
+    assert metrics["limit"] == 2 and metrics["decreases"] == 2 and metrics["overloads"] == 3
+    assert not is_overload_error(StatusError(401))
+
+
+def test_latency_spike_backs_off():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8, latency_tolerance=2.0, clock=Clock())
+    for latency in [0.1] * 10 + [1.0] * 2:
+        limiter.acquire()
+        limiter.release(latency=latency)
+    assert limiter.limit == 4
+    assert limiter.metrics()["baseline_latency"] == pytest.approx(0.1)
+
+
+def test_slots_bound_calls_in_flight_across_threads():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with limiter.slot():
+            with lock:
+                peak.append(limiter.in_flight)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert max(peak) <= 2
+    assert limiter.in_flight == 0
+    assert limiter.metrics()["calls"] == 8
+
+
+def test_agent_shares_one_limiter_between_its_tools(tmp_path, monkeypatch):
+    from normalign_stereotype.core._agent import Agent
+    from normalign_stereotype.core._modified_llm import BulletLLM, ConfiguredLLM
+
+    monkeypatch.setenv("DASHSCOPE_API_KEY", "test")
+    settings = tmp_path / "settings.yaml"
+    settings.write_text("m: {MODEL: m}\n", encoding="utf-8")
+    memory = tmp_path / "memory.json"
+    memory.write_text("{}", encoding="utf-8")
+
+    def create(model, messages, **kwargs):
+        message = SimpleNamespace(content="An answer :Key")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    body = {"llm": ConfiguredLLM("m", settings_path=str(settings)),
+            "bullet_llm": BulletLLM("m", settings_path=str(settings)),
+            "memory_location": str(memory), "concurrency_limiter": True}
+    agent = Agent(body)
+    for tool in (body["llm"], body["bullet_llm"]):
+        tool.client = client
+        assert tool.limiter is agent.concurrency_limiter
+        tool.invoke("question")
+    assert agent.concurrency_limiter.metrics()["calls"] == 2
+
+
+def test_cross_action_runs_the_calls_of_its_cells_concurrently():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from normalign_stereotype.core._reference import Reference, cross_action
+    from normalign_stereotype.core._token_budget import TokenLedger
+
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=4)
+    ledger = TokenLedger()
+    # Every call waits for the other three: run one after the other, they would time out
+    barrier = threading.Barrier(4, timeout=5)
+
+    def classify(statement):
+        with limiter.slot():
+            barrier.wait()
+        ledger.record(prompt_tokens=1)
+        return [statement.upper(), statement]
+
+    functions = Reference(["group"], (2,))._replace_data([classify, classify])
+    statements = Reference(["statement"], (2,))._replace_data(["a", "b"])
+    with ledger.scope(inference="test"), ThreadPoolExecutor(max_workers=limiter.max_limit) as executor:
+        for ragged in (False, True):
+            barrier.reset()
+            result = cross_action(functions, statements, "answer", ragged=ragged, executor=executor)
+            assert result.axes == ["group", "statement", "answer"]
+            assert result.tensor == [[["A", "a"], ["B", "b"]]] * 2
+    assert limiter.metrics()["calls"] == 8
+    assert all(record["inference"] == "test" for record in ledger.records)
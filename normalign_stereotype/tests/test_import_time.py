@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+# Cold start budget for importing the core modules, in seconds
+IMPORT_TIME_BUDGET = float(os.environ.get("NORMALIGN_IMPORT_TIME_BUDGET", "0.5"))
+
+HEAVY_MODULES = ["openai", "yaml", "dotenv", "httpx", "tiktoken", "spacy"]
+CORE_MODULES = [
+    "normalign_stereotype.core._reference",
+    "normalign_stereotype.core._lazy_reference",
+    "normalign_stereotype.core._reference_io",
+    "normalign_stereotype.core._concept",
+    "normalign_stereotype.core._tools",
+    "normalign_stereotype.core._modified_llm",
+    "normalign_stereotype.core._agent",
+]
+
+_PROBE = """
+import importlib, json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _probe():
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(modules=CORE_MODULES, heavy=HEAVY_MODULES)],
+        cwd=root, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1]), output
+
+
+def test_core_import_has_no_heavy_dependencies_or_output():
+    result, output = _probe()
+    assert result["loaded"] == []
+    # Nothing but the probe's own line is printed at import time
+    assert len(output.strip().splitlines()) == 1
+
+
+def test_core_import_time_within_budget():
+    best = min(_probe()[0]["seconds"] for _ in range(3))
+    assert best < IMPORT_TIME_BUDGET, f"Importing core took {best:.3f}s (budget {IMPORT_TIME_BUDGET}s)"
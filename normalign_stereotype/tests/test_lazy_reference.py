@@ -0,0 +1,56 @@
+from normalign_stereotype.core._reference import Reference, cross_action, cross_product, element_action
+from normalign_stereotype.core._lazy_reference import LazyReference, lazy_reference, materialize
+from normalign_stereotype.tests._references import axis_reference
+
+
+def _pipeline(statements, groups, classifications, lazy, calls):
+    if lazy:
+        statements, groups = lazy_reference(statements), lazy_reference(groups)
+
+    def perceive(pair):
+        calls.append(pair)
+        return [pair[0].upper(), pair[1].upper()]
+
+    perception = element_action(perceive, [cross_product([statements, groups])])
+    actuation = element_action(lambda name: (lambda p: [f"{name}({p[0]}, {p[1]})", f"{name}!"]),
+                               [classifications])
+    raw = cross_action(actuation, perception, "result")
+    ref = lazy_reference(raw) if lazy else raw
+    cognition = element_action(lambda bullet: bullet.split("(")[0], [ref])
+    return materialize(cognition.slice("statement", "result"))
+
+
+def test_lazy_pipeline_matches_eager():
+    statements = axis_reference("statement", ["s1", "s2"])
+    groups = axis_reference("target_group", ["g1", "@#SKIP#@", "g3"])
+    classifications = axis_reference("classification", ["c1", "c2"])
+
+    eager_calls, lazy_calls = [], []
+    eager = _pipeline(statements, groups, classifications, False, eager_calls)
+    lazy = _pipeline(statements, groups, classifications, True, lazy_calls)
+
+    assert isinstance(lazy, Reference)
+    assert lazy.axes == eager.axes
+    assert lazy.shape == eager.shape
+    assert lazy.tensor == eager.tensor
+    # The broadcast perception is still computed once per cell
+    assert sorted(lazy_calls) == sorted(eager_calls)
+
+
+def test_element_wise_steps_are_deferred_and_fused():
+    ref = lazy_reference(axis_reference("x", ["a", "b"]))
+    calls = []
+    first = element_action(lambda v: calls.append(v) or v + "1", [ref])
+    second = element_action(lambda v: v + "2", [first])
+    assert isinstance(second, LazyReference)
+    assert calls == []
+    assert second.materialize().tensor == ["a12", "b12"]
+    assert second.get(x=1) == "b12"
+    assert calls == ["a", "b"]
+
+
+def test_exceptions_become_skips():
+    ref = lazy_reference(axis_reference("x", ["a", "b"]))
+    failing = element_action(lambda v: v if v == "a" else 1 / 0, [ref])
+    assert failing.get(x=1) == "@#SKIP#@"
+    assert failing.tensor == ["a", "@#SKIP#@"]
@@ -0,0 +1,82 @@
+from types import SimpleNamespace
+
+import pytest
+
+from normalign_stereotype.core._llm_cassette import LLMCassette
+from normalign_stereotype.core._modified_llm import ConfiguredLLM, StructuredLLM
+
+from normalign_stereotype.tests.test_structured_stream import StreamingClient
+
+
+class CountingClient:
+    """chat.completions client answering with the prompt and a call counter"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=f"{messages[-1]['content']} #{self.calls}")
+        usage = SimpleNamespace(prompt_tokens=5, completion_tokens=7, total_tokens=12)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+@pytest.fixture
+def settings(tmp_path):
+    path = tmp_path / "settings.yaml"
+    path.write_text("m: {MODEL: m}\n", encoding="utf-8")
+    return str(path)
+
+
+def test_replay_serves_recorded_responses_in_order(tmp_path, settings, monkeypatch):
+    monkeypatch.setenv("DASHSCOPE_API_KEY", "test")
+    path = str(tmp_path / "calls.jsonl")
+
+    live = ConfiguredLLM("m", settings_path=settings, cassette=LLMCassette(path, "record"))
+    live.client = CountingClient()
+    recorded = [live.invoke("a"), live.invoke("b"), live.invoke("a")]
+    assert recorded == ["a #1", "b #2", "a #3"]
+
+    # Replay needs neither a key nor a client
+    monkeypatch.delenv("DASHSCOPE_API_KEY")
+    delays = []
+    cassette = LLMCassette(path, "replay", latency_scale=2.0, sleep=delays.append)
+    offline = ConfiguredLLM("m", settings_path=settings, cassette=cassette)
+    offline.client = None
+    assert [offline.invoke("a"), offline.invoke("b"), offline.invoke("a"), offline.invoke("a")] == \
+        ["a #1", "b #2", "a #3", "a #3"]
+    assert len(delays) == 4 and all(d >= 0 for d in delays)
+    assert offline.token_usage.total_tokens == 4 * 12
+
+    with pytest.raises(RuntimeError):
+        offline.invoke("never asked")
+
+
+def test_streamed_calls_replay_what_the_consumer_read(tmp_path, settings, monkeypatch):
+    monkeypatch.setenv("DASHSCOPE_API_KEY", "test")
+    path = str(tmp_path / "calls.jsonl")
+    answer = '["Engineers build things :Engineering"]' + " epilogue" * 50
+
+    live = StructuredLLM("m", stream=True, settings_path=settings, cassette=LLMCassette(path, "record"))
+    live.client = StreamingClient(answer)
+    expected = live.invoke("question")
+
+    replayed = StructuredLLM("m", stream=True, settings_path=settings, cassette=LLMCassette(path, "replay"))
+    replayed.client = None
+    assert replayed.invoke("question") == expected == str(["Engineers build things :Engineering"])
+
+    # A non-streamed call is keyed apart from the (cut short) streamed recording
+    plain = StructuredLLM("m", settings_path=settings, cassette=LLMCassette(path, "replay"))
+    with pytest.raises(RuntimeError):
+        plain._invoke("question")
+
+
+def test_interrupted_line_is_ignored(tmp_path):
+    path = tmp_path / "calls.jsonl"
+    LLMCassette(str(path), "record").record("k", "answer")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"key": "k2", "cont')
+    cassette = LLMCassette(str(path), "replay")
+    assert len(cassette) == 1
+    assert cassette.replay("k")[0] == "answer"
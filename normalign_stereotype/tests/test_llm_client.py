@@ -0,0 +1,50 @@
+import os
+
+from normalign_stereotype.core._llm_client import LLMClientFactory
+from normalign_stereotype.core._tools import LLMTool
+
+
+def _settings(tmp_path, body):
+    path = tmp_path / "settings.yaml"
+    path.write_text(body, encoding="utf-8")
+    return str(path)
+
+
+def _tool(factory, settings_path, model_name="m"):
+    return LLMTool("LLM", {"settings_path": settings_path, "model_name": model_name, "client_factory": factory})
+
+
+def test_settings_parsed_once_until_modified(tmp_path):
+    factory = LLMClientFactory()
+    path = _settings(tmp_path, "m:\n  DASHSCOPE_API_KEY: key\n  MODEL: model-a\n")
+
+    tools = [_tool(factory, path) for _ in range(3)]
+    assert factory.stats["settings_parsed"] == 1
+    assert tools[0].model == "model-a"
+
+    stat = os.stat(path)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("m:\n  DASHSCOPE_API_KEY: key\n  MODEL: model-b\n")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert _tool(factory, path).model == "model-b"
+    assert factory.stats["settings_parsed"] == 2
+
+
+def test_clients_are_shared_per_endpoint_and_key(tmp_path):
+    factory = LLMClientFactory(max_connections=8)
+    path = _settings(tmp_path, (
+        "a:\n  DASHSCOPE_API_KEY: key\n  BASE_URL: http://localhost:1/v1\n"
+        "b:\n  DASHSCOPE_API_KEY: key\n  BASE_URL: http://localhost:1/v1\n  MODEL: other\n"
+        "c:\n  DASHSCOPE_API_KEY: key\n  BASE_URL: http://localhost:2/v1\n"
+    ))
+    a1, a2, b, c = (_tool(factory, path, name) for name in ("a", "a", "b", "c"))
+
+    # No client is built until a tool needs one
+    assert factory.stats["clients_created"] == 0
+    assert a1.client is a2.client is b.client
+    assert c.client is not a1.client
+    assert factory.stats["clients_created"] == 2
+
+    factory.close()
+    assert a1.client is not factory.openai_client("key", "http://localhost:1/v1")
+
@@ -0,0 +1,166 @@
+from types import SimpleNamespace
+
+import pytest
+
+from normalign_stereotype.core._llm_router import Backend, LLMRouter
+from normalign_stereotype.core._token_budget import TokenLedger
+from normalign_stereotype.core._tools import LLMTool
+
+
+class EchoClient:
+    """Minimal chat.completions client answering with its own name"""
+
+    def __init__(self, name, error=None):
+        self.name = name
+        self.error = error
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.models = SimpleNamespace(list=self.list_models)
+
+    def list_models(self):
+        if self.error is not None:
+            raise self.error
+        return []
+
+    def create(self, model, messages, stream=False, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        if stream:
+            return iter([f"{self.name}:", messages[-1]["content"]])
+        message = SimpleNamespace(content=f"{self.name}:{messages[-1]['content']}")
+        usage = SimpleNamespace(prompt_tokens=3, completion_tokens=2, total_tokens=5)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _messages(text="hi"):
+    return [{"role": "user", "content": text}]
+
+
+def test_weighted_round_robin_follows_weights():
+    a, b = EchoClient("a"), EchoClient("b")
+    router = LLMRouter([Backend("a", a, "m", weight=3), Backend("b", b, "m", weight=1)])
+    served = [router.complete(_messages())[1].name for _ in range(8)]
+    assert served.count("a") == 6 and served.count("b") == 2
+    # Smooth round-robin interleaves instead of sending bursts
+    assert served[:4] == ["a", "a", "b", "a"]
+
+
+def test_least_outstanding_prefers_idle_and_faster_backends():
+    slow, fast = Backend("slow", EchoClient("slow"), "m"), Backend("fast", EchoClient("fast"), "m")
+    router = LLMRouter([slow, fast], policy="least_outstanding")
+    slow.latency, fast.latency = 2.0, 0.5
+    assert router.complete(_messages())[1] is fast
+    fast.outstanding = 5
+    assert router.complete(_messages())[1] is slow
+
+
+def test_failover_marks_backend_unhealthy_until_cooldown():
+    clock = FakeClock()
+    broken = EchoClient("broken", error=ConnectionError("down"))
+    router = LLMRouter([Backend("broken", broken, "m"), Backend("ok", EchoClient("ok"), "m")],
+                       max_failures=2, cooldown=10, clock=clock)
+
+    for _ in range(4):
+        response, backend = router.complete(_messages())
+        assert backend.name == "ok"
+    assert broken.calls == 2
+    assert router.status()[0]["healthy"] is False
+
+    clock.now = 11
+    broken.error = None
+    served = {router.complete(_messages())[1].name for _ in range(2)}
+    assert "broken" in served
+    assert router.status()[0]["healthy"] is True
+
+
+def test_backend_is_probed_before_traffic_after_its_cooldown():
+    clock = FakeClock()
+    broken = EchoClient("broken", error=ConnectionError("down"))
+    router = LLMRouter([Backend("broken", broken, "m"), Backend("ok", EchoClient("ok"), "m")],
+                       max_failures=1, cooldown=10, clock=clock)
+    router.complete(_messages())
+    assert broken.calls == 1
+
+    # Still down: the probe fails, so no request is sent and the cooldown starts again
+    clock.now = 11
+    assert router.complete(_messages())[1].name == "ok"
+    assert broken.calls == 1
+    assert router.status()[0]["healthy"] is False
+
+
+def test_stream_holds_its_backend_until_it_ends():
+    clock = FakeClock()
+    backend = Backend("a", EchoClient("a"), "m")
+    router = LLMRouter([backend], clock=clock)
+
+    stream, _ = router.complete(_messages("hi"), stream=True)
+    assert backend.outstanding == 1
+    clock.now = 2.0
+    assert list(stream) == ["a:", "hi"]
+    assert backend.outstanding == 0
+    assert backend.latency == 2.0
+
+    stream, _ = router.complete(_messages(), stream=True)
+    stream.close()
+    assert backend.outstanding == 0
+    assert backend.latency == 2.0
+
+
+def test_health_is_checked_from_the_routing_path():
+    clock = FakeClock()
+    checked = []
+    router = LLMRouter([Backend("a", EchoClient("a"), "m")], health_check=checked.append,
+                       health_check_interval=5, clock=clock)
+    router.complete(_messages())
+    router.complete(_messages())
+    assert len(checked) == 1
+    clock.now = 6
+    router.complete(_messages())
+    assert len(checked) == 2
+
+
+def test_client_errors_are_not_failed_over_and_total_failure_raises():
+    bad_request = ValueError("bad request")
+    bad_request.status_code = 400
+    first, second = EchoClient("first", error=bad_request), EchoClient("second")
+    router = LLMRouter([Backend("first", first, "m"), Backend("second", second, "m")])
+    with pytest.raises(ValueError):
+        router.complete(_messages())
+    assert second.calls == 0
+
+    router = LLMRouter([Backend("down", EchoClient("down", error=TimeoutError()), "m")])
+    with pytest.raises(RuntimeError):
+        router.complete(_messages())
+
+
+def test_health_check_updates_backends():
+    def check(backend):
+        if backend.name == "down":
+            raise ConnectionError("unreachable")
+
+    router = LLMRouter([Backend("up", EchoClient("up"), "m"), Backend("down", EchoClient("down"), "m")],
+                       health_check=check)
+    assert router.check_health() == {"up": True, "down": False}
+    assert {router.complete(_messages())[1].name for _ in range(3)} == {"up"}
+
+
+def test_llm_tool_routes_through_router(tmp_path):
+    settings = tmp_path / "settings.yaml"
+    settings.write_text("routed: {}\n", encoding="utf-8")
+    router = LLMRouter([Backend("vllm", EchoClient("vllm"), "qwen-local")])
+    ledger = TokenLedger()
+
+    tool = LLMTool("LLM", {"settings_path": str(settings), "model_name": "routed",
+                           "router": router, "token_ledger": ledger})
+    assert tool.invoke("hello") == "vllm:hello"
+    assert ledger.records[0]["model"] == "qwen-local"
+    assert tool.token_usage.total_tokens == 5
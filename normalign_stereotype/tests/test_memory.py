@@ -0,0 +1,176 @@
+import json
+import multiprocessing
+import sqlite3
+
+import pytest
+
+from normalign_stereotype.core._memory import (
+    JSONMemory, SQLiteMemory, memory_key, open_memory, split_memory_key,
+)
+
+
+@pytest.fixture(params=["memory.json", "memory.db"])
+def memory(request, tmp_path):
+    store = open_memory(str(tmp_path / request.param))
+    yield store
+    store.close()
+
+
+def test_set_get_and_batched_lookup(memory):
+    memory.set_many([("Alice", "person", "An engineer"), ("Bob", "person", "A nurse"),
+                     ("Bob", "role", "Nursing")])
+    memory.set("Alice", "person", "A senior engineer")
+
+    assert memory.get(("Alice", "person")) == "A senior engineer"
+    assert memory.get(("Alice", "role"), "missing") == "missing"
+    assert memory.get_many([("Bob", "role"), ("Carol", "person"), ("Bob", "person")]) == \
+        ["Nursing", None, "A nurse"]
+    assert memory.to_dict() == {"Alice (person)": "A senior engineer", "Bob (person)": "A nurse",
+                                "Bob (role)": "Nursing"}
+
+
+def test_export_and_load_legacy_json(memory, tmp_path):
+    legacy = {"Kind (of) people (target_groups)": "text", "x (y)": "z"}
+    memory.load_dict(legacy)
+    assert memory.get(("Kind (of) people", "target_groups")) == "text"
+
+    out = tmp_path / "snapshot.json"
+    memory.export_json(str(out))
+    assert json.loads(out.read_text(encoding="utf-8")) == legacy
+
+
+def test_sqlite_memory_uses_wal_and_composite_key(tmp_path):
+    path = str(tmp_path / "memory.sqlite")
+    store = SQLiteMemory(path)
+    store.set_many((f"name{i}", "concept", i) for i in range(1200))
+    assert store.get_many([(f"name{i}", "concept") for i in range(0, 1200, 7)]) == list(range(0, 1200, 7))
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    plan = " ".join(row[-1] for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT value FROM memory WHERE namespace = 'n' AND name = 'a' AND concept = 'b'"))
+    assert "PRIMARY KEY" in plan
+    conn.close()
+    store.close()
+
+
+def test_json_memory_sees_external_writes(tmp_path):
+    path = tmp_path / "memory.json"
+    path.write_text("{}", encoding="utf-8")
+    store = JSONMemory(str(path))
+    assert store.get(("a", "b")) is None
+    path.write_text(json.dumps({"a (b)": "written elsewhere"}), encoding="utf-8")
+    assert store.get(("a", "b")) == "written elsewhere"
+
+
+def test_legacy_keys():
+    assert memory_key("a (1)", "b") == "a (1) (b)"
+    assert split_memory_key("a (1) (b)") == ("a (1)", "b")
+    with pytest.raises(ValueError):
+        split_memory_key("no concept")
+
+
+def _write_run(path, namespace, count):
+    store = SQLiteMemory(path, namespace=namespace)
+    for i in range(count):
+        store.set(f"name{i}", "concept", f"{namespace}-{i}")
+    store.close()
+
+
+def test_namespaces_isolate_concurrent_runs(tmp_path):
+    path = str(tmp_path / "memory.db")
+    SQLiteMemory(path).close()
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_write_run, args=(path, f"run{i}", 50)) for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    for i in range(3):
+        store = SQLiteMemory(path, namespace=f"run{i}")
+        assert len(store.items()) == 50
+        assert store.get(("name7", "concept")) == f"run{i}-7"
+        store.close()
+    assert SQLiteMemory(path).items() == []
+
+
+def test_shared_namespace_is_published_once_and_read_only(tmp_path):
+    path = str(tmp_path / "memory.db")
+    run_a = SQLiteMemory(path, namespace="a", shared_namespace="shared")
+    run_b = SQLiteMemory(path, namespace="b", shared_namespace="shared")
+    assert run_a.publish_shared({"Women (target_groups)": "definition"})
+    assert not run_b.publish_shared({"Women (target_groups)": "other definition"})
+
+    run_b.set("Women", "target_groups", "run-specific")
+    assert run_a.get(("Women", "target_groups")) == "definition"
+    assert run_b.get_many([("Women", "target_groups"), ("Men", "target_groups")]) == ["run-specific", None]
+    assert run_a.to_dict() == {}
+    with pytest.raises(ValueError):
+        SQLiteMemory(path, namespace="shared", shared_namespace="shared")
+    with pytest.raises(ValueError):
+        open_memory(str(tmp_path / "memory.json"), namespace="a")
+
+
+def test_memory_without_namespaces_is_migrated(tmp_path):
+    path = str(tmp_path / "memory.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE memory (name TEXT NOT NULL, concept TEXT NOT NULL, value TEXT, "
+                 "PRIMARY KEY (name, concept)) WITHOUT ROWID")
+    conn.execute("INSERT INTO memory VALUES ('a', 'b', '\"c\"')")
+    conn.commit()
+    conn.close()
+    assert SQLiteMemory(path).to_dict() == {"a (b)": "c"}
+
+
+def _write_json(path, prefix, count):
+    store = JSONMemory(path)
+    for i in range(count):
+        store.set(f"{prefix}{i}", "concept", i)
+
+
+def test_json_memory_keeps_concurrent_updates(tmp_path):
+    path = str(tmp_path / "memory.json")
+    JSONMemory(path)
+    ctx = multiprocessing.get_context("spawn")
+    workers = [ctx.Process(target=_write_json, args=(path, prefix, 25)) for prefix in "abc"]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert len(JSONMemory(path).to_dict()) == 75
+
+
+def test_json_memory_keeps_file_permissions(tmp_path):
+    import os
+    import stat
+
+    umask = os.umask(0o022)
+    try:
+        path = str(tmp_path / "memory.json")
+        memory = JSONMemory(path)
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+        os.chmod(path, 0o640)
+        memory.set("Women", "group", "A definition")
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    finally:
+        os.umask(umask)
+
+
+def test_cognition_stores_bullets_of_a_lazy_reference(tmp_path):
+    from normalign_stereotype.core._agent import Agent
+    from normalign_stereotype.core._concept import Concept
+    from normalign_stereotype.core._lazy_reference import lazy_reference
+    from normalign_stereotype.core._reference import Reference
+    from normalign_stereotype.core._tools import LLMTool
+
+    llm = LLMTool.__new__(LLMTool)
+    llm.token_ledger = None
+    agent = Agent({"llm": llm, "memory_location": str(tmp_path / "memory.db")})
+    raw = Reference(axes=["answer"], shape=(2,))._replace_data(["First :Instance A", "Second :Instance B"])
+    concept = Concept("answer", "ctx", lazy_reference(raw))
+
+    names = agent.cognition(concept)
+    assert names.tensor == ["Instance A", "Instance B"]
+    assert agent.memory.to_dict() == {"Instance A (answer)": "First", "Instance B (answer)": "Second"}
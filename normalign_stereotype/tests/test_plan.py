@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+
+from normalign_stereotype.core import _pos_analysis
+from normalign_stereotype.core._agent import Agent
+from normalign_stereotype.core._plan import Plan
+from normalign_stereotype.core._reference import Reference
+from normalign_stereotype.examples.stub_llm import StubLLM
+
+
+def stub_body(memory_location=None):
+    body = {"llm": StubLLM(), "structured_llm": StubLLM(), "bullet_llm": StubLLM()}
+    if memory_location is not None:
+        with open(memory_location, "w", encoding="utf-8") as f:
+            json.dump({}, f)
+        body["memory_location"] = memory_location
+    return body
+
+
+def _build_plan(tmp_path, monkeypatch, **body_options):
+    # The inferred name is already tagged: ordering the plan must not load the model
+    cache = tmp_path / "pos.json"
+    cache.write_text(json.dumps({"version": 1, "model": _pos_analysis.POS_MODEL, "pos": {"answer": "noun"}}),
+                     encoding="utf-8")
+    monkeypatch.setenv("NORMALIGN_POS_CACHE", str(cache))
+    _pos_analysis.clear_pos_cache()
+
+    def no_model():
+        raise AssertionError("the model should not be loaded")
+
+    monkeypatch.setattr(_pos_analysis, "get_nlp", no_model)
+
+    template = tmp_path / "template"
+    template.write_text("Find {meta_input_name} in {input_value}", encoding="utf-8")
+    plan = Plan(Agent({**stub_body(str(tmp_path / "memory.json")), **body_options}), name="test")
+    for name in ("statement", "group_classification", "answer"):
+        plan.add_concept(name, context="ctx")
+    plan.configure_io(["statement"], "answer")
+    groups = Reference(axes=["group_classification"], shape=(2,))._replace_data(
+        ["Definition of women :Women", "Definition of men :Men"])
+    plan.make_reference("group_classification", reference=groups, read_reference=False,
+                        actuation_working_config={"mode": "classification", "actuated_llm": "structured_llm",
+                                                  "prompt_template_path": str(template), "place_holders": {}})
+    plan.add_inference(["statement"], "group_classification", "answer")
+    plan.order_inference()
+    return plan
+
+
+def test_compile_and_load_round_trip(tmp_path, monkeypatch):
+    plan = _build_plan(tmp_path, monkeypatch)
+    compiled = plan.compile(str(tmp_path / "plan.pkl"), model_name="stub")
+
+    loaded = Plan.load_compiled(compiled, body=stub_body(), memory_location=str(tmp_path / "loaded.db"))
+    assert loaded.agent.memory.to_dict() == {"Women (group_classification)": "Definition of women",
+                                             "Men (group_classification)": "Definition of men"}
+    assert loaded.concept_registry["group_classification"].reference.tensor == ["Women", "Men"]
+    assert [inf.concept_to_infer.comprehension["name"] for inf in loaded.inference_order] == ["answer"]
+    # Template files are inlined, so the artifact does not depend on them
+    actuation = loaded.agent.working_memory["actuation"]["group_classification"]
+    assert actuation["prompt_template"] == "Find {meta_input_name} in {input_value}"
+    assert "prompt_template_path" not in actuation
+
+
+def test_temporary_memory_is_deleted_on_close(tmp_path, monkeypatch):
+    plan = _build_plan(tmp_path, monkeypatch)
+    compiled = plan.compile(str(tmp_path / "plan.pkl"), model_name="stub")
+
+    loaded = Plan.load_compiled(compiled, body=stub_body())
+    memory_location = loaded.agent.body["memory_location"]
+    assert loaded.agent.memory.get(("Women", "group_classification")) == "Definition of women"
+    loaded.close()
+    assert not os.path.exists(memory_location)
+
+
+def test_execute_stores_inferred_bullets_in_memory(tmp_path, monkeypatch):
+    plan = _build_plan(tmp_path, monkeypatch)
+    plan.execute({"statement": Reference(axes=["statement"], shape=(1,), initial_value="Men are strong :Men are strong")})
+    memory = plan.agent.memory.to_dict()
+    assert memory["Instance A (answer)"] == "First instance found"
+    assert memory["Instance B (answer)"] == "Second instance found"
+
+
+def test_execute_runs_llm_calls_concurrently_with_a_limiter(tmp_path, monkeypatch):
+    threads = set()
+    invoke = StubLLM.invoke
+
+    def record_thread(self, prompt, **kwargs):
+        threads.add(threading.current_thread())
+        return invoke(self, prompt, **kwargs)
+
+    monkeypatch.setattr(StubLLM, "invoke", record_thread)
+    statement = Reference(axes=["statement"], shape=(1,), initial_value="Men are strong :Men are strong")
+    expected = _build_plan(tmp_path, monkeypatch).execute({"statement": statement}).tensor
+    assert threads == {threading.main_thread()}
+
+    threads.clear()
+    plan = _build_plan(tmp_path, monkeypatch, concurrency_limiter=True)
+    assert plan.execute({"statement": statement}).tensor == expected
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,78 @@
+import json
+import tempfile
+
+import pytest
+
+from normalign_stereotype.core import _pos_analysis
+from normalign_stereotype.core._lazy_reference import materialize
+from normalign_stereotype.core._plan import Plan
+from normalign_stereotype.core._reference import Reference
+from normalign_stereotype.core._plan_runner import ParallelPlanRunner, merge_references, statement_reference
+from normalign_stereotype.examples.bench_plan_runner import build_compiled_plan, stub_body
+
+
+def _ref(axes, tensor):
+    shape = []
+    level = tensor
+    for _ in axes:
+        shape.append(len(level))
+        level = level[0]
+    return Reference(axes=axes, shape=tuple(shape))._replace_data(tensor)
+
+
+def test_merge_stacks_along_input_axis_and_pads():
+    first = _ref(["group", "statement"], [["a1"], ["a2"]])
+    second = _ref(["statement", "group"], [["b1", "b2", "b3"]])
+
+    merged = merge_references([first, second], "statement")
+    assert merged.axes == ["group", "statement"]
+    assert merged.shape == (3, 2)
+    assert merged.tensor == [["a1", "b1"], ["a2", "b2"], ["@#SKIP#@", "b3"]]
+
+
+def test_merge_fills_failed_statements_and_missing_axis():
+    ok = _ref(["group"], ["x", "y"])
+    merged = merge_references([ok, None, ok], "statement")
+    assert merged.axes == ["statement", "group"]
+    assert merged.tensor == [["x", "y"], ["@#SKIP#@", "@#SKIP#@"], ["x", "y"]]
+
+    with pytest.raises(ValueError):
+        merge_references([ok, _ref(["other"], ["z"])], "statement")
+    with pytest.raises(ValueError):
+        merge_references([None], "statement")
+
+
+def test_statement_reference():
+    ref = statement_reference("statement", "Engineers are smart")
+    assert ref.axes == ["statement"]
+    assert ref.tensor == ["Engineers are smart :Engineers are smart"]
+
+
+def test_runner_matches_sequential_execution(tmp_path, monkeypatch):
+    # The inferred name is already tagged: the plan must not need the model
+    cache = tmp_path / "pos.json"
+    cache.write_text(json.dumps({"version": 1, "model": _pos_analysis.POS_MODEL, "pos": {"answer": "noun"}}),
+                     encoding="utf-8")
+    monkeypatch.setenv("NORMALIGN_POS_CACHE", str(cache))
+    _pos_analysis.clear_pos_cache()
+    compiled = build_compiled_plan(str(tmp_path / "plan.pkl"), groups=3)
+    statements = ["Women are bad drivers", "Men are strong", "The sky is blue"]
+
+    # The temporary memory of each worker is deleted when the pool shuts down
+    temp_dir = tmp_path / "tmp"
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temp_dir))
+    with ParallelPlanRunner(compiled, workers=2, body_factory=stub_body, mp_context="fork") as runner:
+        merged = runner.run(statements)
+    assert runner.errors == {}
+    assert list(temp_dir.iterdir()) == []
+
+    sequential = Plan.load_compiled(compiled, body=stub_body())
+    outputs = [materialize(sequential.execute({"statement": statement_reference("statement", statement)},
+                                              statement=statement))
+               for statement in statements]
+    sequential.close()
+    expected = merge_references(outputs, "statement")
+    assert merged.axes == expected.axes == ["group_classification", "statement", "answer"]
+    assert merged.shape == expected.shape == (3, 3, 3)
+    assert merged.tensor == expected.tensor
@@ -0,0 +1,82 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from normalign_stereotype.core import _pos_analysis
+
+
+class FakeNLP:
+    """nlp.pipe double tagging a phrase as a verb when it starts with a known verb"""
+
+    verbs = {"possess", "not", "adopt"}
+
+    def __init__(self):
+        self.calls = []
+
+    def pipe(self, texts, batch_size=64):
+        texts = list(texts)
+        self.calls.append(texts)
+        for text in texts:
+            pos = "VERB" if text.split()[0] in self.verbs else "NOUN"
+            yield [SimpleNamespace(dep_="ROOT", pos_=pos)]
+
+
+@pytest.fixture
+def fake_nlp(tmp_path, monkeypatch):
+    monkeypatch.setenv("NORMALIGN_POS_CACHE", str(tmp_path / "pos.json"))
+    nlp = FakeNLP()
+    monkeypatch.setattr(_pos_analysis, "get_nlp", lambda: nlp)
+    _pos_analysis.clear_pos_cache()
+    yield nlp
+    _pos_analysis.clear_pos_cache()
+
+
+def test_tags_uncached_names_in_one_batch(fake_nlp, tmp_path):
+    tags = _pos_analysis.tag_phrases(["target_groups", "possess?", "attributes", "target_groups"])
+    assert tags == {"target_groups": "noun", "possess?": "verb", "attributes": "noun"}
+    assert fake_nlp.calls == [["target groups", "possess", "attributes"]]
+
+    assert _pos_analysis._get_phrase_pos("possess?") == "verb"
+    assert len(fake_nlp.calls) == 1
+
+    stored = json.loads((tmp_path / "pos.json").read_text(encoding="utf-8"))
+    assert stored["pos"]["target_groups"] == "noun"
+
+
+def test_persistent_cache_avoids_loading_the_model(fake_nlp, monkeypatch):
+    _pos_analysis.tag_phrases(["adopting_subjects", "not_possess"])
+
+    def no_model():
+        raise AssertionError("the model should not be loaded")
+
+    _pos_analysis.clear_pos_cache()
+    monkeypatch.setattr(_pos_analysis, "get_nlp", no_model)
+    assert _pos_analysis.tag_phrases(["not_possess", "adopting_subjects"]) == \
+        {"not_possess": "verb", "adopting_subjects": "noun"}
+
+
+def test_cache_entries_that_are_not_tags_are_dropped(fake_nlp, tmp_path):
+    (tmp_path / "pos.json").write_text(json.dumps({
+        "version": _pos_analysis._POS_CACHE_VERSION, "model": _pos_analysis.POS_MODEL,
+        "pos": {"target_groups": "noun", "attributes": "../../etc"},
+    }), encoding="utf-8")
+
+    assert _pos_analysis.tag_phrases(["target_groups", "attributes"]) == \
+        {"target_groups": "noun", "attributes": "noun"}
+    assert fake_nlp.calls == [["attributes"]]
+
+
+def test_default_cache_is_in_a_private_user_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv("NORMALIGN_POS_CACHE", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    monkeypatch.setattr(_pos_analysis, "get_nlp", FakeNLP)
+    _pos_analysis.clear_pos_cache()
+
+    _pos_analysis.tag_phrases(["possess?"])
+    path = _pos_analysis.pos_cache_path()
+    assert path == str(tmp_path / "normalign_stereotype" / "pos_cache.json")
+    assert json.loads(open(path, encoding="utf-8").read())["pos"] == {"possess?": "verb"}
+    assert os.stat(os.path.dirname(path)).st_mode & 0o777 == 0o700
+    _pos_analysis.clear_pos_cache()
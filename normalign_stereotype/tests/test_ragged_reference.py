@@ -0,0 +1,111 @@
+import pickle
+
+import pytest
+
+from normalign_stereotype.core._reference import cross_action, cross_product, element_action
+from normalign_stereotype.core._lazy_reference import lazy_reference, materialize
+from normalign_stereotype.core._ragged_reference import RaggedReference, ragged_reference
+from normalign_stereotype.tests._references import axis_reference
+
+
+def _classified():
+    classifiers = axis_reference("classification", [
+        lambda s: [f"{s}-{i}" for i in range(12)],
+        lambda s: [s],
+        lambda s: [],
+    ])
+    statements = axis_reference("statement", ["s0", "s1"])
+    return classifiers, statements
+
+
+def test_cross_action_stores_each_result_at_its_own_length():
+    classifiers, statements = _classified()
+    dense = cross_action(classifiers, statements, "instance")
+    ragged = cross_action(classifiers, statements, "instance", ragged=True)
+
+    assert isinstance(ragged, RaggedReference)
+    assert ragged.axes == dense.axes == ["classification", "statement", "instance"]
+    assert ragged.shape == tuple(dense.shape) == (3, 2, 12)
+    assert ragged.lengths == [12, 12, 1, 1, 0, 0]
+    assert ragged.offsets == [0, 12, 24, 25, 26, 26, 26]
+    assert len(ragged.values) == 26
+    assert ragged.tensor == dense.tensor
+    assert ragged.get(classification=1, statement=0) == dense.get(classification=1, statement=0)
+    assert ragged.row(classification=1, statement=1) == ["s1"]
+
+
+def test_operations_visit_only_the_items_of_each_row():
+    classifiers, statements = _classified()
+    dense = cross_action(classifiers, statements, "instance")
+    ragged = cross_action(classifiers, statements, "instance", ragged=True)
+
+    calls = []
+
+    def upper(item):
+        calls.append(item)
+        return item.upper()
+
+    result = element_action(upper, [ragged])
+    assert isinstance(result, RaggedReference)
+    assert len(calls) == 26
+    assert result.tensor == element_action(str.upper, [dense]).tensor
+
+    labels = axis_reference("statement", ["first", "second"])
+    product = cross_product([ragged, labels])
+    assert product.axes == ["classification", "statement", "instance"]
+    assert product.tensor == cross_product([dense, labels]).tensor
+
+    assert materialize(element_action(str.upper, [lazy_reference(ragged)])).tensor == result.tensor
+
+
+def test_slice_and_conversion():
+    classifiers, statements = _classified()
+    dense = cross_action(classifiers, statements, "instance")
+    ragged = ragged_reference(dense)
+    assert ragged.lengths == [12, 12, 1, 1, 0, 0]
+
+    reordered = ragged.slice("statement", "classification", "instance")
+    assert isinstance(reordered, RaggedReference)
+    assert reordered.tensor == dense.slice("statement", "classification", "instance").tensor
+    assert ragged.slice("instance", "statement").tensor == dense.slice("instance", "statement").tensor
+
+    restored = pickle.loads(pickle.dumps(ragged))
+    assert restored.values == ragged.values and restored.offsets == ragged.offsets
+
+
+def test_ragged_results_keep_the_dense_axis_order():
+    classifiers, statements = _classified()
+    dense = cross_action(classifiers, statements, "instance")
+    ragged = cross_action(classifiers, statements, "instance", ragged=True)
+    groups = axis_reference("group", ["g0", "g1"])
+
+    expected = cross_product([dense, groups])
+    product = cross_product([ragged, groups])
+    assert isinstance(product, RaggedReference)
+    assert product.axes == expected.axes == ["classification", "statement", "instance", "group"]
+    assert product.shape == tuple(expected.shape)
+    assert product.tensor == expected.tensor
+
+    joined = element_action(lambda g, i: f"{g}:{i}", [groups, ragged])
+    expected = element_action(lambda g, i: f"{g}:{i}", [groups, dense])
+    assert joined.axes == expected.axes == ["group", "classification", "statement", "instance"]
+    assert joined.tensor == expected.tensor
+
+
+def test_slice_reads_only_the_rows(monkeypatch):
+    classifiers, statements = _classified()
+    dense = cross_action(classifiers, statements, "instance")
+    ragged = cross_action(classifiers, statements, "instance", ragged=True)
+    monkeypatch.setattr(RaggedReference, "to_dense", lambda self: pytest.fail("padded copy"))
+
+    for axes in [("instance", "classification", "statement"), ("classification", "instance"),
+                 ("instance", "statement"), ("statement", "classification")]:
+        sliced = ragged.slice(*axes)
+        expected = dense.slice(*axes)
+        assert sliced.axes == expected.axes
+        assert tuple(sliced.shape) == tuple(expected.shape)
+        assert sliced.get() == expected.tensor
+
+    moved = ragged.slice("instance", "classification", "statement")
+    assert isinstance(moved, RaggedReference)
+    assert len(moved.values) == 26
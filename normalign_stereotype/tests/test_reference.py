@@ -0,0 +1,71 @@
+from normalign_stereotype.core._reference import Reference, ValueTable, cross_product, element_action
+from normalign_stereotype.tests._references import axis_reference
+
+
+def test_value_table_interns_equal_values():
+    table = ValueTable()
+    first = "".join(["long explanation ", ":Key"])
+    second = "".join(["long explanation ", ":Key"])
+    assert first is not second
+    assert table.intern(first) is table.intern(second)
+    cell = ["a", "b"]
+    assert table.intern(cell) is cell
+    assert table.encode(cell) is None
+    assert table.encode({"unhashable": []}) is None
+    assert len(table) == 1
+
+
+def test_equal_leaves_share_one_object():
+    explanation = "Paraguayans ride paragliders :Paragliding"
+    ref = axis_reference("x", [explanation[:10] + explanation[10:], explanation[:5] + explanation[5:]])
+    assert ref.get(x=0) is ref.get(x=1)
+
+
+def test_derived_references_own_their_value_table():
+    statements = axis_reference("statement", ["s :s"])
+    groups = axis_reference("target_group", ["a :a", "b :b"])
+    before = len(statements.value_table)
+    combined = cross_product([statements, groups])
+    assert combined.get(statement=0, target_group=1) == ["s :s", "b :b"]
+    # Broadcast leaves are the input objects, not copies
+    assert combined.get(statement=0, target_group=1)[0] is statements.get(statement=0)
+
+    upper = element_action(lambda cell: "/".join(cell).upper(), [combined])
+    assert upper.get(statement=0, target_group=0) == "S :S/A :A"
+    sliced = upper.slice("target_group")
+    for derived in (combined, upper, sliced):
+        assert derived.value_table is not statements.value_table
+    assert len(statements.value_table) == before
+
+
+def test_codes_mark_skips():
+    ref = axis_reference("x", ["a", "@#SKIP#@", "a"])
+    codes = ref.codes()
+    assert codes[0] == codes[2] != -1
+    assert codes[1] == -1
+
+
+def test_tensor_setter_computes_the_maximal_shape():
+    ref = Reference(["x"], (1,))
+    flat = ["a", "b", "c"]
+    ref.tensor = flat
+    assert ref.shape == (3,)
+    assert ref.tensor == flat and ref.tensor is not flat  # The caller's list is not aliased
+    flat.append("d")
+    assert ref.tensor == ["a", "b", "c"]
+
+    grid = Reference(["x", "y"], (1, 1))
+    grid.tensor = [["a"], ["b", "c", "d"], "@#SKIP#@"]
+    assert grid.shape == (3, 3)
+    assert grid.tensor == [["a", "@#SKIP#@", "@#SKIP#@"], ["b", "c", "d"], ["@#SKIP#@"] * 3]
+
+
+def test_replace_data_pads_only_irregular_data():
+    ref = Reference(["x", "y"], (2, 2))
+    regular = [["a", "b"], ["c", "d"]]
+    data = ref._replace_data(regular).data
+    assert data == regular and data is not regular and data[0] is not regular[0]
+    assert ref._replace_data([["a"], "@#SKIP#@"]).data == [["a", "@#SKIP#@"], ["@#SKIP#@", "@#SKIP#@"]]
+    # Leaves that are lists are not mistaken for an extra axis
+    pairs = Reference(["x"], (2,))._replace_data([["a", 1], ["b", 2]])
+    assert pairs.data == [["a", 1], ["b", 2]] and pairs.shape == (2,)
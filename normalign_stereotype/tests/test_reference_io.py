@@ -0,0 +1,62 @@
+import pytest
+
+from normalign_stereotype.core._reference import Reference, cross_product
+from normalign_stereotype.core._reference_io import MappedReference
+
+
+def _statements_by_groups():
+    statements = Reference(["statement"], (2,))
+    statements.set("Everyone in paraguay rides paragliding. :s1", statement=0)
+    statements.set("@#SKIP#@", statement=1)
+    groups = Reference(["target_group"], (3,))
+    for i, group in enumerate(["Paraguayans :paraguayans", "Tourists :tourists", "Pilots :pilots"]):
+        groups.set(group, target_group=i)
+    return cross_product([statements, groups])
+
+
+def test_save_load_round_trip(tmp_path):
+    ref = _statements_by_groups()
+    path = tmp_path / "ref.bin"
+    ref.save(str(path))
+
+    loaded = Reference.load(str(path))
+    assert loaded.axes == ref.axes
+    assert loaded.shape == tuple(ref.shape)
+    assert loaded.tensor == ref.tensor
+
+
+def test_padding_skips_are_preserved(tmp_path):
+    ref = Reference(["a", "b", "c"], (2, 2, 2))._replace_data([[["x", "y"], ["z", "w"]], "@#SKIP#@"])
+    path = tmp_path / "ref.bin"
+    ref.save(str(path))
+    loaded = Reference.load(str(path))
+    assert loaded.get(a=0, b=1, c=0) == "z"
+    assert loaded.get(a=1, b=0, c=1) == "@#SKIP#@"
+
+
+def test_lazy_load_get_and_select(tmp_path):
+    ref = _statements_by_groups()
+    path = tmp_path / "ref.bin"
+    ref.save(str(path))
+
+    with Reference.load(str(path), lazy=True) as mapped:
+        assert isinstance(mapped, MappedReference)
+        assert mapped.get(statement=0, target_group=2) == ref.get(statement=0, target_group=2)
+        assert mapped.get(statement=1) == ref.get(statement=1)
+        sub = mapped.select(target_group=slice(1, 3))
+        assert sub.shape == (2, 2)
+        assert sub.get(statement=0, target_group=0) == ref.get(statement=0, target_group=1)
+
+
+def test_repeated_leaves_are_stored_once(tmp_path):
+    ref = Reference(["x", "y"], (50, 50), initial_value="the same long explanation :Key")
+    path = tmp_path / "ref.bin"
+    ref.save(str(path))
+    with MappedReference(str(path)) as mapped:
+        assert mapped.n_values == 1
+
+
+def test_callable_leaves_are_rejected(tmp_path):
+    ref = Reference(["x"], (1,), initial_value=lambda z: [z])
+    with pytest.raises(TypeError):
+        ref.save(str(tmp_path / "ref.bin"))
@@ -0,0 +1,52 @@
+import pickle
+import sqlite3
+
+from normalign_stereotype.core._reference import Reference
+from normalign_stereotype.core._result_store import ResultStore
+
+from normalign_stereotype.tests.test_plan import _build_plan
+
+
+def test_append_and_query(tmp_path):
+    path = str(tmp_path / "results.db")
+    first = ResultStore(path, run="run-1", model="model-a")
+    with ResultStore.scope(statement="s1"):
+        first.append([("target_group", "Women", "Women are mentioned"), ("attribute", "Driving", "Bad drivers")])
+    first.append([("target_group", "Men", "Men are mentioned")], statement="s2")
+    second = ResultStore(path, run="run-2", model="model-b")
+    second.append([("target_group", "Women", "Women again")], statement="s1")
+
+    assert [row["explanation"] for row in first.query(concept="target_group", model="model-a")] == \
+        ["Women are mentioned", "Men are mentioned"]
+    assert first.query(concept="target_group", model="model-b") == [
+        {"run": "run-2", "model": "model-b", "statement": "s1", "concept": "target_group",
+         "key": "Women", "explanation": "Women again"}]
+    assert first.to_dict("s1") == {"Women (target_group)": "Women are mentioned",
+                                   "Driving (attribute)": "Bad drivers"}
+    assert first.runs() == [("run-1", "model-a"), ("run-2", "model-b")]
+
+    # The store survives pickling (as part of a worker's body) by reopening the database
+    assert pickle.loads(pickle.dumps(first)).query(run="run-1", statement="s2")[0]["key"] == "Men"
+
+
+def test_concept_and_model_queries_use_the_primary_key(tmp_path):
+    path = str(tmp_path / "results.db")
+    ResultStore(path)
+    plan = sqlite3.connect(path).execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM results WHERE concept = ? AND model = ?", ("c", "m")).fetchall()
+    assert "SEARCH results USING PRIMARY KEY" in " ".join(row[-1] for row in plan)
+
+
+def test_plan_execution_records_results_per_statement(tmp_path, monkeypatch):
+    plan = _build_plan(tmp_path, monkeypatch)
+    store = ResultStore(str(tmp_path / "results.db"), run="run", model="stub")
+    plan.agent.result_store = store
+
+    for statement in ("Men are strong", "Women are weak"):
+        plan.execute({"statement": Reference(axes=["statement"], shape=(1,),
+                                             initial_value=f"{statement} :{statement}")}, statement=statement)
+
+    rows = store.query(concept="answer", statement="Women are weak")
+    assert sorted((row["key"], row["explanation"]) for row in rows) == [
+        ("Instance A", "First instance found"), ("Instance B", "Second instance found")]
+    assert {row["statement"] for row in store.query(concept="answer")} == {"Men are strong", "Women are weak"}
@@ -0,0 +1,117 @@
+import pickle
+
+from normalign_stereotype.core._reference import Reference, cross_action, cross_product, element_action
+from normalign_stereotype.core._lazy_reference import lazy_reference, materialize
+from normalign_stereotype.core._sparse_reference import SparseReference, sparse_reference
+from normalign_stereotype.tests._references import axis_reference
+
+
+def _mostly_skipped():
+    ref = Reference(["statement", "group"], (3, 4), initial_value="@#SKIP#@")
+    ref.set("a", statement=0, group=1)
+    ref.set("b", statement=2, group=3)
+    ref.set("c", statement=2, group=0)
+    return ref
+
+
+def test_round_trip_stores_only_present_cells():
+    dense = _mostly_skipped()
+    sparse = sparse_reference(dense)
+
+    assert sparse.cells == {(0, 1): "a", (2, 3): "b", (2, 0): "c"}
+    assert sparse.density == 3 / 12
+    assert sparse.tensor == dense.tensor
+    assert sparse.get(statement=2) == dense.get(statement=2)
+    assert sparse.get(statement=1, group=1) == "@#SKIP#@"
+
+    sparse.set("@#SKIP#@", statement=2, group=0)
+    sparse.set("d", statement=1)
+    assert (2, 0) not in sparse.cells
+    assert sparse.get(statement=1) == ["d"] * 4
+
+    restored = pickle.loads(pickle.dumps(sparse))
+    assert restored.cells == sparse.cells
+
+
+def test_operations_match_dense_and_visit_only_the_support():
+    dense = _mostly_skipped()
+    sparse = sparse_reference(dense)
+    labels = axis_reference("group", ["g0", "g1", "g2", "g3"])
+
+    calls = []
+
+    def label(value, group):
+        calls.append((value, group))
+        return f"{value}:{group}"
+
+    expected = element_action(label, [dense, labels])
+    assert len(calls) == 3
+    calls.clear()
+    result = element_action(label, [sparse, labels])
+    assert isinstance(result, SparseReference)
+    assert len(calls) == 3
+    assert result.tensor == expected.tensor
+
+    assert cross_product([sparse, labels]).tensor == cross_product([dense, labels]).tensor
+
+    functions = axis_reference("classification", [lambda v: [v, v + "!"], lambda v: []])
+    applied = []
+
+    def spy(func):
+        return lambda v: applied.append(v) or func(v)
+
+    functions = element_action(spy, [functions])
+    dense_result = cross_action(functions, dense, "result")
+    assert len(applied) == 6
+    applied.clear()
+    sparse_result = cross_action(functions, sparse, "result")
+    assert len(applied) == 6
+    assert sparse_result.axes == dense_result.axes == ["classification", "statement", "group", "result"]
+    assert sparse_result.shape == tuple(dense_result.shape)
+    assert sparse_result.tensor == dense_result.tensor
+    # Classifiers returning [] leave no cells behind
+    assert all(coord[0] == 0 for coord in sparse_result.cells)
+
+
+def test_sparse_inputs_are_joined_on_shared_axes():
+    left = SparseReference(["x", "y"], (100, 100), {(1, 2): "a", (50, 7): "b"})
+    right = SparseReference(["y", "z"], (100, 100), {(2, 3): "c", (8, 0): "d"})
+
+    product = cross_product([left, right])
+    assert product.axes == ["x", "y", "z"]
+    assert product.cells == {(1, 2, 3): ["a", "c"]}
+
+
+def test_slice_matches_dense():
+    dense = _mostly_skipped()
+    dense.set("e", statement=1)
+    sparse = sparse_reference(dense)
+
+    for axes in (("group", "statement"), ("statement",), ("group",)):
+        assert sparse.slice(*axes).tensor == dense.slice(*axes).tensor
+
+
+def test_lazy_references_read_sparse_sources():
+    sparse = sparse_reference(_mostly_skipped())
+    upper = element_action(str.upper, [lazy_reference(sparse)])
+    assert materialize(upper).tensor == element_action(str.upper, [sparse]).tensor
+
+
+def test_cognition_keeps_a_mostly_skipped_result_sparse(tmp_path):
+    from normalign_stereotype.core._agent import Agent
+    from normalign_stereotype.core._concept import Concept
+    from normalign_stereotype.examples.stub_llm import StubLLM
+
+    agent = Agent({"llm": StubLLM(), "memory_location": str(tmp_path / "memory.db")})
+    raw = Reference(["statement", "answer"], (3, 4), initial_value="@#SKIP#@")
+    raw.set("First :Instance A", statement=0, answer=1)
+    raw.set("Second :Instance B", statement=2, answer=3)
+
+    names = agent.cognition(Concept("answer", "ctx", raw))
+    assert isinstance(names, SparseReference)
+    assert names.cells == {(0, 1): "Instance A", (2, 3): "Instance B"}
+    assert agent.memory.to_dict() == {"Instance A (answer)": "First", "Instance B (answer)": "Second"}
+
+    raw.set("Third :Instance C", statement=1)
+    assert isinstance(agent.cognition(Concept("answer", "ctx", raw)), Reference)
+    agent.close()
@@ -0,0 +1,106 @@
+from types import SimpleNamespace
+
+import pytest
+
+from normalign_stereotype.core._modified_llm import StreamingListParser, StructuredLLM
+
+
+class StreamingClient:
+    """chat.completions client streaming a fixed answer a few characters at a time"""
+
+    def __init__(self, answer, chunk_size=4):
+        self.answer = answer
+        self.chunk_size = chunk_size
+        self.sent = 0
+        self.closed = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream=False, **kwargs):
+        assert stream
+        client = self
+
+        class Stream:
+            def __iter__(self):
+                for i in range(0, len(client.answer), client.chunk_size):
+                    client.sent += 1
+                    delta = SimpleNamespace(content=client.answer[i:i + client.chunk_size])
+                    yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+                client.sent += 1
+                usage = SimpleNamespace(prompt_tokens=10, completion_tokens=20, total_tokens=30)
+                yield SimpleNamespace(choices=[], usage=usage)
+
+            def close(self):
+                client.closed += 1
+
+        return Stream()
+
+
+def _feed(parser, text, chunk_size=3):
+    for i in range(0, len(text), chunk_size):
+        if parser.feed(text[i:i + chunk_size]) != parser.PENDING:
+            break
+    return parser.state
+
+
+def test_parser_skips_reasoning_and_stops_at_list_end():
+    parser = StreamingListParser()
+    text = ('<think>Maybe [1, 2] or ["no"]?</think> Here: [1] is not it. '
+            '["A, with [brackets] :Key A", \'It\\\'s B :Key B\'] trailing text never read')
+    assert _feed(parser, text) == parser.COMPLETE
+    assert parser.finish() == ["A, with [brackets] :Key A", "It's B :Key B"]
+    assert not parser.text.endswith("read")
+
+
+def test_parser_flags_invalid_entries_and_missing_list():
+    parser = StreamingListParser()
+    assert _feed(parser, '["no colon here", "x :y"] more') == parser.INVALID
+    assert "Invalid entry" in parser.error
+
+    parser = StreamingListParser(max_preamble_chars=20)
+    assert _feed(parser, "I will ramble for a long while without any list") == parser.INVALID
+
+    parser = StreamingListParser()
+    _feed(parser, "just text")
+    with pytest.raises(ValueError):
+        parser.finish()
+
+
+def test_parser_preamble_limit_ignores_reasoning():
+    parser = StreamingListParser(max_preamble_chars=20)
+    text = "<think>" + "a long chain of thought " * 20 + "</think> Sure: [\"x :y\"]"
+    assert _feed(parser, text) == parser.COMPLETE
+    assert parser.finish() == ["x :y"]
+
+
+def test_shared_parser_keeps_slash_n():
+    from normalign_stereotype.core._tools import _parse_structured_output
+
+    assert _parse_structured_output('Sure: ["See https://x.org/news :Link"]') == ["See https://x.org/news :Link"]
+
+
+def test_structured_llm_stream_cancels_after_list(tmp_path, monkeypatch):
+    monkeypatch.setenv("DASHSCOPE_API_KEY", "test")
+    settings = tmp_path / "settings.yaml"
+    settings.write_text("m: {MODEL: m}\n", encoding="utf-8")
+    answer = '["Engineers build things :Engineering"]' + " and then a very long epilogue" * 20
+    client = StreamingClient(answer)
+
+    llm = StructuredLLM("m", stream=True, settings_path=str(settings))
+    llm.client = client
+    assert llm.invoke("question") == str(["Engineers build things :Engineering"])
+    assert client.closed == 1
+    assert client.sent < len(answer) // client.chunk_size
+    assert llm.stream_stats == {"attempts": 1, "stopped_early": 1}
+    # The usage chunk never arrived: usage is estimated from what was received
+    assert llm.token_usage.completion_tokens > 0
+
+
+def test_structured_llm_stream_retries_on_bad_format(tmp_path, monkeypatch):
+    monkeypatch.setenv("DASHSCOPE_API_KEY", "test")
+    settings = tmp_path / "settings.yaml"
+    settings.write_text("m: {MODEL: m}\n", encoding="utf-8")
+
+    llm = StructuredLLM("m", stream=True, settings_path=str(settings))
+    llm.client = StreamingClient('["missing the separator"]')
+    assert llm.structured_invoke("question", max_retries=2) == []
+    assert llm.stream_stats == {"attempts": 2, "stopped_early": 2}
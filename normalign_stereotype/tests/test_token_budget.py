@@ -0,0 +1,70 @@
+import pytest
+
+from normalign_stereotype.core._token_budget import (
+    TokenLedger, estimate_tokens, truncate_to_tokens, fit_input_value
+)
+
+
+def test_estimate_tokens_grows_with_text():
+    assert estimate_tokens("") == 0
+    short = estimate_tokens("Engineers do engineering jobs.")
+    long = estimate_tokens("Engineers do engineering jobs. " * 20)
+    assert 0 < short < long
+
+
+def test_truncate_keeps_head_and_tail():
+    text = "start " + "filler words " * 200 + ":Final Key"
+    truncated = truncate_to_tokens(text, 40)
+    assert estimate_tokens(truncated) <= 40
+    assert truncated.startswith("start")
+    assert truncated.endswith("Key")
+    assert "[truncated]" in truncated
+    assert truncate_to_tokens("fits", 40) == "fits"
+
+
+def test_fit_input_value_respects_prompt_limit():
+    prompt = "Find from: \"{input_value}\" please."
+    value = "explanation " * 500
+    fitted = fit_input_value(prompt, value, 100)
+    assert estimate_tokens(prompt.replace("{input_value}", fitted)) <= 100
+
+
+def test_oversized_prompts_are_rejected_not_cut():
+    from normalign_stereotype.core._tools import LLMTool
+
+    with pytest.raises(ValueError):
+        fit_input_value("Instructions " * 100 + "{input_value}", "value", 20)
+
+    tool = LLMTool.__new__(LLMTool)
+    tool.max_prompt_tokens = 50
+    prompt = "Answer in this format: [...]\n" + "context " * 200
+    with pytest.raises(ValueError):
+        tool._prepare_request(prompt, None, None, {})
+    tool.max_prompt_tokens = 1000
+    messages, _ = tool._prepare_request(prompt, None, None, {})
+    assert messages[1]["content"] == prompt
+
+
+def test_fit_input_value_summarize_policy():
+    class Summarizer:
+        def invoke(self, prompt):
+            return "short summary :Key"
+
+    fitted = fit_input_value("{input_value}", "long " * 500, 50, policy="summarize", summarizer=Summarizer())
+    assert fitted == "short summary :Key"
+
+
+def test_ledger_aggregates_by_scope():
+    ledger = TokenLedger()
+    with ledger.scope(plan="p"):
+        with ledger.scope(inference="i1", concept="a"):
+            ledger.record(10, 5)
+            ledger.record(1, 1)
+        with ledger.scope(inference="i2", concept="b"):
+            ledger.record(3, 2, 6)
+
+    assert ledger.by_concept()["a"].total_tokens == 17
+    assert ledger.by_concept()["b"].total_tokens == 6
+    assert ledger.by_inference()["i1"].calls == 2
+    assert ledger.by_plan()["p"].prompt_tokens == 14
+    assert ledger.total().total_tokens == 23
@@ -0,0 +1,120 @@
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+def _is_classification(node: str) -> bool:
+    return "classification" in node.lower()
+
+
+class AncestryIndex:
+    """Conditional ancestry of a DAG computed with integer bitsets.
+
+    Nodes get integer IDs; the ancestry of a node is a Python int whose bit i is set
+    when node i belongs to it. Inheriting from a parent is a single OR of two ints
+    instead of copying and unioning sets, so the whole computation stays close to
+    linear in the number of edges.
+
+    Attributes:
+        nodes: Node names, indexed by ID
+        ids: Node name -> ID
+        parents: ID -> parent IDs, in edge order
+        order: Node IDs in topological order
+        position: Node name -> index in the topological order
+    """
+
+    def __init__(self, nodes: Iterable[str], edges: Iterable[Tuple[str, str]]):
+        self.nodes: List[str] = []
+        self.ids: Dict[str, int] = {}
+        for node in nodes:
+            self._id(node)
+        edges = [(self._id(src), self._id(dst)) for src, dst in edges]
+        self.parents: List[List[int]] = [[] for _ in self.nodes]
+        children: List[List[int]] = [[] for _ in self.nodes]
+        for src, dst in edges:
+            self.parents[dst].append(src)
+            children[src].append(dst)
+
+        self.order: List[int] = self._topological_order(children)
+        self.position: Dict[str, int] = {self.nodes[i]: pos for pos, i in enumerate(self.order)}
+
+    @classmethod
+    def from_graph(cls, G) -> "AncestryIndex":
+        """Build the index from a networkx-style graph, keeping each node's predecessor order"""
+        nodes = list(G.nodes())
+        return cls(nodes, [(parent, node) for node in nodes for parent in G.predecessors(node)])
+
+    def _id(self, node: str) -> int:
+        node_id = self.ids.get(node)
+        if node_id is None:
+            node_id = len(self.nodes)
+            self.ids[node] = node_id
+            self.nodes.append(node)
+        return node_id
+
+    def _topological_order(self, children: List[List[int]]) -> List[int]:
+        in_degree = [len(parents) for parents in self.parents]
+        queue = deque(i for i, degree in enumerate(in_degree) if degree == 0)
+        order = []
+        while queue:
+            i = queue.popleft()
+            order.append(i)
+            for child in children[i]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    queue.append(child)
+        if len(order) != len(self.nodes):
+            raise ValueError("Graph contains a cycle; ancestry requires a DAG")
+        return order
+
+    def compute_bits(self, dominating_keys: Iterable[str]) -> List[int]:
+        """Ancestry bitset of every node (indexed by node ID), following the rules of compute_ancestry"""
+        dominating = [False] * len(self.nodes)
+        for key in dominating_keys:
+            if key in self.ids:
+                dominating[self.ids[key]] = True
+        classification = [_is_classification(node) for node in self.nodes]
+
+        bits = [0] * len(self.nodes)
+        for i in self.order:
+            parents = self.parents[i]
+            if not parents:
+                bits[i] = 0 if dominating[i] else 1 << i
+                continue
+
+            dominating_parent = next((p for p in parents if dominating[p]), None)
+            if dominating_parent is not None:
+                bits[i] = bits[dominating_parent]
+                continue
+
+            mask = 1 << i
+            for p in parents:
+                if classification[p]:
+                    mask |= bits[p] & ~(1 << p)
+                else:
+                    mask |= bits[p] | (1 << p)
+            bits[i] = mask
+        return bits
+
+    def decode(self, mask: int) -> Set[str]:
+        """Node names whose bits are set in mask"""
+        # Scan the binary digits (lowest bit first) with str.find, which skips zeros at C speed
+        digits = bin(mask)[:1:-1]
+        members = set()
+        i = digits.find("1")
+        while i != -1:
+            members.add(self.nodes[i])
+            i = digits.find("1", i + 1)
+        return members
+
+    def ancestry(self, dominating_keys: Iterable[str]) -> Dict[str, Set[str]]:
+        """Ancestry sets keyed by node name, in topological order"""
+        bits = self.compute_bits(dominating_keys)
+        # Nodes below a dominating parent share its mask: decode each distinct mask once
+        decoded: Dict[int, Set[str]] = {}
+        ancestry = {}
+        for i in self.order:
+            mask = bits[i]
+            if mask not in decoded:
+                decoded[mask] = self.decode(mask)
+            ancestry[self.nodes[i]] = decoded[mask].copy()
+        return ancestry
@@ -1,6 +1,9 @@
 import sys
 import networkx as nx
 
+from ancestry import AncestryIndex
+from labeling import DEFAULT_RULES
+
 def compute_ancestry(G, dominating_keys):
     """
     Compute the conditional ancestry for each node in a DAG according to the following rules:
@@ -14,72 +17,15 @@ def compute_ancestry(G, dominating_keys):
          then that parent's own identifier is excluded (removed from its ancestry) when inherited.
       4. Dominating keys: If any direct parent is in the `dominating_keys` set, then the node's ancestry
          becomes exactly that parent's ancestry (note: the node itself is not added in this case).
+
+    Ancestry sets are computed as integer bitsets (see ancestry.AncestryIndex) and only
+    converted to sets of node names at the end.
     """
-    ancestry = {}
-    for node in nx.topological_sort(G):
-        parents = list(G.predecessors(node))
-        
-        if not parents:
-            if node in dominating_keys:
-                ancestry[node] = set()
-            else:
-                ancestry[node] = {node}
-        else:
-            dominating_parent = None
-            for p in parents:
-                if p in dominating_keys:
-                    dominating_parent = p
-                    break
-                    
-            if dominating_parent is not None:
-                ancestry[node] = ancestry[dominating_parent].copy()
-            else:
-                contributions = set()
-                for p in parents:
-                    parent_ancestry = ancestry[p].copy()
-                    if "classification" in p.lower():
-                        parent_ancestry.discard(p)
-                    contributions = contributions.union(parent_ancestry)
-                    
-                    if "classification" not in p.lower():
-                        contributions.add(p)
-                # Always add the node itself to its ancestry when inheriting from non-dominating parents
-                ancestry[node] = contributions.union({node})
-    return ancestry
+    return AncestryIndex.from_graph(G).ancestry(dominating_keys)
 
 def get_dominating_keys(G):
-    """Get the set of dominating keys based on the specified rules."""
-    dominating_keys = set()
-    
-    # Add nodes containing "attributes" except "harmful_attributes" and classification nodes
-    for node in G.nodes():
-        if ("attributes" in node and 
-            "harmful_attributes" not in node and 
-            "classification" not in node.lower()):
-            dominating_keys.add(node)
-            
-    # Add nodes containing "attribution_form" except "attribution_form" and classification nodes
-    for node in G.nodes():
-        if ("attribution_form" in node and 
-            node != "attribution_form" and 
-            "classification" not in node.lower()):
-            dominating_keys.add(node)
-            
-    # Add nodes containing "target_groups" except "sensitive_target_groups" and classification nodes
-    for node in G.nodes():
-        if ("target_groups" in node and 
-            "sensitive_target_groups" not in node and 
-            "classification" not in node.lower()):
-            dominating_keys.add(node)
-            
-    # Add nodes containing "adopting_subjects" except "abnormal_adopting_subjects" and classification nodes
-    for node in G.nodes():
-        if ("adopting_subjects" in node and 
-            "abnormal_adopting_subjects" not in node and 
-            "classification" not in node.lower()):
-            dominating_keys.add(node)
-            
-    return dominating_keys
+    """Get the set of dominating keys based on the stereotype rules (see labeling.STEREOTYPE_RULES)."""
+    return DEFAULT_RULES.dominating_keys(G.nodes())
 
 if __name__ == "__main__":
     # If a DOT filename is provided as a command-line argument, try to load it.
@@ -0,0 +1,117 @@
+"""Benchmark of ancestry computation on synthetic DAGs.
+
+Compares the bitset AncestryIndex against the previous set-copying implementation
+and checks that both give the same result.
+
+    python process_dot/bench_ancestry.py --nodes 500 1000 2000 4000
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Set, Tuple
+
+from ancestry import AncestryIndex
+
+
+def synthetic_dag(n_nodes: int, max_parents: int = 3, window: int = 50, seed: int = 0
+                  ) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Layered random DAG shaped like generated concept graphs.
+
+    Each node takes up to max_parents parents among the window nodes before it, so the
+    graph is deep (long ancestry chains). About a tenth of the nodes are classification
+    nodes, and names include the substrings get_dominating_keys looks for.
+    """
+    rng = random.Random(seed)
+    kinds = ["concept", "attributes", "target_groups", "adopting_subjects", "concept", "concept"]
+    nodes = []
+    for i in range(n_nodes):
+        name = f"{rng.choice(kinds)}_{i}"
+        if rng.random() < 0.1:
+            name += "_classification"
+        nodes.append(name)
+
+    edges = []
+    for i in range(1, n_nodes):
+        low = max(0, i - window)
+        for parent in rng.sample(range(low, i), min(i - low, rng.randint(1, max_parents))):
+            edges.append((nodes[parent], nodes[i]))
+    return nodes, edges
+
+
+def dominating_keys_for(nodes: List[str]) -> Set[str]:
+    return {node for node in nodes
+            if ("attributes" in node or "target_groups" in node or "adopting_subjects" in node)
+            and "classification" not in node.lower()}
+
+
+def legacy_ancestry(nodes: List[str], edges: List[Tuple[str, str]], dominating_keys: Set[str]
+                    ) -> Dict[str, Set[str]]:
+    """The set-based algorithm compute_ancestry used before, including its O(V) index lookups."""
+    parents: Dict[str, List[str]] = {node: [] for node in nodes}
+    for src, dst in edges:
+        parents[dst].append(src)
+    # Input nodes are already in topological order
+    nodes_topo = list(nodes)
+
+    ancestry = {}
+    for node in nodes_topo:
+        node_parents = sorted(parents[node], key=nodes_topo.index)
+        if not node_parents:
+            ancestry[node] = set() if node in dominating_keys else {node}
+            continue
+        dominating_parent = next((p for p in parents[node] if p in dominating_keys), None)
+        if dominating_parent is not None:
+            ancestry[node] = ancestry[dominating_parent].copy()
+            continue
+        contributions = set()
+        for p in node_parents:
+            parent_ancestry = ancestry[p].copy()
+            if "classification" in p.lower():
+                parent_ancestry.discard(p)
+            contributions = contributions.union(parent_ancestry)
+            if "classification" not in p.lower():
+                contributions.add(p)
+        ancestry[node] = contributions.union({node})
+    return ancestry
+
+
+def run(sizes: List[int], repeat: int = 3, check: bool = True) -> List[Dict[str, float]]:
+    results = []
+    for n_nodes in sizes:
+        nodes, edges = synthetic_dag(n_nodes)
+        dominating_keys = dominating_keys_for(nodes)
+
+        if check and legacy_ancestry(nodes, edges, dominating_keys) != \
+                AncestryIndex(nodes, edges).ancestry(dominating_keys):
+            raise AssertionError(f"Ancestry mismatch on a {n_nodes}-node DAG")
+
+        timings = {}
+        for name, func in (
+            ("legacy", lambda: legacy_ancestry(nodes, edges, dominating_keys)),
+            ("bitset", lambda: AncestryIndex(nodes, edges).ancestry(dominating_keys)),
+            ("bitset_bits_only", lambda: AncestryIndex(nodes, edges).compute_bits(dominating_keys)),
+        ):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+        results.append({"nodes": n_nodes, "edges": len(edges), **timings})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[500, 1000, 2000, 4000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'nodes':>7} {'edges':>7} {'legacy (s)':>11} {'bitset (s)':>11} {'bits only (s)':>14} {'speedup':>8}")
+    for row in run(args.nodes, args.repeat):
+        print(f"{row['nodes']:>7} {row['edges']:>7} {row['legacy']:>11.4f} {row['bitset']:>11.4f} "
+              f"{row['bitset_bits_only']:>14.4f} {row['legacy'] / row['bitset']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
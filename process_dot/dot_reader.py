@@ -0,0 +1,275 @@
+import re
+from typing import Dict, List, Tuple, Iterator
+
+
+class DotSyntaxError(ValueError):
+    """Raised when a DOT file cannot be tokenized or parsed."""
+
+    def __init__(self, message: str, line: int):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+class DotGraph:
+    """Nodes, edges and attributes read from a DOT file.
+
+    Attributes:
+        name: Graph name (or "" if anonymous)
+        directed: True for digraph
+        context: Text of a leading "###" preamble before the graph, if any
+        graph_attrs: Graph-level attributes
+        nodes: Node name -> attributes, in order of first appearance (declared or used in an edge)
+        edges: (source, destination, attributes) in file order
+    """
+
+    def __init__(self):
+        self.name: str = ""
+        self.directed: bool = True
+        self.context: str = ""
+        self.graph_attrs: Dict[str, str] = {}
+        self.nodes: Dict[str, Dict[str, str]] = {}
+        self.edges: List[Tuple[str, str, Dict[str, str]]] = []
+
+    def __repr__(self):
+        return f"DotGraph(name={self.name!r}, nodes={len(self.nodes)}, edges={len(self.edges)})"
+
+
+_TOKEN_SPEC = [
+    # Lines starting with '#' (after optional indentation) are treated as comments
+    ("PREPROCESSOR", r"(?m:^[^\S\n]*#[^\n]*)"),
+    ("WS", r"[^\S\n]+"),
+    ("NEWLINE", r"\n"),
+    ("LINE_COMMENT", r"//[^\n]*"),
+    ("BLOCK_COMMENT", r"/\*.*?\*/"),
+    ("STRING", r'"(?:\\.|[^"\\])*"'),
+    ("EDGEOP", r"->|--"),
+    ("PUNCT", r"[{}\[\];,=:]"),
+    ("HTML", r"<"),
+    # Lenient unquoted IDs: anything but whitespace, punctuation, quotes and edge operators
+    ("ID", r"(?:[^\s{}\[\];,=:\"<>\-/#]|-(?![->])|/(?![/*])|#)+"),
+]
+_TOKEN_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in _TOKEN_SPEC), re.DOTALL)
+
+_KEYWORDS = {"strict", "graph", "digraph", "node", "edge", "subgraph"}
+
+
+def _read_html(text: str, start: int, line: int) -> Tuple[str, int]:
+    """Read a balanced <...> HTML string starting at text[start] == '<'"""
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == "<":
+            depth += 1
+        elif text[i] == ">":
+            depth -= 1
+            if depth == 0:
+                return text[start + 1:i], i + 1
+    raise DotSyntaxError("Unterminated HTML string", line)
+
+
+def tokenize_dot(text: str) -> Iterator[Tuple[str, str, int]]:
+    """Yield (kind, value, line) tokens; kinds are ID, EDGEOP, PUNCT and KEYWORD. Comments are dropped."""
+    position = 0
+    line = 1
+    length = len(text)
+    while position < length:
+        match = _TOKEN_RE.match(text, position)
+        if not match:
+            raise DotSyntaxError(f"Unexpected character {text[position]!r}", line)
+        kind = match.lastgroup
+        value = match.group()
+        if kind == "HTML":
+            html, position = _read_html(text, position, line)
+            yield "ID", html, line
+            line += html.count("\n")
+            continue
+        position = match.end()
+        if kind == "NEWLINE":
+            line += 1
+        elif kind in ("WS", "LINE_COMMENT", "PREPROCESSOR"):
+            pass
+        elif kind == "BLOCK_COMMENT":
+            line += value.count("\n")
+        elif kind == "STRING":
+            # Unescape quotes and join "\<newline>" continuations
+            yield "ID", value[1:-1].replace('\\"', '"').replace("\\\n", ""), line
+            line += value.count("\n")
+        elif kind == "ID" and value.lower() in _KEYWORDS:
+            yield "KEYWORD", value.lower(), line
+        else:
+            yield kind, value, line
+
+
+class _Parser:
+    """Recursive-descent parser over the token stream, following the DOT grammar."""
+
+    def __init__(self, tokens: List[Tuple[str, str, int]], graph: DotGraph):
+        self.tokens = tokens
+        self.position = 0
+        self.graph = graph
+        # Node names mentioned inside each currently open subgraph
+        self._scopes: List[List[str]] = []
+
+    def _peek(self, offset=0):
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else ("EOF", "", self.tokens[-1][2] if self.tokens else 1)
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _accept(self, kind, value=None):
+        token = self._peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.position += 1
+            return token
+        return None
+
+    def _expect(self, kind, value=None):
+        token = self._accept(kind, value)
+        if token is None:
+            found = self._peek()
+            raise DotSyntaxError(f"Expected {value or kind}, found {found[1] or found[0]!r}", found[2])
+        return token
+
+    def parse(self):
+        self._accept("KEYWORD", "strict")
+        kind = self._expect("KEYWORD")
+        if kind[1] not in ("graph", "digraph"):
+            raise DotSyntaxError(f"Expected graph or digraph, found {kind[1]!r}", kind[2])
+        self.graph.directed = kind[1] == "digraph"
+        name = self._accept("ID")
+        self.graph.name = name[1] if name else ""
+        self._expect("PUNCT", "{")
+        self._statements({"node": {}, "edge": {}})
+        self._expect("PUNCT", "}")
+        return self.graph
+
+    def _statements(self, defaults):
+        while True:
+            token = self._peek()
+            if token[0] == "EOF" or (token[0] == "PUNCT" and token[1] == "}"):
+                return
+            self._statement(defaults)
+            self._accept("PUNCT", ";")
+
+    def _attr_list(self):
+        attrs = {}
+        while self._accept("PUNCT", "["):
+            while not self._accept("PUNCT", "]"):
+                key = self._expect("ID")[1]
+                value = "true"
+                if self._accept("PUNCT", "="):
+                    value = self._expect("ID")[1]
+                attrs[key] = value
+                self._accept("PUNCT", ",") or self._accept("PUNCT", ";")
+        return attrs
+
+    def _touch(self, name, defaults, attrs=None):
+        """Create the node with the current defaults if new, apply explicit attributes, record scope membership"""
+        if name not in self.graph.nodes:
+            self.graph.nodes[name] = dict(defaults["node"])
+        if attrs:
+            self.graph.nodes[name].update(attrs)
+        for scope in self._scopes:
+            if name not in scope:
+                scope.append(name)
+
+    def _node_id(self):
+        name = self._expect("ID")[1]
+        # Ports (node:port[:compass]) do not change node identity
+        while self._accept("PUNCT", ":"):
+            self._expect("ID")
+        return name
+
+    def _endpoint(self, defaults):
+        """An edge endpoint: a node id or a subgraph, returned as the list of node names it stands for"""
+        token = self._peek()
+        if token[0] == "KEYWORD" and token[1] == "subgraph" or token[0] == "PUNCT" and token[1] == "{":
+            return self._subgraph(defaults)
+        name = self._node_id()
+        self._touch(name, defaults)
+        return [name]
+
+    def _subgraph(self, defaults):
+        if self._accept("KEYWORD", "subgraph"):
+            self._accept("ID")
+        self._expect("PUNCT", "{")
+        self._scopes.append([])
+        self._statements({"node": dict(defaults["node"]), "edge": dict(defaults["edge"])})
+        members = self._scopes.pop()
+        self._expect("PUNCT", "}")
+        return members
+
+    def _statement(self, defaults):
+        token = self._peek()
+
+        if token[0] == "KEYWORD" and token[1] in ("graph", "node", "edge"):
+            self._next()
+            attrs = self._attr_list()
+            if token[1] == "graph":
+                self.graph.graph_attrs.update(attrs)
+            else:
+                defaults[token[1]].update(attrs)
+            return
+
+        # ID '=' ID graph attribute
+        if token[0] == "ID" and self._peek(1)[0] == "PUNCT" and self._peek(1)[1] == "=":
+            self._next()
+            self._next()
+            self.graph.graph_attrs[token[1]] = self._expect("ID")[1]
+            return
+
+        if token[0] == "KEYWORD" and token[1] == "subgraph" or token[0] == "PUNCT" and token[1] == "{":
+            sources = self._subgraph(defaults)
+        elif token[0] == "ID":
+            sources = None
+        else:
+            raise DotSyntaxError(f"Unexpected token {token[1]!r}", token[2])
+
+        if sources is None:
+            name = self._node_id()
+            if self._peek()[0] != "EDGEOP":
+                self._touch(name, defaults, self._attr_list())
+                return
+            self._touch(name, defaults)
+            sources = [name]
+
+        chain = [sources]
+        while self._accept("EDGEOP"):
+            chain.append(self._endpoint(defaults))
+        if len(chain) == 1:
+            return
+        attrs = {**defaults["edge"], **self._attr_list()}
+        for left, right in zip(chain, chain[1:]):
+            for src in left:
+                for dst in right:
+                    self.graph.edges.append((src, dst, dict(attrs)))
+
+
+def read_dot(text: str) -> DotGraph:
+    """Parse DOT source into a DotGraph.
+
+    Supports quoted, unquoted and HTML IDs, attribute lists, default node/edge attributes,
+    edge chains, subgraphs and C/C++ style comments. A "###" preamble before the graph is
+    kept as the graph context.
+
+    Args:
+        text: DOT source
+
+    Returns:
+        The parsed DotGraph
+
+    Raises:
+        DotSyntaxError: If the source is not valid DOT
+    """
+    graph = DotGraph()
+    context_match = re.match(r"\s*###(.*?)(?=^[^\S\n]*(?:strict\s+)?(?:di)?graph\b|\Z)", text,
+                             re.DOTALL | re.IGNORECASE | re.MULTILINE)
+    if context_match:
+        graph.context = context_match.group(1).strip()
+        text = text[context_match.end():]
+    tokens = list(tokenize_dot(text))
+    if not tokens:
+        raise DotSyntaxError("Empty DOT source", 1)
+    return _Parser(tokens, graph).parse()
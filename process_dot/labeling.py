@@ -0,0 +1,256 @@
+"""Ancestry labeling of DOT inference graphs.
+
+Adds an xlabel with each node's conditional ancestry (see ancestry.AncestryIndex) to a
+DOT graph. Nodes whose ancestry is inherited wholesale by their children ("dominating
+keys") are selected by declarative rules, compiled once per process.
+
+Label every DOT file of a directory in parallel:
+
+    python process_dot/labeling.py input_dir output_dir --workers 4 [--rules rules.yaml]
+"""
+import argparse
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from ancestry import AncestryIndex
+from dot_reader import DotGraph, read_dot
+
+
+# Rules used for the stereotype graphs. A node is a dominating key when it contains one
+# of the "contains" substrings, none of that rule's "unless_contains" substrings, is not
+# one of its "unless_equals" names and (by default) is not a classification node.
+STEREOTYPE_RULES: List[Dict[str, Any]] = [
+    {"contains": "attributes", "unless_contains": ["harmful_attributes"]},
+    {"contains": "attribution_form", "unless_equals": ["attribution_form"]},
+    {"contains": "target_groups", "unless_contains": ["sensitive_target_groups"]},
+    {"contains": "adopting_subjects", "unless_contains": ["abnormal_adopting_subjects"]},
+]
+
+
+class DominatingKeyRules:
+    """A compiled set of dominating-key rules.
+
+    All "contains" substrings are merged into one regular expression, so a node that
+    matches no rule (the common case) is rejected with a single scan before the per-rule
+    exclusions are looked at.
+
+    Args:
+        rules: List of {"contains": str, "unless_contains": [str], "unless_equals": [str]}
+        exclude_classification: Never select nodes whose name contains "classification"
+            (case insensitive)
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], exclude_classification: bool = True):
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        for rule in rules:
+            if not isinstance(rule, dict) or not rule.get("contains"):
+                raise ValueError(f"Rule must be a dict with a 'contains' substring: {rule!r}")
+            unknown = set(rule) - {"contains", "unless_contains", "unless_equals"}
+            if unknown:
+                raise ValueError(f"Unknown rule fields {sorted(unknown)} in {rule!r}")
+            self.rules[rule["contains"]] = {
+                "unless_contains": tuple(rule.get("unless_contains", ())),
+                "unless_equals": frozenset(rule.get("unless_equals", ())),
+            }
+        self.exclude_classification = exclude_classification
+        alternatives = "|".join(re.escape(s) for s in self.rules)
+        self._pattern = re.compile(alternatives) if alternatives else None
+
+    @classmethod
+    def from_file(cls, path: str) -> "DominatingKeyRules":
+        """Load rules from a JSON or YAML file holding a list of rules, or a mapping with
+        "rules" and optionally "exclude_classification"."""
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        if path.endswith((".yaml", ".yml")):
+            import yaml
+            spec = yaml.safe_load(text)
+        else:
+            spec = json.loads(text)
+        if isinstance(spec, list):
+            return cls(spec)
+        if isinstance(spec, dict) and "rules" in spec:
+            return cls(spec["rules"], spec.get("exclude_classification", True))
+        raise ValueError(f"{path} must hold a list of rules or a mapping with a 'rules' list")
+
+    def matches(self, node: str) -> bool:
+        if self._pattern is None:
+            return False
+        if self.exclude_classification and "classification" in node.lower():
+            return False
+        if not self._pattern.search(node):
+            return False
+        for contains, rule in self.rules.items():
+            if contains not in node or node in rule["unless_equals"]:
+                continue
+            if any(s in node for s in rule["unless_contains"]):
+                continue
+            return True
+        return False
+
+    def dominating_keys(self, nodes: Iterable[str]) -> Set[str]:
+        return {node for node in nodes if self.matches(node)}
+
+
+DEFAULT_RULES = DominatingKeyRules(STEREOTYPE_RULES)
+
+
+def _quote(node: str) -> str:
+    """Quote a node name unless it is a plain DOT identifier"""
+    if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", node):
+        return node
+    return '"' + node.replace('"', '\\"') + '"'
+
+
+def label_dot(text: str, rules: Optional[DominatingKeyRules] = None) -> str:
+    """Return the DOT source of the graph with ancestry xlabels added to every node.
+
+    Nodes are written in topological order, each preceded by its incoming edges
+    (perception edges first, then by the topological position of the source).
+
+    Args:
+        text: DOT source
+        rules: Dominating-key rules (default: the stereotype rules)
+
+    Returns:
+        The labeled DOT source
+    """
+    return _label_graph(read_dot(text), rules)
+
+
+def _label_graph(graph: DotGraph, rules: Optional[DominatingKeyRules] = None) -> str:
+    rules = rules or DEFAULT_RULES
+    index = AncestryIndex(graph.nodes, ((src, dst) for src, dst, _ in graph.edges))
+    ancestry_bits = index.compute_bits(rules.dominating_keys(graph.nodes))
+    position = index.position
+
+    incoming: Dict[str, List[tuple]] = {}
+    for src, dst, attrs in graph.edges:
+        incoming.setdefault(dst, []).append((src, attrs.get("label", "").strip("\"'")))
+
+    lines = ["digraph inferenceModel{"]
+    for node_id in index.order:
+        node = index.nodes[node_id]
+        edges = sorted(incoming.get(node, []),
+                       key=lambda edge: (0 if "perc" in edge[1] else 1, position[edge[0]]))
+        for src, label in edges:
+            if label:
+                lines.append(f'    {_quote(src)} -> {_quote(node)}[label="{label}"]')
+            else:
+                lines.append(f'    {_quote(src)} -> {_quote(node)}')
+
+        # The node itself first, then its ancestors in topological order
+        members = sorted(index.decode(ancestry_bits[node_id]),
+                         key=lambda member: (member != node, position[member]))
+        ancestry_str = "{" + ", ".join(repr(member) for member in members) + "}"
+        lines.append(f'    {_quote(node)} [xlabel="{ancestry_str}"];')
+        lines.append('')
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def label_dot_file(input_path: str, output_path: str, rules: Optional[DominatingKeyRules] = None
+                   ) -> Dict[str, Any]:
+    """Label one DOT file and write the result.
+
+    Returns:
+        Statistics for the file: input, output, nodes, edges and seconds
+    """
+    start = time.perf_counter()
+    with open(input_path, encoding="utf-8") as f:
+        text = f.read()
+    graph = read_dot(text)
+    labeled = _label_graph(graph, rules)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(labeled)
+    return {
+        "input": input_path,
+        "output": output_path,
+        "nodes": len(graph.nodes),
+        "edges": len(graph.edges),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+# Rules of the current worker process, compiled once by _init_worker
+_worker_rules: Optional[DominatingKeyRules] = None
+
+
+def _init_worker(rules_path: Optional[str]) -> None:
+    global _worker_rules
+    _worker_rules = DominatingKeyRules.from_file(rules_path) if rules_path else DEFAULT_RULES
+
+
+def _label_in_worker(input_path: str, output_path: str) -> Dict[str, Any]:
+    try:
+        return label_dot_file(input_path, output_path, _worker_rules)
+    except Exception as e:
+        return {"input": input_path, "output": output_path, "error": f"{type(e).__name__}: {e}"}
+
+
+def label_directory(input_dir: str, output_dir: str, rules_path: Optional[str] = None,
+                    pattern: str = "*.dot", workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Label every file matching pattern in input_dir into output_dir using worker processes.
+
+    Args:
+        input_dir: Directory of DOT files
+        output_dir: Directory for the labeled files (same file names)
+        rules_path: Optional JSON/YAML rules file (default: the stereotype rules)
+        pattern: Glob pattern selecting the input files
+        workers: Number of worker processes (default: CPU count)
+
+    Returns:
+        Per-file statistics (see label_dot_file), with an "error" entry for files that failed
+    """
+    names = sorted(name for name in os.listdir(input_dir)
+                   if fnmatch.fnmatch(name, pattern) and os.path.isfile(os.path.join(input_dir, name)))
+    if not names:
+        return []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rules_path,)) as pool:
+        futures = [pool.submit(_label_in_worker, os.path.join(input_dir, name), os.path.join(output_dir, name))
+                   for name in names]
+        return [future.result() for future in as_completed(futures)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Add ancestry labels to every DOT file of a directory.")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument("--rules", help="JSON or YAML file of dominating-key rules")
+    parser.add_argument("--pattern", default="*.dot", help="Glob pattern of the files to label")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    args = parser.parse_args(argv)
+
+    if args.rules:
+        # Fail fast on a bad rules file instead of once per worker
+        DominatingKeyRules.from_file(args.rules)
+
+    start = time.perf_counter()
+    results = label_directory(args.input_dir, args.output_dir, args.rules, args.pattern, args.workers)
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if "error" in r]
+    for r in sorted(results, key=lambda r: r["input"]):
+        name = os.path.basename(r["input"])
+        if "error" in r:
+            print(f"FAILED {name}: {r['error']}")
+        else:
+            print(f"{r['seconds'] * 1000:9.1f} ms  {r['nodes']:6d} nodes  {r['edges']:6d} edges  {name}")
+
+    done = [r for r in results if "error" not in r]
+    nodes = sum(r["nodes"] for r in done)
+    rate = len(done) / elapsed if elapsed else 0.0
+    print(f"Labeled {len(done)}/{len(results)} files ({nodes} nodes) in {elapsed:.2f}s: "
+          f"{rate:.1f} files/s, {nodes / elapsed if elapsed else 0.0:.0f} nodes/s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,97 @@
-import re
 import json
 import ast
 import os
+import hashlib
+import logging
+import tempfile
+import uuid
 from typing import Dict, List, Set, Optional, Union, Any
 
+from dot_reader import DotGraph, read_dot
+
 from normalign_stereotype.core._plan import Plan
 from normalign_stereotype.core._agent import Agent, customize_actuation_working_config
 from normalign_stereotype.core._concept import create_concept_reference
 from normalign_stereotype.core._modified_llm import ConfiguredLLM, BulletLLM, StructuredLLM
 from normalign_stereotype.core._inference import Inference
 from normalign_stereotype.core._reference import Reference
+from normalign_stereotype.core._memory import resolve_memory_backend
+
+
+# Bump when the compiled graph state changes shape so stale cache files are ignored
+_COMPILED_GRAPH_VERSION = 2
+_compiled_graph_cache: Dict[str, str] = {}
+
+_SET_FIELDS = ('concept_names', 'classification_concept_names', 'base_concept_names')
+
+
+def _compiled_graph_dir(cache_dir: Optional[str]) -> str:
+    """Cache directory: cache_dir, $NORMALIGN_DOT_CACHE_DIR, or a per-user directory under ~/.cache"""
+    return cache_dir or os.environ.get("NORMALIGN_DOT_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "normalign_stereotype", "dot"
+    )
+
+
+def _compiled_graph_path(key: str, cache_dir: Optional[str]) -> str:
+    return os.path.join(_compiled_graph_dir(cache_dir), f"{key}.v{_COMPILED_GRAPH_VERSION}.json")
+
+
+def _encode_compiled_graph(state: Dict[str, Any]) -> Optional[str]:
+    """JSON text of a compiled graph, or None if its labels do not survive a JSON round trip"""
+    data = {**state, 'edges': [list(edge) for edge in state['edges']]}
+    for field in _SET_FIELDS:
+        data[field] = sorted(state[field])
+    try:
+        payload = json.dumps(data, ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+    # Labels are Python literals; tuples or sets among them would come back as lists
+    if json.loads(payload)['node_labels'] != state['node_labels']:
+        return None
+    return payload
+
+
+def _decode_compiled_graph(payload: str) -> Dict[str, Any]:
+    state = json.loads(payload)
+    state['edges'] = [tuple(edge) for edge in state['edges']]
+    for field in _SET_FIELDS:
+        state[field] = set(state[field])
+    return state
+
+
+def _load_compiled_graph(key: str, cache_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Look up a compiled graph by file hash, in memory first and then on disk."""
+    payload = _compiled_graph_cache.get(key)
+    if payload is None:
+        try:
+            with open(_compiled_graph_path(key, cache_dir), encoding='utf-8') as f:
+                payload = f.read()
+        except OSError:
+            return None
+        _compiled_graph_cache[key] = payload
+    try:
+        # Decoding gives every parser its own copy of the compiled state
+        return _decode_compiled_graph(payload)
+    except (ValueError, KeyError, TypeError):
+        _compiled_graph_cache.pop(key, None)
+        return None
+
+
+def _store_compiled_graph(key: str, state: Dict[str, Any], cache_dir: Optional[str] = None) -> None:
+    payload = _encode_compiled_graph(state)
+    if payload is None:
+        return
+    _compiled_graph_cache[key] = payload
+    path = _compiled_graph_path(key, cache_dir)
+    try:
+        # Only the current user may write (or list) the cache
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=os.path.dirname(path), delete=False) as f:
+            f.write(payload)
+        os.replace(f.name, path)
+    except OSError as e:
+        logging.warning(f"Could not write compiled graph cache {path}: {e}")
 
 
 class DOTParser:
@@ -28,83 +110,112 @@ class DOTParser:
         self.classification_concept_names: Set[str] = set()
         self.base_concept_names: Set[str] = set()
         self.context: str = ""
+        # Adjacency indexes built once at parse time: label -> node -> sources/destinations (in edge order)
+        self._incoming: Dict[str, Dict[str, List[str]]] = {}
+        self._outgoing: Dict[str, Dict[str, List[str]]] = {}
         
-    def parse(self) -> None:
-        """Parse the DOT file and extract nodes, edges, and concepts."""
+    def parse(self, use_cache: bool = True, cache_dir: Optional[str] = None) -> None:
+        """Parse the DOT file and extract nodes, edges, and concepts.
+
+        The compiled result is cached by the SHA-256 of the file (in memory and as JSON in
+        cache_dir), so parsing an unchanged file again skips tokenizing and compiling.
+
+        Args:
+            use_cache: Whether to read and write the compiled graph cache
+            cache_dir: Directory for compiled graphs (default: $NORMALIGN_DOT_CACHE_DIR or ~/.cache/normalign_stereotype/dot)
+        """
         try:
-            with open(self.dot_file_path, 'r') as f:
-                content = f.read()
-                print("\n=== Raw content ===")
-                print(content)
-                
-                # Extract context if present
-                context_match = re.match(r'^###(.*?)(?=digraph|$)', content, re.DOTALL)
-                if context_match:
-                    self.context = context_match.group(1).strip()
-                    print("\n=== Found context ===")
-                    print(self.context)
-                    # Remove context from content for further processing
-                    content = content[context_match.end():].strip()
+            with open(self.dot_file_path, 'rb') as f:
+                raw = f.read()
         except IOError as e:
             raise IOError(f"Failed to read DOT file: {e}")
-            
-        # Extract nodes and their labels
-        node_pattern = r'\s*"([^"]+)"\s*\[xlabel\s*=\s*"([^"]+)"\](?:\s*;)?'
-        nodes = re.findall(node_pattern, content)
-        print("\n=== Found nodes ===")
-        for node, label in nodes:
-            print(f"Node: {node}")
-            print(f"Label: {label}")
-            print("---")
-        
-        for node, label in nodes:
+
+        key = hashlib.sha256(raw).hexdigest()
+        if use_cache:
+            state = _load_compiled_graph(key, cache_dir)
+            if state is not None:
+                self._load_state(state)
+                return
+
+        graph = read_dot(raw.decode('utf-8'))
+        self._compile(graph)
+
+        if use_cache:
+            _store_compiled_graph(key, self._state(), cache_dir)
+
+    def _compile(self, graph: DotGraph) -> None:
+        """Derive concepts, views and indexes from a parsed DOT graph."""
+        self.context = graph.context
+
+        for node, attrs in graph.nodes.items():
+            label = attrs.get('xlabel', '').strip()
             try:
-                # Remove any whitespace and convert string representation to actual list
-                label = label.strip()
                 if label.startswith('{') and label.endswith('}'):
                     # Convert set-like notation to list
                     label = label[1:-1]  # Remove curly braces
                     label = label.replace("'", "")  # Remove quotes
                     label = [item.strip() for item in label.split(',') if item.strip()]
-                else:
+                elif label:
                     # Handle other formats if needed
                     label = ast.literal_eval(label)
+                else:
+                    label = []
                 self.node_labels[node] = label
-                print(f"\nProcessed node {node}")
-                print(f"Final label: {label}")
-            except (SyntaxError, ValueError) as e:
-                print(f"Warning: Could not parse label for node {node}: {label}")
+            except (SyntaxError, ValueError):
+                logging.warning(f"Could not parse label for node {node}: {label}")
                 self.node_labels[node] = []
-                
+
             if ('_classification' in node) or ("?" in node):
                 self.classification_concept_names.add(node)
             else:
                 self.concept_names.add(node)
-                
-        # print("\n=== Concept Classification ===")
-        # print("Regular concepts:", self.concept_names)
-        # print("\nClassification concepts:", self.classification_concept_names)
-        
-        # Extract edges
-        edge_pattern = r'"([^"]+)"\s*->\s*"([^"]+)"\s*\[label="(\w+)"\]'
-        self.edges = re.findall(edge_pattern, content)
-        # print("\n=== Found edges ===")
-        for src, dst, label in self.edges:
-            print(f"{src} --({label})--> {dst}")
-        
+
+        self.edges = [(src, dst, attrs.get('label', '')) for src, dst, attrs in graph.edges]
+        self._build_index()
+
         # Identify base concepts (those without perception dependencies)
-        # print("\n=== Base Concept Analysis ===")
         for concept in self.concept_names:
-            deps = self._get_concept_dependencies(concept)
-            # print(f"\nConcept: {concept}")
-            # print(f"Dependencies: {deps}")
-            if not deps:
+            if not self._get_concept_dependencies(concept):
                 self.base_concept_names.add(concept)
-                # print("Added to base concepts!")
-        
-        # print("\n=== Final Results ===")
-        # print("Base concepts:", self.base_concept_names)
-        
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            'node_labels': self.node_labels,
+            'edges': self.edges,
+            'concept_names': self.concept_names,
+            'classification_concept_names': self.classification_concept_names,
+            'base_concept_names': self.base_concept_names,
+            'context': self.context,
+            'incoming': self._incoming,
+            'outgoing': self._outgoing,
+        }
+
+    def _load_state(self, state: Dict[str, Any]) -> None:
+        self.node_labels = state['node_labels']
+        self.edges = state['edges']
+        self.concept_names = state['concept_names']
+        self.classification_concept_names = state['classification_concept_names']
+        self.base_concept_names = state['base_concept_names']
+        self.context = state['context']
+        self._incoming = state['incoming']
+        self._outgoing = state['outgoing']
+
+    def _build_index(self) -> None:
+        """Index edges by label in both directions so that neighbour queries are O(degree)."""
+        self._incoming = {}
+        self._outgoing = {}
+        for src, dst, label in self.edges:
+            self._incoming.setdefault(label, {}).setdefault(dst, []).append(src)
+            self._outgoing.setdefault(label, {}).setdefault(src, []).append(dst)
+
+    def _sources(self, concept: str, label: str) -> List[str]:
+        by_label = self._incoming.get(label)
+        return by_label.get(concept, []) if by_label else []
+
+    def _destinations(self, concept: str, label: str) -> List[str]:
+        by_label = self._outgoing.get(label)
+        return by_label.get(concept, []) if by_label else []
+
     def _get_concept_dependencies(self, concept: str) -> Set[str]:
         """Get all concepts that a given concept depends on.
         
@@ -114,11 +225,7 @@ class DOTParser:
         Returns:
             Set of concept names that the given concept depends on
         """
-        dependencies = set()
-        for src, dst, label in self.edges:
-            if dst == concept and label == 'perc':
-                dependencies.add(src)
-        return dependencies
+        return set(self._sources(concept, 'perc'))
     
     def _get_actuation_concept(self, concept: str) -> Optional[str]:
         """Get the actuation concept for a given concept.
@@ -129,10 +236,8 @@ class DOTParser:
         Returns:
             Name of the actuation concept, or None if not found
         """
-        for src, dst, label in self.edges:
-            if dst == concept and label == 'actu':
-                return src
-        return None
+        sources = self._sources(concept, 'actu')
+        return sources[0] if sources else None
 
     def get_related_concepts(self, concept: str) -> Dict[str, Set[str]]:
         """Get all related concepts for a given concept.
@@ -154,21 +259,11 @@ class DOTParser:
             raise ValueError(f"Concept '{concept}' not found in DOT file")
             
         related = {
-            'incoming_perception': set(),
-            'incoming_actuation': set(),
-            'outgoing_perception': set(),
-            'outgoing_actuation': set()
+            'incoming_perception': set(self._sources(concept, 'perc')),
+            'incoming_actuation': set(self._sources(concept, 'actu')),
+            'outgoing_perception': set(self._destinations(concept, 'perc')),
+            'outgoing_actuation': set(self._destinations(concept, 'actu'))
         }
-        
-        for src, dst, label in self.edges:
-            if dst == concept and label == 'perc':
-                related['incoming_perception'].add(src)
-            elif dst == concept and label == 'actu':
-                related['incoming_actuation'].add(src)
-            elif src == concept and label == 'perc':
-                related['outgoing_perception'].add(dst)
-            elif src == concept and label == 'actu':
-                related['outgoing_actuation'].add(dst)
                 
         return related
     
@@ -209,18 +304,12 @@ class DOTParser:
                 'required_perception': self._get_concept_dependencies(dst)
             },
             'as_source': {
-                'actuation_source_for': set(),
-                'perception_source_for': set()
+                # Concepts that this target concept actuates
+                'actuation_source_for': set(self._destinations(dst, 'actu')),
+                # Concepts that perceive this target concept
+                'perception_source_for': set(self._destinations(dst, 'perc'))
             }
         }
-        
-        # Get concepts that this target concept actuates
-        for edge_src, edge_dst, edge_label in self.edges:
-            if edge_src == dst and edge_label == 'actu':
-                context['as_source']['actuation_source_for'].add(edge_dst)    
-        # Get concepts that perceive this target concept
-            if edge_src == dst and edge_label == 'perc':
-                context['as_source']['perception_source_for'].add(edge_dst)
                 
         return context
 
@@ -231,7 +320,10 @@ def create_plan_from_dot(dot_file_path: str,
                         reference_dir: str = "normalign_stereotype/concepts/stereotype_concepts",
                         working_config: Dict[str, Dict[str, Dict]] = {},
                         input_concepts: Optional[Union[str, List[str]]] = 'statements', 
-                        output_concept: str = 'answers') -> Plan:
+                        output_concept: str = 'answers',
+                        memory_location: Optional[str] = None,
+                        memory_namespace: Optional[str] = None,
+                        shared_memory_namespace: Optional[str] = None) -> Plan:
     """Create a plan from a DOT file with specified input and output concepts.
     
     Args:
@@ -242,6 +334,14 @@ def create_plan_from_dot(dot_file_path: str,
         input_concepts: List of input concept names or single input concept name. 
                        If None, uses base concepts
         output_concept: Name of the output concept
+        memory_location: Agent memory. By default each plan gets a new temporary JSON file,
+                        deleted when the plan is closed or garbage collected.
+                        An existing JSON file is used as is. With an SQLite database
+                        (.db, .sqlite, .sqlite3) several plans, in several processes, can
+                        share one file: each writes its own namespace
+        memory_namespace: Namespace of this plan in an SQLite memory (default: a new unique one)
+        shared_memory_namespace: Read-only namespace of static concept definitions in an
+                        SQLite memory, consulted when the plan's namespace has no entry
         
     Returns:
         A configured Plan object
@@ -255,27 +355,30 @@ def create_plan_from_dot(dot_file_path: str,
     if not os.path.exists(reference_dir):
         raise FileNotFoundError(f"Reference directory not found: {reference_dir}")
     
-    # Initialize agent with memory file
-    memory_file = "memory.json"
-    # Clean memory file if it exists before creating new one
-    if os.path.exists(memory_file):
+    # Initialize agent memory, never shared with another plan unless namespaced. Without a
+    # memory_location the agent creates a temporary memory and deletes it on close
+    memory_body = {"memory_location": memory_location}
+    if memory_location is None:
+        if memory_namespace or shared_memory_namespace:
+            raise ValueError("Memory namespaces require an SQLite memory_location")
+    elif resolve_memory_backend(memory_location) == "sqlite":
+        memory_body["memory_namespace"] = memory_namespace or f"run-{uuid.uuid4().hex}"
+        memory_body["shared_memory_namespace"] = shared_memory_namespace
+    elif memory_namespace or shared_memory_namespace:
+        raise ValueError("Memory namespaces require an SQLite memory_location")
+    elif not os.path.exists(memory_location):
         try:
-            os.remove(memory_file)
-        except Exception:
-            pass  # Ignore cleanup errors if file is locked or doesn't exist
-            
-    try:
-        with open(memory_file, "w") as f:
-            json.dump({}, f)
-    except IOError as e:
-        raise IOError(f"Failed to initialize memory file: {e}")
-        
+            with open(memory_location, "w") as f:
+                json.dump({}, f)
+        except IOError as e:
+            raise IOError(f"Failed to initialize memory file: {e}")
+
     try:
         body = {
             "llm": ConfiguredLLM(model_name),
             "structured_llm": StructuredLLM(model_name),
             "bullet_llm": BulletLLM(model_name),
-            "memory_location": memory_file
+            **memory_body,
         }
         agent = Agent(body)
     except Exception as e:
@@ -301,6 +404,8 @@ def create_plan_from_dot(dot_file_path: str,
         input_concepts = list(parser.base_concept_names)
     elif isinstance(input_concepts, str):
         input_concepts = [input_concepts]
+    else:
+        input_concepts = list(input_concepts)
     
     # Validate input concepts
     for concept in input_concepts:
@@ -341,7 +446,7 @@ def create_plan_from_dot(dot_file_path: str,
         
     
     # Load references and make references for non-input base concepts and classification concepts
-    for concept in parser.base_concept_names + parser.classification_concept_names:
+    for concept in sorted(parser.base_concept_names | parser.classification_concept_names):
         if concept in input_concepts:
             continue
 
@@ -368,6 +473,30 @@ def create_plan_from_dot(dot_file_path: str,
     return plan
 
 
+def compile_plan_from_dot(dot_file_path: str,
+                          output_path: str,
+                          model_name: str = 'qwen-turbo-latest',
+                          **kwargs) -> str:
+    """Build a plan from a DOT file once and save it as a compiled artifact.
+
+    Workers can then start with Plan.load_compiled(output_path) instead of re-parsing the
+    graph, re-loading the references and re-running cognition on them.
+
+    Args:
+        dot_file_path: Path to the DOT file
+        output_path: Where to write the compiled plan
+        model_name: Name of the model, also used to rebuild the LLM clients on load
+        **kwargs: Passed on to create_plan_from_dot (reference_dir, working_config,
+            input_concepts, output_concept)
+
+    Returns:
+        The path of the compiled plan
+    """
+    plan = create_plan_from_dot(dot_file_path, model_name=model_name, **kwargs)
+    plan.order_inference()
+    return plan.compile(output_path, model_name=model_name)
+
+
 
 
 
@@ -0,0 +1,32 @@
+import pytest
+
+from ancestry import AncestryIndex
+from bench_ancestry import dominating_keys_for, legacy_ancestry, synthetic_dag
+
+
+def test_rules_on_small_graph():
+    nodes = ["A_classification", "B", "X", "Y", "C", "D"]
+    edges = [("A_classification", "X"), ("B", "X"), ("X", "C"), ("Y", "C"),
+             ("A_classification", "D"), ("B", "D")]
+    ancestry = AncestryIndex(nodes, edges).ancestry({"X"})
+
+    assert ancestry["X"] == {"X", "B"}
+    # X dominates C: C takes X's ancestry exactly, without itself
+    assert ancestry["C"] == {"X", "B"}
+    # Classification parents are not added to their children's ancestry
+    assert ancestry["D"] == {"D", "B"}
+    assert ancestry["Y"] == {"Y"}
+
+
+def test_matches_set_based_algorithm_on_synthetic_dags():
+    for seed in range(3):
+        nodes, edges = synthetic_dag(400, seed=seed)
+        keys = dominating_keys_for(nodes)
+        assert AncestryIndex(nodes, edges).ancestry(keys) == legacy_ancestry(nodes, edges, keys)
+
+
+def test_topological_positions_and_cycles():
+    index = AncestryIndex(["c", "b", "a"], [("a", "b"), ("b", "c")])
+    assert index.position == {"a": 0, "b": 1, "c": 2}
+    with pytest.raises(ValueError):
+        AncestryIndex(["a", "b"], [("a", "b"), ("b", "a")])
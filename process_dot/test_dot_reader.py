@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from dot_reader import DotSyntaxError, read_dot, tokenize_dot
+
+
+def test_unquoted_and_quoted_ids():
+    graph = read_dot('''
+    digraph inferenceModel{
+        statements [xlabel="{'statements'}"];
+        "figurative_language_element?" [xlabel = "{'figurative_language_element?'}"]
+        statements -> generalized_assumptions[label="perc"]
+        "figurative_language_element?" -> generalized_assumptions [label=actu]
+    }
+    ''')
+    assert graph.name == "inferenceModel"
+    assert graph.nodes["statements"] == {"xlabel": "{'statements'}"}
+    assert "generalized_assumptions" in graph.nodes
+    assert graph.edges == [
+        ("statements", "generalized_assumptions", {"label": "perc"}),
+        ("figurative_language_element?", "generalized_assumptions", {"label": "actu"}),
+    ]
+
+
+def test_comments_defaults_chains_and_subgraphs():
+    graph = read_dot('''
+    ### Some context for the graph
+    digraph G {
+        // line comment
+        /* block
+           comment */
+        ## draft note
+        edge [label=perc];
+        a -> {b c} -> d
+        e:port -> f [label=actu, color=red]
+    }
+    ''')
+    assert graph.context == "Some context for the graph"
+    assert ("a", "b", {"label": "perc"}) in graph.edges
+    assert ("c", "d", {"label": "perc"}) in graph.edges
+    assert ("e", "f", {"label": "actu", "color": "red"}) in graph.edges
+    assert len(graph.edges) == 5
+
+
+def test_syntax_errors_report_the_line():
+    with pytest.raises(DotSyntaxError) as error:
+        read_dot('digraph G {\n a -> b\n "c -> d\n}')
+    assert error.value.line == 3
+
+
+def test_tokenizer_drops_comments():
+    kinds = [kind for kind, _, _ in tokenize_dot("a /* x */ -> b // y\n")]
+    assert kinds == ["ID", "EDGEOP", "ID"]
+
+
+def test_bundled_unquoted_graph_parses():
+    path = os.path.join(os.path.dirname(__file__), "stereotype_graphvis_output.dot")
+    with open(path, encoding="utf-8") as f:
+        graph = read_dot(f.read())
+    assert graph.nodes["statements"]["xlabel"] == "{'statements'}"
+    assert any(label == {"label": "actu"} for _, _, label in graph.edges)
+
+
+def test_parser_uses_compiled_graph_cache(tmp_path, monkeypatch):
+    import plan_with_dot
+    from plan_with_dot import DOTParser
+
+    dot_file = os.path.join(os.path.dirname(__file__), "metaphor_draft.dot")
+    first = DOTParser(dot_file)
+    first.parse(cache_dir=str(tmp_path))
+
+    monkeypatch.setattr(plan_with_dot, "read_dot", lambda text: pytest.fail("cache miss"))
+    second = DOTParser(dot_file)
+    second.parse(cache_dir=str(tmp_path))
+    assert second.node_labels == first.node_labels
+    assert second.edges == first.edges
+    assert second.base_concept_names == first.base_concept_names
+
+    plan_with_dot._compiled_graph_cache.clear()
+    third = DOTParser(dot_file)
+    third.parse(cache_dir=str(tmp_path))
+    assert third.edges == first.edges
+    assert third.concept_names == first.concept_names
+
+
+def test_compiled_graph_cache_is_private_json(tmp_path, monkeypatch):
+    import json
+    import stat
+    import plan_with_dot
+    from plan_with_dot import DOTParser
+
+    monkeypatch.delenv("NORMALIGN_DOT_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    plan_with_dot._compiled_graph_cache.clear()
+    DOTParser(os.path.join(os.path.dirname(__file__), "metaphor_draft.dot")).parse()
+
+    cache_dir = tmp_path / "normalign_stereotype" / "dot"
+    assert stat.S_IMODE(os.stat(cache_dir).st_mode) == 0o700
+    [cached] = cache_dir.iterdir()
+    assert cached.suffix == ".json"
+    json.loads(cached.read_text(encoding="utf-8"))
+
+
+def test_plan_from_dot_deletes_its_temporary_memory(tmp_path, monkeypatch):
+    import tempfile
+    import plan_with_dot
+    from normalign_stereotype.core._tools import LLMTool
+
+    llm = LLMTool.__new__(LLMTool)  # Never invoked: the plan is only built
+    llm.token_ledger = None
+    for name in ("ConfiguredLLM", "StructuredLLM", "BulletLLM"):
+        monkeypatch.setattr(plan_with_dot, name, lambda model_name: llm)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    plan = plan_with_dot.create_plan_from_dot(
+        os.path.join(os.path.dirname(__file__), "metaphor_draft.dot"),
+        reference_dir=str(tmp_path), input_concepts=None, output_concept="figurative_language_element")
+    assert len(list(tmp_path.glob("memory_*.json"))) == 1
+    plan.close()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+from dot_reader import read_dot
+from labeling import DEFAULT_RULES, DominatingKeyRules, label_directory, label_dot
+
+HERE = os.path.dirname(__file__)
+
+
+def _xlabels(text):
+    return {node: attrs["xlabel"] for node, attrs in read_dot(text).nodes.items()}
+
+
+def test_stereotype_rules():
+    assert DEFAULT_RULES.matches("harmful_attributes_target_groups")
+    assert DEFAULT_RULES.matches("complex_attribution_form")
+    assert not DEFAULT_RULES.matches("attribution_form")
+    assert not DEFAULT_RULES.matches("harmful_attributes")
+    assert not DEFAULT_RULES.matches("sensitive_target_groups")
+    assert not DEFAULT_RULES.matches("target_groups_classification")
+    assert not DEFAULT_RULES.matches("statements")
+
+
+def test_rules_from_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [{"contains": "target"}, {"contains": "target_groups",
+                                                                   "unless_equals": ["target_groups"]}],
+                                "exclude_classification": False}))
+    rules = DominatingKeyRules.from_file(str(path))
+    assert rules.dominating_keys(["target_groups", "group", "target_classification"]) == {
+        "target_groups", "target_classification"}
+
+    with pytest.raises(ValueError):
+        DominatingKeyRules([{"contain": "typo"}])
+
+
+def test_label_dot_matches_the_bundled_output():
+    with open(os.path.join(HERE, "stereotype_graphvis_input.dot"), encoding="utf-8") as f:
+        labeled = _xlabels(label_dot(f.read()))
+    with open(os.path.join(HERE, "stereotype_graphvis_output.dot"), encoding="utf-8") as f:
+        expected = _xlabels(f.read())
+
+    def as_set(label):
+        return {item.strip().strip("'") for item in label[1:-1].split(",") if item.strip()}
+
+    assert labeled.keys() == expected.keys()
+    assert all(as_set(labeled[node]) == as_set(expected[node]) for node in labeled)
+    assert labeled["statements"] == "{'statements'}"
+
+
+def test_label_directory_in_worker_processes(tmp_path):
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    (input_dir / "a.dot").write_text("digraph G { x -> y [label=perc] }")
+    (input_dir / "b.dot").write_text("digraph G { p -> q [label=actu]; q -> r }")
+    (input_dir / "broken.dot").write_text("digraph G { ")
+    (input_dir / "notes.txt").write_text("not a graph")
+
+    results = label_directory(str(input_dir), str(tmp_path / "out"), workers=2)
+
+    by_name = {os.path.basename(r["input"]): r for r in results}
+    assert set(by_name) == {"a.dot", "b.dot", "broken.dot"}
+    assert "error" in by_name["broken.dot"]
+    assert by_name["b.dot"]["nodes"] == 3 and by_name["b.dot"]["edges"] == 2
+    assert _xlabels((tmp_path / "out" / "b.dot").read_text())["r"] == "{'r', 'p', 'q'}"